@@ -0,0 +1,249 @@
+import argparse
+import asyncio
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, fields
+
+import numpy as np
+import pandas as pd
+
+from analytics.portfolio import return_pct
+from market.engine import BUY, SELL, RuleParams, Universe, align, compute
+
+TRADING_DAYS = 252
+
+
+@dataclass
+class BacktestReport:
+    total_return_pct: float
+    trades: int
+    hit_rate: float
+    avg_trade_pct: float
+    max_drawdown_pct: float
+    turnover: float
+    by_ticker: pd.DataFrame
+    trade_list: pd.DataFrame
+    equity: pd.DataFrame
+
+
+def _drawdown_pct(growth: np.ndarray) -> np.ndarray:
+    """Просадка в % от максимума кривой роста (по столбцам)."""
+    peak = np.maximum.accumulate(np.maximum(growth, 1.0), axis=0)
+    return (growth / peak - 1) * 100
+
+
+def trade_list(universe: Universe, signals: np.ndarray) -> pd.DataFrame:
+    """Пары BUY -> SELL по сигналам; позиция, открытая на конец истории, оценивается по последней цене."""
+    listed = ~np.isnan(universe.close)
+    # Сигналы строго чередуются в каждом столбце, поэтому k-й BUY тикера закрывается его k-м SELL
+    buy_col, buy_row = np.nonzero(signals.T == BUY)
+    sell_col, sell_row = np.nonzero(signals.T == SELL)
+    is_open = np.bincount(buy_col, minlength=signals.shape[1]) > np.bincount(sell_col, minlength=signals.shape[1])
+    open_cols = np.flatnonzero(is_open)
+    last_row = len(listed) - 1 - np.argmax(listed[::-1], axis=0)
+    still_open = np.concatenate([np.zeros(len(sell_col), dtype=bool), np.ones(len(open_cols), dtype=bool)])
+    sell_col = np.concatenate([sell_col, open_cols])
+    sell_row = np.concatenate([sell_row, last_row[open_cols]])
+    order = np.lexsort((sell_row, sell_col))
+    sell_col, sell_row, still_open = sell_col[order], sell_row[order], still_open[order]
+
+    entry = universe.close[buy_row, buy_col]
+    exit_ = universe.close[sell_row, sell_col]
+    return pd.DataFrame({
+        "Code": np.asarray(universe.tickers, dtype=object)[buy_col],
+        "DateOpen": universe.dates[buy_row],
+        "DateClose": universe.dates[sell_row],
+        "TradeOpen": entry,
+        "TradeClose": exit_,
+        "ReturnPct": (exit_ / entry - 1) * 100,
+        "Open": still_open,
+    })
+
+
+def run_backtest(universe: Universe, signals: np.ndarray) -> BacktestReport:
+    """Long-only по сигналам: вход по цене закрытия дня BUY, выход — по закрытию дня SELL."""
+    listed = ~np.isnan(universe.close)
+    close = pd.DataFrame(universe.close).ffill().to_numpy()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        returns = np.nan_to_num(close[1:] / close[:-1] - 1)
+    returns = np.vstack([np.zeros((1, close.shape[1])), returns])
+
+    events = np.where(signals == BUY, 1, np.where(signals == SELL, -1, 0))
+    position = np.cumsum(events, axis=0)
+    # Позиция, открытая на закрытии дня t, получает доходность дня t + 1
+    held = np.vstack([np.zeros((1, position.shape[1])), position[:-1]])
+    strategy = held * returns
+
+    growth = np.cumprod(1 + strategy, axis=0)
+    days_listed = np.maximum(listed.sum(axis=0), 1)
+    changes = np.abs(events).sum(axis=0)
+
+    trades = trade_list(universe, signals)
+    codes = np.asarray(universe.tickers, dtype=object)
+    per_ticker = trades.groupby("Code")["ReturnPct"]
+    by_ticker = pd.DataFrame({
+        "Code": codes,
+        "TotalReturnPct": (growth[-1] - 1) * 100 if len(growth) else np.zeros(len(codes)),
+        "MaxDrawdownPct": _drawdown_pct(growth).min(axis=0) if len(growth) else np.zeros(len(codes)),
+        "ExposurePct": held.sum(axis=0) / days_listed * 100,
+        "Turnover": changes / days_listed * TRADING_DAYS,
+    }).merge(
+        pd.DataFrame({
+            "Trades": per_ticker.size(),
+            "HitRate": per_ticker.apply(lambda r: (r > 0).mean() * 100),
+            "AvgTradePct": per_ticker.mean(),
+        }).reset_index(),
+        on="Code",
+        how="left",
+    ).fillna({"Trades": 0, "HitRate": 0.0, "AvgTradePct": 0.0})
+    by_ticker = by_ticker.sort_values("TotalReturnPct", ascending=False, ignore_index=True)
+
+    # Портфель с равными весами по тикерам, уже торгующимся на дату
+    active = np.maximum(np.isfinite(close).sum(axis=1), 1)
+    portfolio = np.cumprod(1 + strategy.sum(axis=1) / active)
+    equity = pd.DataFrame({
+        "Date": universe.dates,
+        "Equity": (portfolio - 1) * 100,
+        "Drawdown": _drawdown_pct(portfolio),
+    })
+
+    n_trades = len(trades)
+    return BacktestReport(
+        total_return_pct=float((portfolio[-1] - 1) * 100) if len(portfolio) else 0.0,
+        trades=n_trades,
+        hit_rate=float((trades["ReturnPct"] > 0).mean() * 100) if n_trades else 0.0,
+        avg_trade_pct=float(trades["ReturnPct"].mean()) if n_trades else 0.0,
+        max_drawdown_pct=float(equity["Drawdown"].min()) if len(equity) else 0.0,
+        turnover=float(changes.sum() / days_listed.sum() * TRADING_DAYS),
+        by_ticker=by_ticker,
+        trade_list=trades,
+        equity=equity,
+    )
+
+
+def summary(report: BacktestReport) -> dict:
+    return {
+        "TotalReturnPct": report.total_return_pct,
+        "Trades": report.trades,
+        "HitRate": report.hit_rate,
+        "AvgTradePct": report.avg_trade_pct,
+        "MaxDrawdownPct": report.max_drawdown_pct,
+        "Turnover": report.turnover,
+    }
+
+
+# --- Перебор параметров в пуле процессов ---
+
+_universe: Universe | None = None
+
+
+def _init_worker(universe: Universe) -> None:
+    # Вселенная передаётся в процесс один раз, а не с каждой задачей
+    global _universe
+    _universe = universe
+
+
+def _evaluate(params: RuleParams) -> dict:
+    report = run_backtest(_universe, compute(_universe, params).signals)
+    return {**asdict(params), **summary(report)}
+
+
+def parameter_grid(**values) -> list[RuleParams]:
+    """Декартово произведение значений по полям RuleParams; быстрая EMA должна быть короче медленной."""
+    names = [f.name for f in fields(RuleParams) if f.name in values]
+    combos = [RuleParams(**dict(zip(names, combo))) for combo in itertools.product(*(values[n] for n in names))]
+    return [p for p in combos if p.ema_fast < p.ema_slow]
+
+
+def grid_search(universe: Universe, grid: list[RuleParams], processes: int | None = None) -> pd.DataFrame:
+    processes = processes or os.cpu_count() or 1
+    if processes == 1:
+        _init_worker(universe)
+        rows = [_evaluate(params) for params in grid]
+    else:
+        with ProcessPoolExecutor(processes, initializer=_init_worker, initargs=(universe,)) as pool:
+            rows = list(pool.map(_evaluate, grid, chunksize=max(len(grid) // (processes * 4), 1)))
+    return pd.DataFrame(rows).sort_values("TotalReturnPct", ascending=False, ignore_index=True)
+
+
+# --- Сравнение с реальными сделками ---
+
+def compare_with_ledger(trades: pd.DataFrame, ledger: dict[str, np.ndarray]) -> pd.DataFrame:
+    """Бэктест и закрытые сделки из trades по тикерам за период, который покрывает леджер.
+
+    Доходности в % в обоих случаях — в смысле net_income: (закрытие − открытие) / открытие.
+    """
+    closed = ~np.isnat(ledger["date_close"])
+    realized = pd.DataFrame({
+        "Code": ledger["exchange_id"][closed],
+        "DateOpen": ledger["date_open"][closed].astype("datetime64[D]"),
+        "ReturnPct": return_pct(ledger)[closed],
+    })
+    if not realized.empty:
+        period = (trades["DateOpen"] >= realized["DateOpen"].min()) & (trades["DateOpen"] <= realized["DateOpen"].max())
+        trades = trades[period]
+
+    def stats(frame: pd.DataFrame, prefix: str) -> pd.DataFrame:
+        grouped = frame.groupby("Code")["ReturnPct"]
+        return pd.DataFrame({
+            f"{prefix}Trades": grouped.size(),
+            f"{prefix}AvgPct": grouped.mean(),
+            f"{prefix}HitRate": grouped.apply(lambda r: (r > 0).mean() * 100),
+        })
+
+    return (
+        stats(trades, "Backtest").join(stats(realized, "Realized"), how="outer")
+        .fillna({"BacktestTrades": 0, "RealizedTrades": 0})
+        .reset_index()
+    )
+
+
+async def _load_ledger(user_id: int | None) -> dict[str, np.ndarray]:
+    from infrastructure.repositories.sqlite_config import session_scope
+    from infrastructure.repositories.trade import TradeFilter, TradeRepository
+
+    async with session_scope() as session:
+        return await TradeRepository(session).get_ledger_snapshot(TradeFilter(user_id=user_id))
+
+
+def _values(text: str, kind):
+    return [kind(v) for v in text.split(",")]
+
+
+def main() -> None:
+    from market.incremental import read_history
+    from market.universe import load_invest_ids
+
+    parser = argparse.ArgumentParser(description="Бэктест правила сигналов по сохранённым историям")
+    parser.add_argument("--compare", action="store_true", help="сравнить со сделками из таблицы trades")
+    parser.add_argument("--user-id", type=int, default=None)
+    parser.add_argument("--grid", action="store_true", help="перебор параметров в пуле процессов")
+    parser.add_argument("--ema-fast", default="8,12,16")
+    parser.add_argument("--ema-slow", default="21,26,34")
+    parser.add_argument("--rsi-overbought", default="60,65,70,75,80")
+    parser.add_argument("--max-hold-days", default="3,5,10")
+    parser.add_argument("--processes", type=int, default=None)
+    args = parser.parse_args()
+
+    universe = align({ticker: read_history(ticker) for ticker in load_invest_ids()})
+    report = run_backtest(universe, compute(universe).signals)
+    print(pd.Series(summary(report)).to_string())
+    print(report.by_ticker.to_string(index=False))
+
+    if args.compare:
+        print(compare_with_ledger(report.trade_list, asyncio.run(_load_ledger(args.user_id))).to_string(index=False))
+
+    if args.grid:
+        grid = parameter_grid(
+            ema_fast=_values(args.ema_fast, int),
+            ema_slow=_values(args.ema_slow, int),
+            rsi_overbought=_values(args.rsi_overbought, float),
+            max_hold_days=_values(args.max_hold_days, int),
+        )
+        print(f"Комбинаций: {len(grid)}")
+        print(grid_search(universe, grid, args.processes).head(20).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from market.prices import PriceTable
+
+
+@dataclass
+class PortfolioReport:
+    closed_trades: int
+    open_trades: int
+    realized_pnl: float
+    win_rate: float
+    avg_holding_days: float
+    max_drawdown: float
+    by_ticker: pd.DataFrame
+    equity: pd.DataFrame
+    exposure: pd.DataFrame
+    unrealized_pnl: float
+    open_positions: pd.DataFrame
+
+
+def direction(type_name: np.ndarray) -> np.ndarray:
+    # Как при закрытии сделки во вкладке: "buy" — длинная позиция, всё остальное — короткая
+    return np.where(np.char.lower(type_name) == "buy", 1.0, -1.0)
+
+
+def realized_pnl(ledger: dict[str, np.ndarray]) -> np.ndarray:
+    """Денежный результат по каждой сделке; NaN для открытых."""
+    return (ledger["trade_close"] - ledger["trade_open"]) * ledger["count"] * direction(ledger["type_name"])
+
+
+def return_pct(ledger: dict[str, np.ndarray]) -> np.ndarray:
+    """Доходность в %: сохранённый net_income, а если его нет — расчёт по ценам."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        computed = (ledger["trade_close"] - ledger["trade_open"]) / ledger["trade_open"] * 100 * direction(ledger["type_name"])
+    return np.where(np.isnan(ledger["net_income"]), computed, ledger["net_income"])
+
+
+def mark_to_market(ledger: dict[str, np.ndarray], prices: PriceTable) -> dict[str, np.ndarray]:
+    """Оценка открытых сделок по последнему CLOSE одним сопоставлением кодов, без цикла по строкам.
+
+    Направление — как при закрытии сделки во вкладке; для сделок без цены — NaN.
+    """
+    price_date, last = prices.lookup(ledger["exchange_id"])
+    side = direction(ledger["type_name"])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pct = (last - ledger["trade_open"]) / ledger["trade_open"] * 100 * side
+    return {
+        "price_date": price_date,
+        "last_close": last,
+        "market_value": ledger["count"] * last * side,
+        "unrealized_pnl": (last - ledger["trade_open"]) * ledger["count"] * side,
+        "unrealized_pct": pct,
+    }
+
+
+def max_drawdown(equity: np.ndarray) -> float:
+    if equity.size == 0:
+        return 0.0
+    peak = np.maximum.accumulate(np.concatenate(([0.0], equity)))[1:]
+    return float(np.max(peak - equity))
+
+
+def build_report(ledger: dict[str, np.ndarray], prices: PriceTable | None = None) -> PortfolioReport:
+    closed = ~np.isnat(ledger["date_close"])
+    pnl = realized_pnl(ledger)
+    pct = return_pct(ledger)
+
+    # --- по тикеру и типу: группировка через np.unique + bincount ---
+    codes, code_idx = np.unique(ledger["exchange_id"][closed], return_inverse=True)
+    types, type_idx = np.unique(ledger["type_name"][closed], return_inverse=True)
+    groups, inverse = np.unique(code_idx * len(types) + type_idx, return_inverse=True)
+    closed_pnl = pnl[closed]
+    closed_pct = pct[closed]
+    trades = np.bincount(inverse, minlength=len(groups))
+    by_ticker = pd.DataFrame({
+        "Code": codes[groups // max(len(types), 1)],
+        "Type": types[groups % max(len(types), 1)],
+        "Trades": trades,
+        "RealizedPnL": np.bincount(inverse, weights=np.nan_to_num(closed_pnl), minlength=len(groups)),
+        "WinRate": np.bincount(inverse, weights=closed_pnl > 0, minlength=len(groups)) / np.maximum(trades, 1) * 100,
+        "AvgReturnPct": np.bincount(inverse, weights=np.nan_to_num(closed_pct), minlength=len(groups)) / np.maximum(trades, 1),
+    }).sort_values("RealizedPnL", ascending=False, ignore_index=True)
+
+    # --- кривая капитала по датам закрытия ---
+    close_days = ledger["date_close"][closed].astype("datetime64[D]")
+    days, day_idx = np.unique(close_days, return_inverse=True)
+    daily = np.bincount(day_idx, weights=np.nan_to_num(closed_pnl), minlength=len(days))
+    curve = np.cumsum(daily)
+    peak = np.maximum.accumulate(np.concatenate(([0.0], curve)))[1:]
+    equity = pd.DataFrame({"Date": days, "Equity": curve, "Drawdown": curve - peak})
+
+    # --- экспозиция открытых позиций: по цене входа и по последнему CLOSE ---
+    is_open = ~closed
+    opened = {name: values[is_open] for name, values in ledger.items()}
+    prices = prices or PriceTable.empty()
+    marked = mark_to_market(opened, prices)
+    codes, code_idx = np.unique(opened["exchange_id"], return_inverse=True)
+    notional = opened["count"] * opened["trade_open"]
+    signed = notional * direction(opened["type_name"])
+    code_dates, code_last = prices.lookup(codes)
+    with np.errstate(invalid="ignore"):
+        exposure = pd.DataFrame({
+            "Code": codes,
+            "Positions": np.bincount(code_idx, minlength=len(codes)),
+            "Gross": np.bincount(code_idx, weights=notional, minlength=len(codes)),
+            "Net": np.bincount(code_idx, weights=signed, minlength=len(codes)),
+            "LastClose": code_last,
+            "PriceDate": code_dates,
+            # Без цены тикера — NaN, а не ноль: bincount по NaN-весам даёт NaN
+            "Market": np.bincount(code_idx, weights=marked["market_value"], minlength=len(codes)),
+            "UnrealizedPnL": np.bincount(code_idx, weights=marked["unrealized_pnl"], minlength=len(codes)),
+        }).sort_values("Gross", ascending=False, ignore_index=True)
+    open_positions = pd.DataFrame({
+        "ID": opened["id"],
+        "Code": opened["exchange_id"],
+        "Type": opened["type_name"],
+        "Count": opened["count"],
+        "TradeOpen": opened["trade_open"],
+        "LastClose": marked["last_close"],
+        "PriceDate": marked["price_date"],
+        "UnrealizedPnL": marked["unrealized_pnl"],
+        "UnrealizedPct": marked["unrealized_pct"],
+    })
+
+    holding = (ledger["date_close"][closed] - ledger["date_open"][closed]) / np.timedelta64(1, "D")
+    n_closed = int(closed.sum())
+    return PortfolioReport(
+        closed_trades=n_closed,
+        open_trades=int(is_open.sum()),
+        realized_pnl=float(np.nansum(closed_pnl)),
+        win_rate=float(np.mean(closed_pnl > 0) * 100) if n_closed else 0.0,
+        avg_holding_days=float(holding.mean()) if n_closed else 0.0,
+        max_drawdown=max_drawdown(curve),
+        by_ticker=by_ticker,
+        equity=equity,
+        exposure=exposure,
+        unrealized_pnl=float(np.nansum(marked["unrealized_pnl"])),
+        open_positions=open_positions,
+    )
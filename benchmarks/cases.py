@@ -0,0 +1,139 @@
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from pathlib import Path
+from statistics import median
+
+import numpy as np
+import pandas as pd
+
+from domain.entity import Trade
+from infrastructure.repositories.sqlite_config import create_engine, create_session_factory, session_scope
+from infrastructure.repositories.trade import TradeFilter, TradeRepository
+from market.engine import align, compute
+from market.incremental import latest_signals, read_history
+from market.indicators import compute_indicators
+from market.sources import StubMarketDataSource
+from market.store import CandleStore
+
+from benchmarks.synthetic import sqlite_file_url
+
+
+@dataclass
+class Timing:
+    name: str
+    samples: list[float] = field(default_factory=list)
+    params: dict = field(default_factory=dict)
+
+    def as_dict(self) -> dict:
+        return {
+            "min": min(self.samples),
+            "median": median(self.samples),
+            "repeat": len(self.samples),
+            "params": self.params,
+        }
+
+
+def measure(name: str, fn: Callable[[], object], repeat: int, **params) -> Timing:
+    timing = Timing(name, params=params)
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timing.samples.append(time.perf_counter() - started)
+    return timing
+
+
+async def ameasure(name: str, fn: Callable[[], Awaitable[object]], repeat: int, **params) -> Timing:
+    timing = Timing(name, params=params)
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await fn()
+        timing.samples.append(time.perf_counter() - started)
+    return timing
+
+
+# --- Репозитории и вкладка сделок ---
+
+async def trade_cases(db_path: str | Path, n_trades: int, repeat: int) -> list[Timing]:
+    from view.trade.trade_tab import PAGE_SIZE, listing_frame
+
+    engine = create_engine(sqlite_file_url(db_path))
+    factory = create_session_factory(engine)
+    rng = np.random.default_rng(1)
+    ids = rng.integers(1, n_trades + 1, 200).tolist()
+    size = {"trades": n_trades}
+    suffix = f"[trades={n_trades}]"
+    period = TradeFilter(user_id=1, date_from=datetime(2024, 1, 1), date_to=datetime(2024, 12, 31))
+
+    async def in_session(operation):
+        async with session_scope(factory) as session:
+            return await operation(TradeRepository(session))
+
+    async def get_by_id():
+        async with session_scope(factory) as session:
+            repo = TradeRepository(session)
+            for obj_id in ids:
+                await repo.get_by_id(obj_id)
+
+    async def write_cycle():
+        async with session_scope(factory) as session:
+            repo = TradeRepository(session)
+            trade = await repo.add(Trade(
+                date_open=datetime(2025, 1, 1), trade_open=100.0, count=1,
+                trade_type_id=1, trade_code_id=1, user_id=1,
+            ))
+            await repo.update(trade.id, trade_close=101.0, date_close=datetime(2025, 1, 2), net_income=1.0)
+            await repo.delete(trade.id)
+
+    async def add_many():
+        async with session_scope(factory) as session:
+            repo = TradeRepository(session)
+            added = await repo.add_many([
+                Trade(date_open=datetime(2025, 1, 1), trade_open=100.0, count=1, trade_type_id=1, trade_code_id=1, user_id=1)
+                for _ in range(1000)
+            ])
+            await repo.delete_many(ids=[t.id for t in added])
+
+    page_rows = await in_session(lambda r: r.get_listing(period, order_by="date_open", limit=PAGE_SIZE))
+    all_open = await in_session(lambda r: r.get_listing(TradeFilter(is_open=True)))
+
+    timings = [
+        await ameasure(f"repo.get_by_id x200{suffix}", get_by_id, repeat, **size),
+        await ameasure(f"repo.find page{suffix}", lambda: in_session(
+            lambda r: r.find(user_id=1, order_by="date_open", after=(datetime(2024, 6, 1), 0), limit=PAGE_SIZE)
+        ), repeat, **size),
+        await ameasure(f"repo.count{suffix}", lambda: in_session(lambda r: r.count(*period.criteria())), repeat, **size),
+        await ameasure(f"repo.add+update+delete{suffix}", write_cycle, repeat, **size),
+        await ameasure(f"repo.add_many x1000{suffix}", add_many, repeat, **size),
+        await ameasure(f"trade.get_listing page{suffix}", lambda: in_session(
+            lambda r: r.get_listing(period, order_by="date_open", limit=PAGE_SIZE)
+        ), repeat, **size),
+        await ameasure(f"trade.ledger{suffix}", lambda: in_session(lambda r: r._load_ledger(TradeFilter())), repeat, **size),
+        measure(f"view.listing_frame page{suffix}", lambda: listing_frame(page_rows), repeat, **size),
+        measure(f"view.listing_frame open trades{suffix}", lambda: listing_frame(all_open), repeat, rows=len(all_open), **size),
+    ]
+    await engine.dispose()
+    return timings
+
+
+# --- Истории тикеров и вкладка сигналов ---
+
+def history_cases(data_dir: str | Path, tickers: list[str], repeat: int) -> list[Timing]:
+    data_dir = Path(data_dir)
+    store = CandleStore(data_dir / "store")
+    size = {"tickers": len(tickers)}
+    suffix = f"[tickers={len(tickers)}]"
+    last = date.fromisoformat(store.last_date(tickers[0]))
+    # Источник без новых дней: замеряется путь вкладки, а не сеть
+    source = StubMarketDataSource({})
+    histories = {ticker: read_history(ticker, data_dir) for ticker in tickers}
+
+    return [
+        measure(f"csv.read full{suffix}", lambda: [pd.read_csv(data_dir / f"{t}.csv") for t in tickers], repeat, **size),
+        measure(f"csv.read tail 5{suffix}", lambda: [pd.read_csv(data_dir / f"{t}.csv").tail(5) for t in tickers], repeat, **size),
+        measure(f"store.tail 5{suffix}", lambda: [store.tail(t, 5) for t in tickers], repeat, **size),
+        measure(f"signals.latest{suffix}", lambda: latest_signals(tickers, source, end=last, data_dir=data_dir), repeat, **size),
+        measure(f"indicators.ta per ticker{suffix}", lambda: [compute_indicators(h["CLOSE"]) for h in histories.values()], max(repeat // 3, 1), **size),
+        measure(f"indicators.engine batch{suffix}", lambda: compute(align(histories)), repeat, **size),
+    ]
@@ -0,0 +1,71 @@
+import re
+import subprocess
+import sys
+
+from benchmarks.cases import Timing
+
+# Холодный импорт в отдельном интерпретаторе: каркас main.py и каждая страница поверх него.
+# Бюджеты — с запасом от замеров на рабочей машине; превышение валит прогон, как и план без индекса
+IMPORT_CASES = {
+    "shell": (["streamlit", "infrastructure.instrumentation", "view.shared.debug_panel"], 1.0),
+    "signals page": (["view.singal.signal_tab"], 1.5),
+    "trades page": (["view.trade.trade_tab"], 2.5),
+}
+# Страница не должна тянуть модули, которые нужны только другой странице или воркеру
+FORBIDDEN_IMPORTS = {
+    "shell": ["pandas", "sqlalchemy", "pyarrow", "aiohttp", "ta"],
+    "signals page": ["sqlalchemy", "aiohttp", "ta", "analytics.portfolio"],
+    # pyarrow сюда не входит: его подхватывает сам pandas, если он установлен
+    "trades page": ["aiohttp", "ta", "market.signal_snapshot"],
+}
+
+_IMPORTTIME = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)")
+_MARKER = "-- preload done --"
+
+
+def profile_imports(modules: list[str], preload: list[str] = ()) -> tuple[float, set[str]]:
+    """Время импорта modules (с) поверх уже импортированных preload и множество загруженных ими модулей."""
+    code = "".join(f"import {m}\n" for m in preload)
+    code += f"import sys\nsys.stderr.write({_MARKER!r} + '\\n')\n"
+    code += "".join(f"import {m}\n" for m in modules)
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True, text=True, check=True,
+    )
+    loaded, total, started = set(), 0, False
+    for line in proc.stderr.splitlines():
+        if line == _MARKER:
+            # Всё, что ниже, импортировано уже modules, а не preload
+            started = True
+            continue
+        match = _IMPORTTIME.match(line)
+        if not match:
+            continue
+        _, cumulative, indent, name = match.groups()
+        if started:
+            loaded.add(name)
+            if not indent:
+                total += int(cumulative)
+    return total / 1e6, loaded
+
+
+def import_cases(repeat: int) -> tuple[list[Timing], dict[str, dict]]:
+    shell = IMPORT_CASES["shell"][0]
+    timings, checks = [], {}
+    for name, (modules, budget) in IMPORT_CASES.items():
+        preload = [] if name == "shell" else shell
+        timing = Timing(f"import[{name}]", params={"modules": modules})
+        loaded = set()
+        for _ in range(repeat):
+            seconds, loaded = profile_imports(modules, preload)
+            timing.samples.append(seconds)
+        timings.append(timing)
+
+        median = timing.as_dict()["median"]
+        leaked = sorted(m for m in FORBIDDEN_IMPORTS.get(name, []) if m in loaded)
+        checks[f"import budget {name}"] = {
+            "ok": median <= budget and not leaked,
+            "problem": f"{median:.2f} s > {budget} s" if median > budget else f"imports {', '.join(leaked)}",
+            "plan": [f"{median * 1000:.0f} ms of {budget * 1000:.0f} ms", *(f"loads {m}" for m in leaked)],
+        }
+    return timings, checks
@@ -0,0 +1,100 @@
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from datetime import datetime
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from infrastructure.repositories.sqlite_config import create_session_factory, session_scope
+from infrastructure.repositories.trade import TradeFilter, TradeRepository
+
+# Как PAGE_SIZE вкладки сделок; сама вкладка не импортируется, чтобы не тянуть streamlit
+PAGE_SIZE = 50
+
+
+@dataclass
+class PlanCheck:
+    name: str
+    # Вызов репозитория ровно так, как его делает вкладка сделок
+    call: Callable[[TradeRepository], Awaitable]
+    index: str
+
+
+# Фильтры, которые собирает _trade_filters вкладки: пользователя она не выбирает
+PERIOD = TradeFilter(date_from=datetime(2024, 1, 1), date_to=datetime(2024, 3, 31, 23, 59, 59))
+OPEN = TradeFilter(is_open=True)
+BY_CODE = TradeFilter(trade_code_id=5)
+# С пользователем: экспорт cli.py --user-id, леджер бэктеста, страницы find(user_id=...)
+USER_PERIOD = TradeFilter(user_id=1, date_from=PERIOD.date_from, date_to=PERIOD.date_to)
+USER_OPEN = TradeFilter(user_id=1, is_open=True)
+
+# Запросы к сделкам и индексы, которые они обязаны использовать (миграция a3c9e1b7d204)
+PLAN_CHECKS = [
+    PlanCheck(
+        "listing by period",
+        lambda repo: repo.get_listing(PERIOD, order_by="date_open", limit=PAGE_SIZE),
+        "ix_trades_date_open",
+    ),
+    PlanCheck("count by period", lambda repo: repo.count(*PERIOD.criteria()), "ix_trades_date_open"),
+    PlanCheck("open positions", lambda repo: repo.get_listing(OPEN, limit=PAGE_SIZE), "ix_trades_open_id"),
+    PlanCheck("count open", lambda repo: repo.count(*OPEN.criteria()), "ix_trades_open_id"),
+    PlanCheck("trades by ticker", lambda repo: repo.get_listing(BY_CODE, limit=PAGE_SIZE), "ix_trades_trade_code_id"),
+    PlanCheck("count by ticker", lambda repo: repo.count(*BY_CODE.criteria()), "ix_trades_trade_code_id"),
+    PlanCheck(
+        "user listing by period",
+        lambda repo: repo.get_listing(USER_PERIOD, order_by="date_open", limit=PAGE_SIZE),
+        "ix_trades_user_id_date_open",
+    ),
+    PlanCheck("count user period", lambda repo: repo.count(*USER_PERIOD.criteria()), "ix_trades_user_id_date_open"),
+    PlanCheck(
+        "user page after cursor",
+        lambda repo: repo.find(user_id=1, order_by="date_open", after=(datetime(2024, 6, 1), 0), limit=PAGE_SIZE),
+        "ix_trades_user_id_date_open",
+    ),
+    PlanCheck(
+        "user open positions",
+        lambda repo: repo.get_listing(USER_OPEN, limit=PAGE_SIZE),
+        "ix_trades_user_id_date_open",
+    ),
+]
+
+
+async def explain(engine: AsyncEngine, check: PlanCheck) -> list[str]:
+    """План запросов, которые репозиторий выполнил в check.call, с теми же параметрами."""
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany) -> None:
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, parameters))
+
+    event.listen(engine.sync_engine, "before_cursor_execute", capture)
+    try:
+        async with session_scope(create_session_factory(engine)) as session:
+            await check.call(TradeRepository(session))
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", capture)
+
+    plan = []
+    async with engine.connect() as conn:
+        for statement, parameters in statements:
+            result = await conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)
+            plan.extend(row[-1] for row in result.all())
+    return plan
+
+
+def uses_index(plan: list[str], index: str) -> bool:
+    # "SCAN trades" без индекса — полный проход по таблице
+    return any(f"INDEX {index}" in line for line in plan) and "SCAN trades" not in plan
+
+
+async def check_plans(engine: AsyncEngine) -> dict[str, dict]:
+    report = {}
+    for check in PLAN_CHECKS:
+        plan = await explain(engine, check)
+        report[check.name] = {
+            "ok": uses_index(plan, check.index),
+            "index": check.index,
+            "problem": f"no index {check.index}",
+            "plan": plan,
+        }
+    return report
@@ -0,0 +1,152 @@
+import argparse
+import asyncio
+import json
+import platform
+import subprocess
+import sys
+import tempfile
+from datetime import datetime
+from pathlib import Path
+
+from benchmarks.cases import history_cases, trade_cases
+from benchmarks.imports import import_cases
+from benchmarks.plans import check_plans
+from benchmarks.synthetic import create_trade_db, sqlite_file_url, write_histories
+from benchmarks.write_stress import write_cases
+
+RESULTS_DIR = Path("benchmarks/results")
+WORK_DIR = Path(tempfile.gettempdir()) / "viatrade-bench"
+
+
+def _meta() -> dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = ""
+    return {
+        "date": datetime.now().isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+    }
+
+
+async def _trade_suite(sizes: list[int], repeat: int, work_dir: Path) -> tuple[dict, dict]:
+    from infrastructure.repositories.sqlite_config import create_engine
+
+    results, checks = {}, {}
+    for n_trades in sizes:
+        # Сгенерированные базы переиспользуются между запусками: миллион сделок пишется ~45 с
+        db_path = work_dir / f"trades-{n_trades}.sqlite3"
+        if not db_path.exists():
+            print(f"Генерация {db_path.name}...", file=sys.stderr)
+            await create_trade_db(db_path, n_trades)
+        for timing in await trade_cases(db_path, n_trades, repeat):
+            results[timing.name] = timing.as_dict()
+
+        engine = create_engine(sqlite_file_url(db_path))
+        for name, check in (await check_plans(engine)).items():
+            checks[f"{name}[trades={n_trades}]"] = check
+        await engine.dispose()
+    return results, checks
+
+
+def run(sizes: list[int], tickers: list[int], repeat: int, work_dir: Path, writers: list[int] = (), ops: int = 100) -> dict:
+    work_dir.mkdir(parents=True, exist_ok=True)
+    # Импорты меряются первыми, пока машина не прогрета генерацией данных
+    import_timings, import_checks = import_cases(repeat)
+    results, checks = asyncio.run(_trade_suite(sizes, repeat, work_dir))
+
+    for n_tickers in tickers:
+        data_dir = work_dir / f"histories-{n_tickers}"
+        if not (data_dir / "store").exists():
+            print(f"Генерация {data_dir.name}...", file=sys.stderr)
+            write_histories(data_dir, n_tickers)
+        names = sorted(p.stem for p in data_dir.glob("*.csv"))
+        for timing in history_cases(data_dir, names, repeat):
+            results[timing.name] = timing.as_dict()
+
+    # Для записи медиана — по задержкам всех операций, p99 и пропускная способность — в params
+    for timing in asyncio.run(write_cases(work_dir, list(writers), ops)) if writers else []:
+        results[timing.name] = timing.as_dict()
+
+    for timing in import_timings:
+        results[timing.name] = timing.as_dict()
+    checks.update(import_checks)
+    return {"meta": _meta(), "results": results, "checks": checks}
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> tuple[list[dict], bool]:
+    """Медианы текущего прогона против базового; регрессия — медленнее больше чем на threshold."""
+    rows, failed = [], False
+    for name, result in current["results"].items():
+        base = baseline["results"].get(name)
+        if base is None:
+            continue
+        ratio = result["median"] / base["median"] if base["median"] else float("inf")
+        status = "regression" if ratio > 1 + threshold else "faster" if ratio < 1 - threshold else "same"
+        failed |= status == "regression"
+        rows.append({"case": name, "base": base["median"], "current": result["median"], "ratio": ratio, "status": status})
+    for name, check in current.get("checks", {}).items():
+        if not check["ok"]:
+            failed = True
+            rows.append({"case": name, "base": None, "current": None, "ratio": None, "status": check["problem"]})
+    return rows, failed
+
+
+def _print_results(report: dict) -> None:
+    width = max((len(name) for name in report["results"]), default=0)
+    for name, result in report["results"].items():
+        print(f"{name:<{width}}  median {result['median'] * 1000:10.2f} ms  min {result['min'] * 1000:10.2f} ms")
+    for name, check in report.get("checks", {}).items():
+        print(f"{'OK ' if check['ok'] else 'BAD'} {name}: {'; '.join(check['plan'])}")
+
+
+def _print_comparison(rows: list[dict]) -> None:
+    for row in rows:
+        if row["ratio"] is None:
+            print(f"!! {row['case']}: {row['status']}")
+        else:
+            mark = {"regression": "!!", "faster": "++"}.get(row["status"], "  ")
+            print(f"{mark} {row['case']}: {row['base'] * 1000:.2f} -> {row['current'] * 1000:.2f} ms (x{row['ratio']:.2f})")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Замеры репозиториев, вкладки сделок и пути сигналов")
+    parser.add_argument("--sizes", default="10000,100000", help="размеры таблицы trades, через запятую (1000000 — по запросу)")
+    parser.add_argument("--tickers", default="50,500", help="число тикеров в синтетических историях")
+    parser.add_argument("--writers", default="1,16", help="число конкурентных писателей в нагрузке записью")
+    parser.add_argument("--write-ops", type=int, default=100, help="вставок на писателя")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--work-dir", default=str(WORK_DIR))
+    parser.add_argument("--out", help=f"куда сохранить JSON (по умолчанию {RESULTS_DIR}/<дата>.json)")
+    parser.add_argument("--compare", metavar="BASELINE", help="сравнить с сохранённым прогоном")
+    parser.add_argument("--against", metavar="CURRENT", help="вместе с --compare: сравнить два файла без прогона")
+    parser.add_argument("--threshold", type=float, default=0.15, help="допустимое замедление медианы, доля")
+    args = parser.parse_args()
+
+    if args.compare and args.against:
+        current = json.loads(Path(args.against).read_text())
+    else:
+        current = run(
+            [int(v) for v in args.sizes.split(",") if v],
+            [int(v) for v in args.tickers.split(",") if v],
+            args.repeat,
+            Path(args.work_dir),
+            [int(v) for v in args.writers.split(",") if v],
+            args.write_ops,
+        )
+        out = Path(args.out) if args.out else RESULTS_DIR / f"{datetime.now():%Y%m%d-%H%M%S}.json"
+        out.parent.mkdir(parents=True, exist_ok=True)
+        out.write_text(json.dumps(current, indent=2, ensure_ascii=False))
+        _print_results(current)
+        print(f"Сохранено: {out}")
+
+    if args.compare:
+        rows, failed = compare(json.loads(Path(args.compare).read_text()), current, args.threshold)
+        _print_comparison(rows)
+        sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+import asyncio
+from datetime import date, datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import URL, insert
+
+from domain.base import BaseModel
+from domain.entity import Trade, TradeCode, TradeType, User
+from market.engine import Universe, compute, to_frames
+from market.store import CandleStore
+
+TRADE_TYPES = ["Buy", "Sell"]
+CHUNK = 50_000
+
+
+def sqlite_file_url(path: str | Path) -> URL:
+    return URL.create("sqlite+aiosqlite", database=str(path))
+
+
+def trade_columns(n_trades: int, n_codes: int, n_users: int, seed: int = 0) -> dict[str, np.ndarray]:
+    """Сделки в форме таблицы trades: ~10% открытых, даты за последние три года."""
+    rng = np.random.default_rng(seed)
+    start = np.datetime64("2022-01-01T10:00:00")
+    date_open = start + rng.integers(0, 3 * 365 * 86400, n_trades).astype("timedelta64[s]")
+    holding = rng.integers(1, 60 * 86400, n_trades).astype("timedelta64[s]")
+    is_open = rng.random(n_trades) < 0.1
+    trade_open = np.round(rng.uniform(1, 5000, n_trades), 2)
+    trade_close = np.round(trade_open * rng.normal(1.0, 0.05, n_trades), 2)
+    type_id = rng.integers(1, len(TRADE_TYPES) + 1, n_trades)
+    direction = np.where(type_id == 1, 1.0, -1.0)
+    return {
+        "date_open": date_open,
+        "date_close": np.where(is_open, np.datetime64("NaT"), date_open + holding),
+        "trade_open": trade_open,
+        "trade_close": np.where(is_open, np.nan, trade_close),
+        "net_income": np.where(is_open, np.nan, np.round((trade_close - trade_open) / trade_open * 100 * direction, 2)),
+        "count": rng.integers(1, 1000, n_trades),
+        "trade_type_id": type_id,
+        "trade_code_id": rng.integers(1, n_codes + 1, n_trades),
+        "user_id": rng.integers(1, n_users + 1, n_trades),
+    }
+
+
+def _records(columns: dict[str, np.ndarray], lo: int, hi: int) -> list[dict]:
+    values = {}
+    for name, column in columns.items():
+        part = column[lo:hi]
+        if part.dtype.kind == "M":
+            values[name] = [None if np.isnat(v) else v.astype(datetime) for v in part]
+        elif part.dtype.kind == "f":
+            values[name] = [None if np.isnan(v) else v for v in part.tolist()]
+        else:
+            values[name] = part.tolist()
+    return [dict(zip(values, row)) for row in zip(*values.values())]
+
+
+async def create_trade_db(
+    path: str | Path,
+    n_trades: int,
+    n_codes: int = 200,
+    n_users: int = 5,
+    seed: int = 0,
+) -> Path:
+    """Файл SQLite со схемой local_db.sqlite3 (включая индексы trades) и n_trades синтетическими сделками."""
+    from infrastructure.repositories.sqlite_config import create_engine
+
+    path = Path(path)
+    for suffix in ("", "-wal", "-shm"):
+        Path(f"{path}{suffix}").unlink(missing_ok=True)
+    engine = create_engine(sqlite_file_url(path))
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(BaseModel.metadata.create_all)
+            await conn.execute(insert(User.__table__), [
+                {"login": f"user{i}", "hash_password": "-", "last_login_date": datetime(2024, 1, 1)}
+                for i in range(1, n_users + 1)
+            ])
+            await conn.execute(insert(TradeType.__table__), [{"name": name} for name in TRADE_TYPES])
+            await conn.execute(insert(TradeCode.__table__), [{"exchange_id": f"T{i:04d}"} for i in range(1, n_codes + 1)])
+
+            columns = trade_columns(n_trades, n_codes, n_users, seed)
+            for lo in range(0, n_trades, CHUNK):
+                await conn.execute(insert(Trade.__table__), _records(columns, lo, min(lo + CHUNK, n_trades)))
+    finally:
+        await engine.dispose()
+    return path
+
+
+def random_closes(n_tickers: int, n_days: int, seed: int = 0, end: date = date(2025, 10, 6)) -> Universe:
+    """Случайные блуждания цен по рабочим дням, с редкими пропусками торгов."""
+    rng = np.random.default_rng(seed)
+    days = pd.bdate_range(end=end, periods=n_days).to_numpy(dtype="datetime64[D]")
+    close = np.round(100 * np.exp(np.cumsum(rng.normal(0, 0.02, (n_days, n_tickers)), axis=0)), 2)
+    close[rng.random(close.shape) < 0.01] = np.nan
+    close[0] = 100.0
+    return Universe(days, [f"T{i:04d}" for i in range(1, n_tickers + 1)], close)
+
+
+def write_histories(data_dir: str | Path, n_tickers: int, n_days: int = 255, seed: int = 0) -> list[str]:
+    """Истории в формате data/<TICKER>.csv и в колоночном сторе; индикаторы — пакетным движком."""
+    data_dir = Path(data_dir)
+    data_dir.mkdir(parents=True, exist_ok=True)
+    universe = random_closes(n_tickers, n_days, seed)
+    store = CandleStore(data_dir / "store")
+    for ticker, frame in to_frames(universe, compute(universe)).items():
+        frame.to_csv(data_dir / f"{ticker}.csv", index=False)
+        store.write(ticker, frame)
+    return universe.tickers
+
+
+def main() -> None:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Синтетические данные для замеров")
+    parser.add_argument("--db", help="путь к файлу SQLite со сделками")
+    parser.add_argument("--trades", type=int, default=10_000)
+    parser.add_argument("--histories", help="каталог для историй тикеров")
+    parser.add_argument("--tickers", type=int, default=50)
+    parser.add_argument("--days", type=int, default=255)
+    args = parser.parse_args()
+
+    if args.db:
+        asyncio.run(create_trade_db(args.db, args.trades))
+        print(f"{args.db}: {args.trades} сделок")
+    if args.histories:
+        write_histories(args.histories, args.tickers, args.days)
+        print(f"{args.histories}: {args.tickers} тикеров × {args.days} дней")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+import argparse
+import asyncio
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+
+from domain.entity import Trade
+from infrastructure.repositories.sqlite_config import create_engine, create_session_factory, create_writer_engine, session_scope
+from infrastructure.repositories.trade import TradeRepository
+from infrastructure.repositories.write_queue import WriteCoordinator
+
+from benchmarks.cases import Timing
+from benchmarks.synthetic import create_trade_db, sqlite_file_url
+
+MODES = ("direct", "queued")
+
+
+def _new_trade(rng: random.Random) -> Trade:
+    opened = datetime(2024, 1, 1) + timedelta(minutes=rng.randrange(500_000))
+    return Trade(
+        date_open=opened,
+        date_close=None,
+        trade_open=round(rng.uniform(10, 1000), 2),
+        trade_close=None,
+        net_income=None,
+        count=rng.randint(1, 100),
+        trade_type_id=1,
+        trade_code_id=rng.randint(1, 50),
+        user_id=1,
+    )
+
+
+async def stress(db_path: str | Path, mode: str, writers: int, ops: int) -> dict:
+    """writers конкурентных писателей по ops вставок каждый; задержка — от вызова до коммита."""
+    url = sqlite_file_url(db_path)
+    if mode == "direct":
+        # Как сейчас: своя сессия и свой коммит на каждую запись, соединения из общего пула
+        engine = create_engine(url)
+        factory = create_session_factory(engine)
+
+        async def write(operation):
+            async with session_scope(factory) as session:
+                return await operation(session)
+    else:
+        engine = create_writer_engine(url)
+        coordinator = WriteCoordinator(create_session_factory(engine))
+        write = coordinator.submit
+
+    latencies, errors = [], 0
+
+    async def writer(seed: int) -> None:
+        nonlocal errors
+        rng = random.Random(seed)
+        for _ in range(ops):
+            trade = _new_trade(rng)
+            started = time.perf_counter()
+            try:
+                await write(lambda s: TradeRepository(s).add(trade))
+            except Exception:
+                errors += 1
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(writer(i) for i in range(writers)))
+    elapsed = time.perf_counter() - started
+    if mode == "queued":
+        await coordinator.close()
+        batches = coordinator.stats.batches
+    else:
+        batches = writers * ops
+    await engine.dispose()
+
+    return {
+        "latencies": latencies,
+        "throughput": writers * ops / elapsed,
+        "p50": float(np.percentile(latencies, 50)),
+        "p99": float(np.percentile(latencies, 99)),
+        "errors": errors,
+        "mean_batch": writers * ops / max(batches, 1),
+    }
+
+
+async def write_cases(work_dir: Path, writers: list[int], ops: int) -> list[Timing]:
+    """Задержка записи в обоих режимах; медиана Timing — медиана задержки одной операции."""
+    timings = []
+    for mode in MODES:
+        for n in writers:
+            db_path = work_dir / f"writes-{mode}-{n}.sqlite3"
+            db_path.unlink(missing_ok=True)
+            await create_trade_db(db_path, 1000)
+            result = await stress(db_path, mode, n, ops)
+            timings.append(Timing(
+                f"writes[{mode},writers={n}]",
+                result.pop("latencies"),
+                params={"ops": ops, **{k: round(v, 6) for k, v in result.items()}},
+            ))
+    return timings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Нагрузка записью: прямые коммиты против очереди с групповым коммитом")
+    parser.add_argument("--writers", default="1,8,32", help="число конкурентных писателей, через запятую")
+    parser.add_argument("--ops", type=int, default=200, help="вставок на писателя")
+    parser.add_argument("--work-dir", default=str(Path(tempfile.gettempdir()) / "viatrade-bench"))
+    args = parser.parse_args()
+
+    work_dir = Path(args.work_dir)
+    work_dir.mkdir(parents=True, exist_ok=True)
+    timings = asyncio.run(write_cases(work_dir, [int(v) for v in args.writers.split(",") if v], args.ops))
+    for timing in timings:
+        p = timing.params
+        print(
+            f"{timing.name:<28} {p['throughput']:8.0f} оп/с  p50 {p['p50'] * 1000:7.2f} мс  "
+            f"p99 {p['p99'] * 1000:7.2f} мс  ошибок {p['errors']}  в пачке {p['mean_batch']:.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+"""Консольный запуск без Streamlit: для cron и планировщиков.
+
+    python cli.py signals                          # инкрементально по config/invest_id_list.txt
+    python cli.py signals SBER GAZP --start 2024-01-01 --end 2024-12-31
+    python cli.py export trades --user-id 1 --format parquet --out trades.parquet
+    python cli.py export histories SBER GAZP --out histories.csv
+"""
+import argparse
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import date, datetime, time
+from functools import partial
+from pathlib import Path
+
+from market.universe import DATA_DIR, INVEST_ID_LIST, load_invest_ids
+
+EXIT_OK = 0
+EXIT_FAILED = 1  # ни один тикер не обновился
+EXIT_PARTIAL = 3  # часть тикеров с ошибкой; 2 занят argparse под ошибку аргументов
+
+
+@dataclass
+class TickerOutcome:
+    ticker: str
+    appended: int = 0
+    last_date: str | None = None
+    error: str | None = None
+
+
+def _run_chunk(
+    tickers: list[str], start: date | None, end: date, data_dir: str, fetcher_options: dict
+) -> list[TickerOutcome]:
+    """Обновление группы тикеров в процессе пула: одна сессия ISS на группу, ошибки — по тикерам."""
+    from market.fetcher import PooledMoexIssSource
+    from market.incremental import fetch_window, last_trade_date, rebuild_ticker, refresh_ticker
+
+    source = PooledMoexIssSource(**fetcher_options)
+    if start:
+        windows = {ticker: (start, end) for ticker in tickers}
+    else:
+        windows = {ticker: fetch_window(last_trade_date(ticker, data_dir), end) for ticker in tickers}
+    source.prefetch({ticker: window for ticker, window in windows.items() if window})
+
+    outcomes = []
+    for ticker in tickers:
+        try:
+            if start:
+                result = rebuild_ticker(ticker, source, start, end, data_dir)
+            else:
+                result = refresh_ticker(ticker, source, end, data_dir)
+        except Exception as exc:
+            outcomes.append(TickerOutcome(ticker, error=f"{type(exc).__name__}: {exc}"))
+            continue
+        # Пустой ответ ISS (тикер с опечаткой, делистинг) для cron — такая же ошибка
+        error = None if result.last_date else "нет данных"
+        outcomes.append(TickerOutcome(ticker, result.appended, result.last_date, error))
+    return outcomes
+
+
+def run_signals(
+    tickers: list[str],
+    start: date | None = None,
+    end: date | None = None,
+    data_dir: str | Path = DATA_DIR,
+    processes: int | None = None,
+    **fetcher_options,
+) -> list[TickerOutcome]:
+    """Обновить истории тикеров в пуле процессов; без start — докачать новые дни, со start — пересчитать окно."""
+    end = end or date.today()
+    processes = max(min(processes or os.cpu_count() or 1, len(tickers)), 1)
+    run_chunk = partial(_run_chunk, start=start, end=end, data_dir=str(data_dir), fetcher_options=fetcher_options)
+    if processes == 1:
+        return run_chunk(tickers)
+    # Тикеры раскладываются по группам через один, чтобы длинные истории не копились в одной группе
+    chunks = [tickers[i::processes] for i in range(processes)]
+    with ProcessPoolExecutor(processes) as pool:
+        outcomes = {o.ticker: o for chunk in pool.map(run_chunk, chunks) for o in chunk}
+    return [outcomes[ticker] for ticker in tickers]
+
+
+def _signals(args) -> int:
+    from market.incremental import recent_signals
+    from market.signal_snapshot import publish, read_snapshot
+
+    tickers = args.tickers or load_invest_ids(args.invest_list)
+    if not tickers:
+        print(f"Нет тикеров: список {args.invest_list} пуст", file=sys.stderr)
+        return EXIT_OK
+    start = date.fromisoformat(args.start) if args.start else None
+    end = date.fromisoformat(args.end) if args.end else None
+    options = {"base_url": args.iss_url} if args.iss_url else {}
+    outcomes = run_signals(tickers, start, end, args.data_dir, args.processes, **options)
+
+    failed = [o for o in outcomes if o.error]
+    for outcome in failed:
+        print(f"{outcome.ticker}: {outcome.error}", file=sys.stderr)
+
+    # Снимок лежит рядом с историями, из которых он собран
+    snapshot_dir = Path(args.data_dir) / "snapshots"
+    previous = read_snapshot(snapshot_dir=snapshot_dir)
+    # Часть тикеров вливается в прошлый снимок, а не заменяет его; тикеры с ошибкой
+    # остаются в нём с прежними историями
+    published = list(dict.fromkeys([*(previous.invest_ids if previous else []), *tickers]))
+    # Тикеры без изменений с последнего снимка берутся из него, истории не перечитываются
+    buy, sell, recent, manifest = recent_signals(published, args.days, args.data_dir, previous)
+    updated = {o.ticker for o in outcomes if not o.error}
+    print("Buy:", ", ".join(t for t in buy if t in updated) or "нет")
+    print("Sell:", ", ".join(t for t in sell if t in updated) or "нет")
+
+    if args.publish and recent:
+        version = publish(published, buy, sell, recent, snapshot_dir, manifest)
+        print(f"Снимок #{version}", file=sys.stderr)
+
+    if len(failed) == len(outcomes):
+        return EXIT_FAILED
+    return EXIT_PARTIAL if failed else EXIT_OK
+
+
+def _export(args) -> int:
+    import asyncio
+    from infrastructure.exporters.chunked import CHUNK_ROWS, default_name
+
+    out = args.out or default_name(args.kind, args.format)
+    chunk_size = args.chunk_size or CHUNK_ROWS
+
+    def progress(rows: int) -> None:
+        print(f"\r{out}: {rows} строк", end="", file=sys.stderr, flush=True)
+
+    if args.kind == "trades":
+        from infrastructure.exporters.trades import export_trades
+        from infrastructure.repositories.trade import TradeFilter
+
+        filters = TradeFilter(
+            user_id=args.user_id,
+            date_from=datetime.fromisoformat(args.date_from) if args.date_from else None,
+            # --to включает весь день, а не только его полночь
+            date_to=datetime.combine(date.fromisoformat(args.date_to), time.max) if args.date_to else None,
+            is_open=args.is_open,
+        )
+        rows = asyncio.run(export_trades(out, args.format, filters, chunk_size, progress=progress))
+    else:
+        from infrastructure.exporters.histories import export_histories
+        rows = export_histories(out, args.format, args.tickers or None, args.data_dir, chunk_size, progress)
+    print(f"\r{out}: {rows} строк", file=sys.stderr)
+    return EXIT_OK
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="ViaTrade без браузера")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    signals = commands.add_parser("signals", help="обновить истории и вывести сигналы на последнюю дату")
+    signals.add_argument("tickers", nargs="*", help=f"тикеры; по умолчанию — из {INVEST_ID_LIST}")
+    signals.add_argument("--invest-list", default=str(INVEST_ID_LIST))
+    signals.add_argument("--start", help="YYYY-MM-DD: пересчитать историю с этой даты вместо дозагрузки")
+    signals.add_argument("--end", help="YYYY-MM-DD, по умолчанию сегодня")
+    signals.add_argument("--days", type=int, default=5, help="сколько последних строк читать для сводки")
+    signals.add_argument("--data-dir", default=str(DATA_DIR))
+    signals.add_argument("--processes", type=int, default=None)
+    signals.add_argument("--iss-url", help="другой адрес ISS, например локальный stub_server")
+    signals.add_argument(
+        "--publish", action="store_true",
+        help="опубликовать снимок в <data-dir>/snapshots; тикеры из аргументов вливаются в прошлый снимок",
+    )
+    signals.set_defaults(handler=_signals)
+
+    export = commands.add_parser("export", help="выгрузить сделки или истории тикеров в CSV/Parquet пачками")
+    export.add_argument("kind", choices=("trades", "histories"))
+    export.add_argument("tickers", nargs="*", help="для histories: тикеры; по умолчанию — все из стора и data/*.csv")
+    export.add_argument("--format", choices=("csv", "parquet"), default="csv")
+    export.add_argument("--out", help="файл выгрузки; по умолчанию <kind>-<дата>.<format>")
+    export.add_argument("--chunk-size", type=int, help="строк в пачке; по умолчанию CHUNK_ROWS экспортёра")
+    export.add_argument("--user-id", type=int, help="для trades: только сделки пользователя")
+    export.add_argument("--from", dest="date_from", help="для trades: YYYY-MM-DD, открытые не раньше")
+    export.add_argument("--to", dest="date_to", help="для trades: YYYY-MM-DD, открытые не позже")
+    status = export.add_mutually_exclusive_group()
+    status.add_argument("--open", dest="is_open", action="store_const", const=True, help="только открытые")
+    status.add_argument("--closed", dest="is_open", action="store_const", const=False, help="только закрытые")
+    export.add_argument("--data-dir", default=str(DATA_DIR))
+    export.set_defaults(handler=_export)
+
+    args = parser.parse_args(argv)
+    if getattr(args, "start", None) and args.end and args.start > args.end:
+        parser.error("--start позже --end")
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,5 +1,5 @@
 from datetime import datetime
-from sqlalchemy import ForeignKey
+from sqlalchemy import ForeignKey, Index, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from .base import BaseModel, Str128, Str512, CreatedAt, UpdatedAt
@@ -42,3 +42,13 @@ class Trade(BaseModel):
     trade_type: Mapped["TradeType"] = relationship(back_populates="trades")
     trade_code: Mapped["TradeCode"] = relationship(back_populates="trades")
     user: Mapped["User"] = relationship(back_populates="trades")
+
+    __table_args__ = (
+        # Сделки пользователя по дате: экспорт и бэктест с --user-id, страницы find(user_id=...)
+        Index("ix_trades_user_id_date_open", "user_id", "date_open"),
+        Index("ix_trades_trade_code_id", "trade_code_id"),
+        # Вкладка сделок пользователя не выбирает: листинг за период в порядке date_open
+        # и открытые позиции (date_close IS NULL) в порядке id идут без user_id
+        Index("ix_trades_date_open", "date_open", "id"),
+        Index("ix_trades_open_id", "id", sqlite_where=text("date_close IS NULL")),
+    )
@@ -0,0 +1,39 @@
+import asyncio
+from concurrent.futures import Future
+from threading import Thread
+from typing import Any, Coroutine, TypeVar
+
+R = TypeVar("R")
+
+
+class AsyncRuntime:
+    """Долгоживущий event loop в фоновом потоке с синхронным фасадом.
+
+    Соединения aiosqlite и их рабочие потоки привязаны к этому циклу
+    и переживают перезапуски скрипта Streamlit.
+    """
+
+    def __init__(self, name: str = "async-runtime") -> None:
+        self._loop = asyncio.new_event_loop()
+        self._thread = Thread(target=self._run_loop, name=name, daemon=True)
+        self._thread.start()
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        return self._loop
+
+    def _run_loop(self) -> None:
+        asyncio.set_event_loop(self._loop)
+        self._loop.run_forever()
+
+    def submit(self, coro: Coroutine[Any, Any, R]) -> Future[R]:
+        return asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+    def run(self, coro: Coroutine[Any, Any, R], timeout: float | None = None) -> R:
+        return self.submit(coro).result(timeout)
+
+    def stop(self) -> None:
+        if self._loop.is_running():
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+        self._loop.close()
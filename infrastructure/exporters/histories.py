@@ -0,0 +1,98 @@
+from collections.abc import Callable, Iterator
+from pathlib import Path
+from typing import BinaryIO
+
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+
+from infrastructure.exporters.chunked import CHUNK_ROWS, ChunkWriter
+from market.store import SCHEMA as STORE_SCHEMA, CandleStore
+from market.universe import DATA_DIR
+
+# Signal в сторе словарный, а CSV-писатель словари не умеет — в выгрузке это строка
+HISTORY_SCHEMA = pa.schema([
+    pa.field("Ticker", pa.string()),
+    *(pa.field(f.name, pa.string()) if f.name == "Signal" else f for f in STORE_SCHEMA),
+])
+
+
+def _is_history_csv(path: Path) -> bool:
+    # Как в convert_csv_dir: историей считается только CSV с колонками стора
+    with open(path, encoding="utf-8") as f:
+        return f.readline().strip().split(",") == STORE_SCHEMA.names
+
+
+def history_tickers(data_dir: str | Path = DATA_DIR) -> list[str]:
+    """Тикеры стора и ещё не перенесённые в него data/<TICKER>.csv."""
+    store = CandleStore(Path(data_dir) / "store")
+    csv_tickers = {p.stem for p in Path(data_dir).glob("*.csv") if _is_history_csv(p)}
+    return sorted(set(store.tickers()) | csv_tickers)
+
+
+def _history_source(store: CandleStore, ticker: str, data_dir: Path) -> Iterator[pa.Table]:
+    if store.exists(ticker):
+        yield store.read(ticker)
+    elif (path := data_dir / f"{ticker}.csv").exists():
+        # CSV разбирается потоково блоками и целиком в память не читается
+        options = pa_csv.ConvertOptions(column_types={f.name: f.type for f in HISTORY_SCHEMA if f.name != "Ticker"})
+        with pa_csv.open_csv(path, convert_options=options) as reader:
+            for batch in reader:
+                yield pa.Table.from_batches([batch])
+
+
+def history_chunks(
+    tickers: list[str] | None = None,
+    data_dir: str | Path = DATA_DIR,
+    chunk_size: int = CHUNK_ROWS,
+) -> Iterator[pa.Table]:
+    """Истории тикеров пачками: из стора — срезы отображённых в память файлов, иначе из CSV блоками."""
+    data_dir = Path(data_dir)
+    store = CandleStore(data_dir / "store")
+    for ticker in tickers or history_tickers(data_dir):
+        for table in _history_source(store, ticker, data_dir):
+            for offset in range(0, table.num_rows, chunk_size):
+                part = table.slice(offset, chunk_size)
+                yield part.add_column(0, "Ticker", pa.array([ticker] * part.num_rows, pa.string()))
+
+
+def history_rows(tickers: list[str] | None = None, data_dir: str | Path = DATA_DIR) -> int:
+    # Для стора число строк берётся из метаданных IPC-файла, для CSV — по числу строк файла
+    store = CandleStore(Path(data_dir) / "store")
+    total = 0
+    for ticker in tickers or history_tickers(data_dir):
+        if store.exists(ticker):
+            with pa.memory_map(str(store.path(ticker))) as source:
+                reader = pa.ipc.open_file(source)
+                total += sum(reader.get_batch(i).num_rows for i in range(reader.num_record_batches))
+        elif (path := Path(data_dir) / f"{ticker}.csv").exists():
+            with open(path, "rb") as f:
+                total += max(sum(1 for _ in f) - 1, 0)
+    return total
+
+
+def history_export_steps(
+    sink: str | Path | BinaryIO,
+    fmt: str = "csv",
+    tickers: list[str] | None = None,
+    data_dir: str | Path = DATA_DIR,
+    chunk_size: int = CHUNK_ROWS,
+) -> Iterator[int]:
+    with ChunkWriter(sink, fmt, HISTORY_SCHEMA) as writer:
+        for chunk in history_chunks(tickers, data_dir, chunk_size):
+            writer.write(chunk)
+            yield writer.rows
+
+
+def export_histories(
+    sink: str | Path | BinaryIO,
+    fmt: str = "csv",
+    tickers: list[str] | None = None,
+    data_dir: str | Path = DATA_DIR,
+    chunk_size: int = CHUNK_ROWS,
+    progress: Callable[[int], None] | None = None,
+) -> int:
+    rows = 0
+    for rows in history_export_steps(sink, fmt, tickers, data_dir, chunk_size):
+        if progress:
+            progress(rows)
+    return rows
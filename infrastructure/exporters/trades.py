@@ -0,0 +1,87 @@
+from collections.abc import AsyncIterator, Callable
+from pathlib import Path
+from typing import BinaryIO
+
+import pyarrow as pa
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from domain.entity import Trade, TradeCode, TradeType
+from infrastructure.exporters.chunked import CHUNK_ROWS, ChunkWriter
+from infrastructure.repositories.sqlite_config import default_session_factory, session_scope
+from infrastructure.repositories.trade import TradeFilter
+
+TRADE_SCHEMA = pa.schema([
+    pa.field("ID", pa.int64()),
+    pa.field("DateOpen", pa.timestamp("s")),
+    pa.field("DateClose", pa.timestamp("s")),
+    pa.field("TradeOpen", pa.float64()),
+    pa.field("TradeClose", pa.float64()),
+    pa.field("NetIncome", pa.float64()),
+    pa.field("Count", pa.int64()),
+    pa.field("Type", pa.string()),
+    pa.field("Code", pa.string()),
+])
+
+
+async def trade_chunks(
+    session: AsyncSession,
+    filters: TradeFilter = TradeFilter(),
+    chunk_size: int = CHUNK_ROWS,
+) -> AsyncIterator[pa.Table]:
+    """Сделки с типом и кодом пачками по chunk_size строк, курсором без загрузки всей выборки."""
+    stmt = (
+        select(
+            Trade.id,
+            Trade.date_open,
+            Trade.date_close,
+            Trade.trade_open,
+            Trade.trade_close,
+            Trade.net_income,
+            Trade.count,
+            TradeType.name,
+            TradeCode.exchange_id,
+        )
+        .outerjoin(TradeType, Trade.trade_type_id == TradeType.id)
+        .outerjoin(TradeCode, Trade.trade_code_id == TradeCode.id)
+        .where(*filters.criteria())
+        .order_by(Trade.id)
+        .execution_options(yield_per=chunk_size)
+    )
+    result = await session.stream(stmt)
+    async for rows in result.partitions(chunk_size):
+        columns = list(zip(*rows))
+        yield pa.table(
+            [pa.array(values, type=field.type) for values, field in zip(columns, TRADE_SCHEMA)],
+            schema=TRADE_SCHEMA,
+        )
+
+
+async def trade_export_steps(
+    sink: str | Path | BinaryIO,
+    fmt: str = "csv",
+    filters: TradeFilter = TradeFilter(),
+    chunk_size: int = CHUNK_ROWS,
+    session_factory: async_sessionmaker[AsyncSession] | None = None,
+) -> AsyncIterator[int]:
+    """Выгрузка сделок по шагам: после каждой записанной пачки отдаёт число записанных строк."""
+    async with session_scope(session_factory or default_session_factory()) as session:
+        with ChunkWriter(sink, fmt, TRADE_SCHEMA) as writer:
+            async for chunk in trade_chunks(session, filters, chunk_size):
+                writer.write(chunk)
+                yield writer.rows
+
+
+async def export_trades(
+    sink: str | Path | BinaryIO,
+    fmt: str = "csv",
+    filters: TradeFilter = TradeFilter(),
+    chunk_size: int = CHUNK_ROWS,
+    session_factory: async_sessionmaker[AsyncSession] | None = None,
+    progress: Callable[[int], None] | None = None,
+) -> int:
+    rows = 0
+    async for rows in trade_export_steps(sink, fmt, filters, chunk_size, session_factory):
+        if progress:
+            progress(rows)
+    return rows
@@ -0,0 +1,200 @@
+import argparse
+import asyncio
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import insert, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from domain.entity import Trade, TradeCode, TradeType
+from infrastructure.repositories.lookup import LookupRepository
+from infrastructure.repositories.snapshot import snapshots
+from infrastructure.repositories.sqlite_config import default_session_factory, session_scope
+from infrastructure.repositories.tradecode import TradeCodeRepository
+from infrastructure.repositories.tradetype import TradeTypeRepository
+
+DATE_FORMAT = "%d.%m.%Y"
+
+# Метки из выгрузки брокера -> имена в tradetypes
+TYPE_ALIASES = {
+    "buy": "Buy",
+    "bay": "Buy",
+    "long": "Buy",
+    "sell": "Sell",
+    "short": "Sell",
+}
+
+CSV_COLUMNS = ["DateOpen", "DateClose", "TradeOpen", "TradeClose", "NetIncome", "Count", "Type", "Code"]
+KEY_COLUMNS = ["date_open", "date_close", "trade_open", "trade_close", "count", "trade_type_id", "trade_code_id"]
+
+
+@dataclass
+class ImportReport:
+    read: int = 0
+    inserted: int = 0
+    skipped: int = 0
+    rejected: int = 0
+    new_codes: list[str] = field(default_factory=list)
+    new_types: list[str] = field(default_factory=list)
+
+
+def normalize_type(label: str) -> str:
+    label = label.strip()
+    return TYPE_ALIASES.get(label.lower(), label.capitalize())
+
+
+def normalize_chunk(chunk: pd.DataFrame) -> tuple[pd.DataFrame, int]:
+    """Приводит сырые строки CSV к колонкам trades; возвращает кадр и число отброшенных строк."""
+    labels = chunk["Type"].fillna("")
+    df = pd.DataFrame({
+        "date_open": pd.to_datetime(chunk["DateOpen"].str.strip(), format=DATE_FORMAT, errors="coerce"),
+        "date_close": pd.to_datetime(chunk["DateClose"].str.strip(), format=DATE_FORMAT, errors="coerce"),
+        "trade_open": pd.to_numeric(chunk["TradeOpen"].str.replace(",", "."), errors="coerce"),
+        "trade_close": pd.to_numeric(chunk["TradeClose"].str.replace(",", "."), errors="coerce"),
+        "net_income": pd.to_numeric(chunk["NetIncome"].str.replace(",", "."), errors="coerce"),
+        "count": pd.to_numeric(chunk["Count"], errors="coerce"),
+        "type_name": labels.map({label: normalize_type(label) for label in labels.unique()}),
+        "exchange_id": chunk["Code"].fillna("").str.strip().str.upper(),
+    })
+    valid = (
+        df["date_open"].notna()
+        & df["trade_open"].notna()
+        & df["count"].notna()
+        & (df["type_name"] != "")
+        & (df["exchange_id"] != "")
+    )
+    df = df[valid].copy()
+    df["count"] = df["count"].astype(np.int64)
+
+    # Доходность в % по той же логике, что и закрытие сделки во вкладке
+    missing = df["net_income"].isna() & df["trade_close"].notna() & (df["trade_open"] != 0)
+    direction = np.where(df["type_name"].str.lower() == "buy", 1.0, -1.0)
+    computed = ((df["trade_close"] - df["trade_open"]) / df["trade_open"] * 100 * direction).round(2)
+    df.loc[missing, "net_income"] = computed[missing]
+    return df, int((~valid).sum())
+
+
+async def _upsert_names(repository: LookupRepository, names: list[str]) -> tuple[dict[str, int], list[str]]:
+    # Известные имена берутся из кэша справочника; в БД идут только незнакомые
+    lookup = await repository.get_lookup()
+    ids = {n: lookup.by_name[n] for n in names if n in lookup.by_name}
+    unknown = lookup.missing(names)
+    if not unknown:
+        return ids, []
+
+    session, model, column = repository.session, repository.model, repository.name_column
+    existing = dict((await session.execute(
+        select(column, model.id).where(column.in_(unknown))
+    )).all())
+    missing = [n for n in unknown if n not in existing]
+    if missing:
+        await session.execute(
+            sqlite_insert(model).on_conflict_do_nothing(index_elements=[column.key]),
+            [{column.key: n} for n in missing],
+        )
+        existing = dict((await session.execute(
+            select(column, model.id).where(column.in_(unknown))
+        )).all())
+    return ids | existing, missing
+
+
+def _column_values(df: pd.DataFrame, columns: list[str]) -> list[list]:
+    # NaN/NaT -> None, numpy-скаляры -> встроенные типы Python, без обхода по ячейкам
+    return [df[c].astype(object).where(df[c].notna(), None).tolist() for c in columns]
+
+
+async def _import_chunk(
+    session: AsyncSession,
+    df: pd.DataFrame,
+    user_id: int,
+    seen: Counter,
+    inserted: Counter,
+    report: ImportReport,
+) -> None:
+    type_ids, new_types = await _upsert_names(TradeTypeRepository(session), df["type_name"].unique().tolist())
+    code_ids, new_codes = await _upsert_names(TradeCodeRepository(session), df["exchange_id"].unique().tolist())
+    report.new_types += new_types
+    report.new_codes += new_codes
+
+    df["trade_type_id"] = df["type_name"].map(type_ids)
+    df["trade_code_id"] = df["exchange_id"].map(code_ids)
+
+    # Повторный запуск не должен дублировать сделки: строка вставляется, только если
+    # её порядковый номер среди одинаковых строк файла больше, чем таких строк было в БД до импорта
+    stored = Counter(
+        tuple(row) for row in (await session.execute(
+            select(*(getattr(Trade, c) for c in KEY_COLUMNS)).where(
+                Trade.user_id == user_id,
+                Trade.date_open.between(df["date_open"].min().to_pydatetime(), df["date_open"].max().to_pydatetime()),
+            )
+        )).all()
+    )
+
+    columns = KEY_COLUMNS + ["net_income"]
+    records = []
+    for values in zip(*_column_values(df, columns)):
+        key = values[:len(KEY_COLUMNS)]
+        seen[key] += 1
+        if seen[key] <= stored[key] - inserted[key]:
+            report.skipped += 1
+            continue
+        inserted[key] += 1
+        record = dict(zip(columns, values))
+        record["user_id"] = user_id
+        records.append(record)
+
+    if records:
+        await session.execute(insert(Trade.__table__), records)
+    report.inserted += len(records)
+
+
+async def import_trade_history(
+    path: str | Path,
+    user_id: int = 1,
+    chunk_size: int = 50_000,
+    session_factory: async_sessionmaker[AsyncSession] | None = None,
+) -> ImportReport:
+    report = ImportReport()
+    seen: Counter = Counter()
+    inserted: Counter = Counter()
+
+    async with session_scope(session_factory or default_session_factory()) as session:
+        for chunk in pd.read_csv(path, chunksize=chunk_size, dtype=str, usecols=CSV_COLUMNS, keep_default_na=False):
+            report.read += len(chunk)
+            df, rejected = normalize_chunk(chunk)
+            report.rejected += rejected
+            if not df.empty:
+                await _import_chunk(session, df, user_id, seen, inserted, report)
+            # Одна транзакция на пачку строк. invalidate сбрасывает кэши только этого процесса —
+            # прежде всего справочники, из которых _upsert_names берёт известные имена.
+            # Запущенный UI — другой процесс: импорт он увидит через watch_external_writes
+            await session.commit()
+            snapshots.invalidate(Trade.__tablename__, TradeType.__tablename__, TradeCode.__tablename__)
+
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Импорт истории сделок брокера в таблицу trades")
+    parser.add_argument("path", nargs="?", default="data/trade_history.csv")
+    parser.add_argument("--user-id", type=int, default=1)
+    parser.add_argument("--chunk-size", type=int, default=50_000)
+    args = parser.parse_args()
+
+    report = asyncio.run(import_trade_history(args.path, args.user_id, args.chunk_size))
+    print(
+        f"Прочитано: {report.read}, добавлено: {report.inserted}, "
+        f"пропущено (уже в БД): {report.skipped}, отброшено: {report.rejected}"
+    )
+    if report.new_codes:
+        print("Новые тикеры:", ", ".join(report.new_codes))
+    if report.new_types:
+        print("Новые типы сделок:", ", ".join(report.new_types))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,255 @@
+import functools
+import inspect
+import json
+import logging
+import os
+import threading
+import time
+from collections import Counter, defaultdict
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from pathlib import Path
+
+logger = logging.getLogger("viatrade.perf")
+
+SLOW_QUERY_SECONDS = 0.1
+SLOW_SPAN_SECONDS = 0.5
+# Столько одинаковых запросов за один прогон — уже похоже на N+1
+REPEATED_QUERY_THRESHOLD = 10
+METRICS_PATH_ENV = "VIATRADE_METRICS_PATH"
+
+
+@dataclass
+class QueryRecord:
+    sql: str
+    seconds: float
+
+
+@dataclass
+class SpanRecord:
+    name: str
+    seconds: float
+    labels: dict[str, str] = field(default_factory=dict)
+
+
+@dataclass
+class RunStats:
+    """Запросы и замеры одного прогона (перезапуска скрипта Streamlit, команды CLI)."""
+
+    name: str
+    started: float = field(default_factory=time.perf_counter)
+    seconds: float | None = None
+    queries: list[QueryRecord] = field(default_factory=list)
+    spans: list[SpanRecord] = field(default_factory=list)
+
+    @property
+    def elapsed(self) -> float:
+        return self.seconds if self.seconds is not None else time.perf_counter() - self.started
+
+    @property
+    def sql_seconds(self) -> float:
+        return sum(q.seconds for q in self.queries)
+
+    def query_summary(self) -> list[dict]:
+        grouped: dict[str, list[float]] = defaultdict(list)
+        for query in self.queries:
+            grouped[query.sql].append(query.seconds)
+        rows = [
+            {"sql": sql, "count": len(times), "total_ms": sum(times) * 1000, "max_ms": max(times) * 1000}
+            for sql, times in grouped.items()
+        ]
+        return sorted(rows, key=lambda r: r["total_ms"], reverse=True)
+
+    def repeated_queries(self, threshold: int = REPEATED_QUERY_THRESHOLD) -> list[tuple[str, int]]:
+        return [(sql, n) for sql, n in Counter(q.sql for q in self.queries).most_common() if n >= threshold]
+
+    def slow_spans(self, threshold: float = SLOW_SPAN_SECONDS) -> list[SpanRecord]:
+        return [s for s in self.spans if s.seconds >= threshold]
+
+    def as_log(self) -> dict:
+        return {
+            "event": self.name,
+            "duration_ms": round(self.elapsed * 1000, 2),
+            "queries": len(self.queries),
+            "sql_ms": round(self.sql_seconds * 1000, 2),
+            "repeated_queries": [{"sql": sql, "count": n} for sql, n in self.repeated_queries()],
+            "slow_queries": [
+                {"sql": q.sql, "ms": round(q.seconds * 1000, 2)} for q in self.queries if q.seconds >= SLOW_QUERY_SECONDS
+            ],
+            "slow_spans": [{"name": s.name, **s.labels, "ms": round(s.seconds * 1000, 2)} for s in self.slow_spans()],
+        }
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels: tuple[tuple[str, str], ...]) -> str:
+    return "{%s}" % ",".join(f'{k}="{_escape(v)}"' for k, v in labels) if labels else ""
+
+
+class Metrics:
+    """Накопительные счётчики процесса; выгружаются текстом в формате OpenMetrics."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.clear()
+
+    def clear(self) -> None:
+        with self._lock:
+            # (имя метрики, метки) -> [count, sum, max]
+            self._summaries: dict[tuple[str, tuple], list[float]] = defaultdict(lambda: [0, 0.0, 0.0])
+            self._counters: Counter = Counter()
+
+    def _observe(self, metric: str, labels: dict[str, str], seconds: float) -> None:
+        with self._lock:
+            summary = self._summaries[(metric, tuple(sorted(labels.items())))]
+            summary[0] += 1
+            summary[1] += seconds
+            summary[2] = max(summary[2], seconds)
+
+    def observe_query(self, sql: str, seconds: float) -> None:
+        statement = sql.lstrip().split(None, 1)[0].upper() if sql.strip() else "UNKNOWN"
+        self._observe("viatrade_db_query_seconds", {"statement": statement}, seconds)
+        if seconds >= SLOW_QUERY_SECONDS:
+            with self._lock:
+                self._counters[("viatrade_db_slow_queries", ())] += 1
+
+    def observe_batch(self, size: int) -> None:
+        # Пачки очереди записи: среднее число операций на коммит = operations / batches
+        with self._lock:
+            self._counters[("viatrade_db_write_batches", ())] += 1
+            self._counters[("viatrade_db_write_operations", ())] += size
+
+    def observe_span(self, span: SpanRecord) -> None:
+        self._observe("viatrade_span_seconds", {"name": span.name, **span.labels}, span.seconds)
+
+    def observe_run(self, run: RunStats) -> None:
+        self._observe("viatrade_run_seconds", {"run": run.name}, run.elapsed)
+        with self._lock:
+            self._counters[("viatrade_run_queries", (("run", run.name),))] += len(run.queries)
+            if run.repeated_queries():
+                self._counters[("viatrade_run_repeated_queries", (("run", run.name),))] += 1
+
+    def openmetrics(self) -> str:
+        with self._lock:
+            summaries = sorted(self._summaries.items())
+            counters = sorted(self._counters.items())
+        lines, typed = [], set()
+        for (metric, labels), (count, total, _) in summaries:
+            if metric not in typed:
+                typed.add(metric)
+                lines.append(f"# TYPE {metric} summary")
+                lines.append(f"# UNIT {metric} seconds")
+            lines.append(f"{metric}_count{_labels(labels)} {count}")
+            lines.append(f"{metric}_sum{_labels(labels)} {total:.6f}")
+        # Максимум — отдельной метрикой-gauge: у summary в OpenMetrics нет сэмпла _max
+        for (metric, labels), (_, _, peak) in summaries:
+            gauge = metric.removesuffix("_seconds") + "_max_seconds"
+            if gauge not in typed:
+                typed.add(gauge)
+                lines.append(f"# TYPE {gauge} gauge")
+                lines.append(f"# UNIT {gauge} seconds")
+            lines.append(f"{gauge}{_labels(labels)} {peak:.6f}")
+        for (metric, labels), value in counters:
+            if metric not in typed:
+                typed.add(metric)
+                lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{metric}_total{_labels(labels)} {value}")
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: str | Path) -> None:
+        path = Path(path)
+        tmp = path.with_suffix(path.suffix + ".tmp")
+        tmp.write_text(self.openmetrics())
+        os.replace(tmp, path)
+
+
+metrics = Metrics()
+_current_run: ContextVar[RunStats | None] = ContextVar("viatrade_current_run", default=None)
+
+
+def current_run() -> RunStats | None:
+    return _current_run.get()
+
+
+@contextmanager
+def collect(name: str = "rerun") -> Iterator[RunStats]:
+    """Собирать запросы и замеры, сделанные внутри блока, в один RunStats.
+
+    Контекст переходит и в корутины, отправленные в фоновый цикл AsyncRuntime,
+    поэтому запросы из run_in_session попадают в прогон, который их вызвал.
+    """
+    run = RunStats(name)
+    token = _current_run.set(run)
+    try:
+        yield run
+    finally:
+        _current_run.reset(token)
+        run.seconds = time.perf_counter() - run.started
+        metrics.observe_run(run)
+        record = run.as_log()
+        suspicious = record["repeated_queries"] or record["slow_queries"] or record["slow_spans"]
+        logger.log(logging.WARNING if suspicious else logging.INFO, json.dumps(record, ensure_ascii=False))
+        if path := os.environ.get(METRICS_PATH_ENV):
+            metrics.write(path)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    seconds = time.perf_counter() - conn.info["query_started"].pop()
+    metrics.observe_query(statement, seconds)
+    if run := _current_run.get():
+        run.queries.append(QueryRecord(statement, seconds))
+
+
+def instrument_engine(engine) -> None:
+    """Подписать AsyncEngine или Engine на замер запросов."""
+    # SQLAlchemy импортируется здесь: модуль нужен каркасу UI, которому сама БД не нужна
+    from sqlalchemy import event
+    from sqlalchemy.ext.asyncio import AsyncEngine
+
+    sync_engine = engine.sync_engine if isinstance(engine, AsyncEngine) else engine
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def _finish(name: str, labels: dict[str, str], started: float) -> None:
+    span = SpanRecord(name, time.perf_counter() - started, labels)
+    metrics.observe_span(span)
+    if run := _current_run.get():
+        run.spans.append(span)
+
+
+def timed(name: str | None = None, labels: Callable[..., dict[str, str]] | None = None):
+    """Замер времени вызова функции или корутины; labels(*args, **kwargs) — доп. метки метрики."""
+
+    def decorator(fn):
+        span_name = name or fn.__qualname__
+
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return await fn(*args, **kwargs)
+                finally:
+                    _finish(span_name, labels(*args, **kwargs) if labels else {}, started)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                _finish(span_name, labels(*args, **kwargs) if labels else {}, started)
+        return wrapper
+
+    return decorator
@@ -1,43 +1,190 @@
-from typing import Type, Generic, TypeVar
+from typing import Any, Awaitable, Callable, Sequence, Type, Generic, TypeVar
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update, delete
+from sqlalchemy import ColumnElement, Select, func, select, tuple_, update, delete
 from domain.base import BaseModel
+from infrastructure.instrumentation import timed
+from infrastructure.repositories.snapshot import snapshots
+from infrastructure.repositories.unit_of_work import UnitOfWork
 
 T = TypeVar("T", bound=BaseModel)
 
 
+def _model_label(self: "BaseRepository", *args: Any, **kwargs: Any) -> dict[str, str]:
+    return {"model": self.model.__name__}
+
+
 class BaseRepository(Generic[T]):
     def __init__(self, session: AsyncSession, model: Type[T]) -> None:
         self.session = session
         self.model = model
 
+    @timed(labels=_model_label)
     async def get_by_id(self, obj_id: int) -> T | None:
         result = await self.session.execute(
             select(self.model).where(self.model.id == obj_id)
         )
         return result.scalar_one_or_none()
 
+    @timed(labels=_model_label)
     async def get_all(self) -> list[T]:
         result = await self.session.execute(select(self.model))
         return result.scalars().all()
 
+    @timed(labels=_model_label)
+    async def find(
+        self,
+        *criteria: ColumnElement[bool],
+        order_by: str = "id",
+        descending: bool = False,
+        after: Sequence[Any] | None = None,
+        limit: int | None = None,
+        **filters: Any,
+    ) -> list[T]:
+        stmt = select(self.model).where(*self._where(criteria, filters))
+        result = await self.session.execute(
+            self._paginate(stmt, order_by, descending, after, limit)
+        )
+        return result.scalars().all()
+
+    @timed(labels=_model_label)
+    async def count(self, *criteria: ColumnElement[bool], **filters: Any) -> int:
+        result = await self.session.execute(
+            select(func.count()).select_from(self.model).where(*self._where(criteria, filters))
+        )
+        return result.scalar_one()
+
+    @staticmethod
+    def cursor(obj: Any, order_by: str = "id") -> tuple:
+        # Ключ последней строки страницы — передаётся в after= для следующей
+        if order_by == "id":
+            return (obj.id,)
+        return (getattr(obj, order_by), obj.id)
+
+    def _where(
+        self,
+        criteria: Sequence[ColumnElement[bool]],
+        filters: dict[str, Any],
+    ) -> list[ColumnElement[bool]]:
+        return [*criteria, *(getattr(self.model, name) == value for name, value in filters.items())]
+
+    def _paginate(
+        self,
+        stmt: Select,
+        order_by: str,
+        descending: bool,
+        after: Sequence[Any] | None,
+        limit: int | None,
+    ) -> Select:
+        # Keyset-пагинация: (колонка, id) однозначно задают позицию без OFFSET
+        keys = [self.model.id] if order_by == "id" else [getattr(self.model, order_by), self.model.id]
+        if after is not None:
+            position = tuple_(*keys) if len(keys) > 1 else keys[0]
+            value = tuple_(*after) if len(keys) > 1 else after[0]
+            stmt = stmt.where(position < value if descending else position > value)
+        stmt = stmt.order_by(*(k.desc() if descending else k.asc() for k in keys))
+        if limit is not None:
+            stmt = stmt.limit(limit)
+        return stmt
+
+    @timed(labels=_model_label)
     async def add(self, obj: T) -> T:
         self.session.add(obj)
-        await self.session.commit()
+        await self._commit()
         return obj
 
+    @timed(labels=_model_label)
+    async def add_many(self, objs: Sequence[T]) -> list[T]:
+        self.session.add_all(objs)
+        await self._commit()
+        return list(objs)
+
+    @timed(labels=_model_label)
     async def update(self, obj_id: int, **kwargs) -> T | None:
-        await self.session.execute(
-            update(self.model).where(self.model.id == obj_id).values(**kwargs)
+        result = await self.session.scalars(
+            update(self.model)
+            .where(self.model.id == obj_id)
+            .values(**kwargs)
+            .returning(self.model)
+            .execution_options(populate_existing=True)
         )
-        await self.session.commit()
-        result = await self.session.execute(
-            select(self.model).where(self.model.id == obj_id)
+        obj = result.one_or_none()
+        await self._commit()
+        return obj
+
+    @timed(labels=_model_label)
+    async def update_where(
+        self,
+        *criteria: ColumnElement[bool],
+        ids: Sequence[int] | None = None,
+        **values: Any,
+    ) -> list[T]:
+        # Одни и те же значения для всех подходящих строк, UPDATE ... RETURNING за один запрос
+        result = await self.session.scalars(
+            update(self.model)
+            .where(*self._target(criteria, ids))
+            .values(**values)
+            .returning(self.model)
+            .execution_options(populate_existing=True)
         )
-        return result.scalar_one_or_none()
+        objs = result.all()
+        await self._commit()
+        return objs
+
+    @timed(labels=_model_label)
+    async def update_many(self, changes: Sequence[dict[str, Any]]) -> None:
+        # Разные значения для разных строк: executemany UPDATE по первичному ключу ("id" в каждом словаре)
+        if changes:
+            await self.session.execute(update(self.model), list(changes))
+        await self._commit()
 
+    @timed(labels=_model_label)
     async def delete(self, obj_id: int) -> None:
         await self.session.execute(
             delete(self.model).where(self.model.id == obj_id)
         )
+        await self._commit()
+
+    @timed(labels=_model_label)
+    async def delete_many(
+        self,
+        *criteria: ColumnElement[bool],
+        ids: Sequence[int] | None = None,
+    ) -> int:
+        result = await self.session.execute(
+            delete(self.model).where(*self._target(criteria, ids))
+        )
+        await self._commit()
+        return result.rowcount
+
+    def unit_of_work(self) -> UnitOfWork:
+        return UnitOfWork(self.session)
+
+    async def cached(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[Any]],
+        *depends_on: Type[BaseModel],
+    ) -> Any:
+        # Снимок живёт до первого коммита в любую из затронутых таблиц.
+        # Результат общий для всех сессий: кэшировать только строки/словари, не ORM-объекты
+        tables = tuple(m.__tablename__ for m in (self.model, *depends_on))
+        return await snapshots.get_or_load(f"{self.model.__tablename__}:{key}", tables, loader)
+
+    def _target(
+        self,
+        criteria: Sequence[ColumnElement[bool]],
+        ids: Sequence[int] | None,
+    ) -> list[ColumnElement[bool]]:
+        if ids is not None:
+            criteria = [*criteria, self.model.id.in_(ids)]
+        if not criteria:
+            raise ValueError(f"{self.__class__.__name__}: массовое изменение без условия запрещено")
+        return list(criteria)
+
+    async def _commit(self) -> None:
+        if UnitOfWork.is_active(self.session):
+            UnitOfWork.touch(self.session, self.model.__tablename__)
+            await self.session.flush()
+            return
         await self.session.commit()
+        snapshots.invalidate(self.model.__tablename__)
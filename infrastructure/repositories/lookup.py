@@ -0,0 +1,52 @@
+from collections.abc import Iterable, Mapping
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import ClassVar, TypeVar
+
+from sqlalchemy import select
+from sqlalchemy.orm import InstrumentedAttribute
+
+from domain.base import BaseModel
+from infrastructure.repositories.base_repository import BaseRepository
+
+T = TypeVar("T", bound=BaseModel)
+
+
+@dataclass(frozen=True)
+class Lookup:
+    """Справочник id <-> имя. Один экземпляр на версию таблицы, общий для всех сессий — только чтение."""
+
+    by_name: Mapping[str, int]
+    by_id: Mapping[int, str]
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[tuple[str, int]]) -> "Lookup":
+        by_name = dict(rows)
+        return cls(MappingProxyType(by_name), MappingProxyType({v: k for k, v in by_name.items()}))
+
+    def missing(self, names: Iterable[str]) -> list[str]:
+        return [name for name in dict.fromkeys(names) if name not in self.by_name]
+
+
+class LookupRepository(BaseRepository[T]):
+    """Репозиторий маленькой таблицы-справочника с уникальной колонкой имени.
+
+    Справочник держится в процессном кэше (SnapshotCache) до первой записи в таблицу
+    через любой репозиторий или импорт, поэтому перезапуски Streamlit его не перечитывают.
+    """
+
+    # Имя уникальной колонки модели: "name", "exchange_id", "login"
+    name_field: ClassVar[str]
+
+    @property
+    def name_column(self) -> InstrumentedAttribute:
+        return getattr(self.model, self.name_field)
+
+    async def get_lookup(self) -> Lookup:
+        return await self.cached("lookup", self._load_lookup)
+
+    async def _load_lookup(self) -> Lookup:
+        result = await self.session.execute(
+            select(self.name_column, self.model.id).order_by(self.model.id)
+        )
+        return Lookup.from_rows(result.all())
@@ -0,0 +1,68 @@
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Awaitable, Callable
+
+
+class SnapshotCache:
+    """Процессный кэш выборок, сбрасываемый по версии таблиц при коммите записи.
+
+    Коммит через репозиторий повышает версии затронутых таблиц. Чужие коммиты (импорт
+    из CLI, второй процесс Streamlit, правка файла БД вручную) видны через watch: внешняя
+    версия меняется при любом коммите в файл, в том числе из пула этого же процесса,
+    так что с watch любой коммит сбрасывает все снимки. Свой коммит от чужого по ней
+    не отличить без гонки: чужой, пришедший сразу после своего, был бы пропущен.
+    """
+
+    def __init__(self, maxsize: int = 256) -> None:
+        self._lock = Lock()
+        self._maxsize = maxsize
+        self._versions: dict[str, int] = {}
+        self._entries: OrderedDict[str, tuple[tuple[int, ...], Any]] = OrderedDict()
+        self._probe: Callable[[], int] | None = None
+
+    def watch(self, probe: Callable[[], int] | None) -> None:
+        """probe() — версия БД, меняющаяся при каждом коммите из любого соединения или процесса."""
+        with self._lock:
+            self._probe = probe
+
+    def versions(self, tables: tuple[str, ...]) -> tuple[int, ...]:
+        probe = self._probe
+        external = probe() if probe else 0
+        with self._lock:
+            return (*(self._versions.get(t, 0) for t in tables), external)
+
+    def invalidate(self, *tables: str) -> None:
+        with self._lock:
+            for table in tables:
+                self._versions[table] = self._versions.get(table, 0) + 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    async def get_or_load(
+        self,
+        key: str,
+        tables: tuple[str, ...],
+        loader: Callable[[], Awaitable[Any]],
+    ) -> Any:
+        version = self.versions(tables)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(key)
+                return entry[1]
+
+        value = await loader()
+        # Не кэшируем, если во время загрузки кто-то успел записать
+        if self.versions(tables) == version:
+            with self._lock:
+                self._entries[key] = (version, value)
+                self._entries.move_to_end(key)
+                # Страницы с разными фильтрами множат ключи — держим только недавние
+                while len(self._entries) > self._maxsize:
+                    self._entries.popitem(last=False)
+        return value
+
+
+snapshots = SnapshotCache()
@@ -1,10 +1,110 @@
-from sqlalchemy import URL
-from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+import sqlite3
+from contextlib import asynccontextmanager
+from functools import cache
+from threading import Lock
+from typing import AsyncIterator
+
+from sqlalchemy import URL, event, make_url
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+
+from infrastructure.instrumentation import instrument_engine
+from infrastructure.repositories.snapshot import snapshots
 
 sqlite_url = URL.create(
     "sqlite+aiosqlite",
     database="local_db.sqlite3"
 )
 
-engine = create_async_engine(sqlite_url, echo=False, future=True)
-SessionLocal = async_sessionmaker(engine, expire_on_commit=False)
+# Применяются к каждому новому соединению пула
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "foreign_keys": "ON",
+    "busy_timeout": 5000,           # мс ожидания блокировки вместо "database is locked"
+    "cache_size": -64000,           # отрицательное значение — в КиБ, т.е. ~64 МиБ
+    "mmap_size": 256 * 1024 * 1024,
+    "temp_store": "MEMORY",
+}
+
+
+def _apply_pragmas(dbapi_connection, connection_record) -> None:
+    cursor = dbapi_connection.cursor()
+    for name, value in SQLITE_PRAGMAS.items():
+        cursor.execute(f"PRAGMA {name}={value}")
+    cursor.close()
+    # Транзакции открывает SQLAlchemy (см. _begin), а не неявный BEGIN драйвера
+    dbapi_connection.isolation_level = None
+
+
+def _begin(conn) -> None:
+    # Драйвер sqlite3 сам открывает транзакцию только перед DML, и SAVEPOINT, выполненный раньше,
+    # становится внешней транзакцией: его RELEASE коммитит всё. С явным BEGIN точки сохранения
+    # вложенных UnitOfWork и изолированных операций WriteCoordinator действительно вложены
+    conn.exec_driver_sql("BEGIN")
+
+
+def create_engine(url: URL | str = sqlite_url, **kwargs) -> AsyncEngine:
+    kwargs.setdefault("pool_size", 5)
+    kwargs.setdefault("max_overflow", 10)
+    engine = create_async_engine(url, echo=False, future=True, **kwargs)
+    event.listen(engine.sync_engine, "connect", _apply_pragmas)
+    event.listen(engine.sync_engine, "begin", _begin)
+    instrument_engine(engine)
+    return engine
+
+
+def create_writer_engine(url: URL | str = sqlite_url) -> AsyncEngine:
+    # Одно соединение на процесс для WriteCoordinator: SQLite всё равно пишет по одному
+    return create_engine(url, pool_size=1, max_overflow=0)
+
+
+def create_session_factory(engine: AsyncEngine) -> async_sessionmaker[AsyncSession]:
+    return async_sessionmaker(engine, expire_on_commit=False)
+
+
+class DataVersionProbe:
+    """PRAGMA data_version на собственном соединении.
+
+    Значение меняется после каждого коммита в файл из любого другого соединения:
+    пула этого процесса, CLI-импорта, второго процесса Streamlit, sqlite3 вручную.
+    """
+
+    def __init__(self, path: str) -> None:
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._lock = Lock()
+
+    def __call__(self) -> int:
+        with self._lock:
+            return self._conn.execute("PRAGMA data_version").fetchone()[0]
+
+
+@cache
+def default_session_factory() -> async_sessionmaker[AsyncSession]:
+    """Сессии к local_db.sqlite3: движок и пул создаются при первом обращении, один на процесс."""
+    return create_session_factory(create_engine())
+
+
+def watch_external_writes(url: URL | str = sqlite_url) -> None:
+    """Сбрасывать кэш выборок (SnapshotCache) при коммитах в файл БД не только из этого процесса.
+
+    После этого любой коммит, включая свои, сбрасывает все снимки, а не только затронутые таблицы.
+    """
+    snapshots.watch(DataVersionProbe(make_url(url).database))
+
+
+@asynccontextmanager
+async def session_scope(
+    factory: async_sessionmaker[AsyncSession] | None = None,
+) -> AsyncIterator[AsyncSession]:
+    # Сессия на одну операцию: соединение возвращается в пул сразу после выхода
+    async with (factory or default_session_factory())() as session:
+        try:
+            yield session
+        except Exception:
+            await session.rollback()
+            raise
@@ -1,7 +1,156 @@
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Sequence
+
+import numpy as np
+from sqlalchemy import ColumnElement, Integer, cast, func, select
+from sqlalchemy.engine import Row
 from sqlalchemy.ext.asyncio import AsyncSession
-from domain.entity import Trade
+
+from domain.entity import Trade, TradeCode, TradeType
 from infrastructure.repositories.base_repository import BaseRepository
 
+# Колонки леджера в порядке выборки TradeRepository._load_ledger()
+LEDGER_COLUMNS = (
+    "id", "date_open", "date_close", "trade_open", "trade_close",
+    "net_income", "count", "type_name", "exchange_id",
+)
+
+
+def _dates(values, epoch: bool) -> np.ndarray:
+    if not epoch:
+        return np.asarray(values, dtype="datetime64[s]")
+    seconds = np.asarray(values, dtype=np.float64)
+    dates = np.where(np.isnan(seconds), 0, seconds).astype(np.int64).astype("datetime64[s]")
+    dates[np.isnan(seconds)] = np.datetime64("NaT")
+    return dates
+
+
+def ledger_columns(rows, epoch: bool = False) -> dict[str, np.ndarray]:
+    """Строки листинга -> словарь numpy-колонок (даты как datetime64, пропуски как NaN/NaT).
+
+    epoch=True — даты в строках уже переданы как unix-время в секундах.
+    """
+    columns = list(zip(*rows)) if rows else [()] * len(LEDGER_COLUMNS)
+    data = dict(zip(LEDGER_COLUMNS, columns))
+    return {
+        "id": np.asarray(data["id"], dtype=np.int64),
+        "date_open": _dates(data["date_open"], epoch),
+        "date_close": _dates(data["date_close"], epoch),
+        "trade_open": np.asarray(data["trade_open"], dtype=np.float64),
+        "trade_close": np.asarray(data["trade_close"], dtype=np.float64),
+        "net_income": np.asarray(data["net_income"], dtype=np.float64),
+        "count": np.asarray(data["count"], dtype=np.float64),
+        "type_name": np.asarray([t or "" for t in data["type_name"]], dtype=str),
+        "exchange_id": np.asarray([c or "" for c in data["exchange_id"]], dtype=str),
+    }
+
+
+@dataclass(frozen=True)
+class TradeFilter:
+    user_id: int | None = None
+    trade_code_id: int | None = None
+    trade_type_id: int | None = None
+    date_from: datetime | None = None
+    date_to: datetime | None = None
+    is_open: bool | None = None
+
+    def criteria(self) -> list[ColumnElement[bool]]:
+        criteria = []
+        if self.user_id is not None:
+            criteria.append(Trade.user_id == self.user_id)
+        if self.trade_code_id is not None:
+            criteria.append(Trade.trade_code_id == self.trade_code_id)
+        if self.trade_type_id is not None:
+            criteria.append(Trade.trade_type_id == self.trade_type_id)
+        if self.date_from is not None:
+            criteria.append(Trade.date_open >= self.date_from)
+        if self.date_to is not None:
+            criteria.append(Trade.date_open <= self.date_to)
+        if self.is_open is not None:
+            criteria.append(Trade.date_close.is_(None) if self.is_open else Trade.date_close.is_not(None))
+        return criteria
+
+
 class TradeRepository(BaseRepository[Trade]):
     def __init__(self, session: AsyncSession) -> None:
         super().__init__(session, Trade)
+
+    async def get_listing_snapshot(
+        self,
+        filters: TradeFilter = TradeFilter(),
+        order_by: str = "id",
+        descending: bool = False,
+        after: Sequence[Any] | None = None,
+        limit: int | None = None,
+    ) -> list[Row]:
+        key = f"listing:{filters!r}:{order_by}:{descending}:{tuple(after or ())!r}:{limit}"
+        return await self.cached(
+            key,
+            lambda: self.get_listing(filters, order_by, descending, after, limit),
+            TradeType,
+            TradeCode,
+        )
+
+    async def get_ledger_snapshot(self, filters: TradeFilter = TradeFilter()) -> dict[str, np.ndarray]:
+        # Весь леджер колонками numpy — для аналитики без ORM-объектов на строку
+        return await self.cached(
+            f"ledger:{filters!r}",
+            lambda: self._load_ledger(filters),
+            TradeType,
+            TradeCode,
+        )
+
+    async def _load_ledger(self, filters: TradeFilter) -> dict[str, np.ndarray]:
+        # Даты сразу как unix-время: разбор строк DateTime на стороне Python — самое дорогое место
+        result = await self.session.execute(
+            select(
+                Trade.id,
+                cast(func.strftime("%s", Trade.date_open), Integer),
+                cast(func.strftime("%s", Trade.date_close), Integer),
+                Trade.trade_open,
+                Trade.trade_close,
+                Trade.net_income,
+                Trade.count,
+                TradeType.name,
+                TradeCode.exchange_id,
+            )
+            .outerjoin(TradeType, Trade.trade_type_id == TradeType.id)
+            .outerjoin(TradeCode, Trade.trade_code_id == TradeCode.id)
+            .where(*filters.criteria())
+            .order_by(Trade.id)
+        )
+        return ledger_columns(result.all(), epoch=True)
+
+    async def count_snapshot(self, filters: TradeFilter = TradeFilter()) -> int:
+        return await self.cached(f"count:{filters!r}", lambda: self.count(*filters.criteria()))
+
+    async def get_listing(
+        self,
+        filters: TradeFilter = TradeFilter(),
+        order_by: str = "id",
+        descending: bool = False,
+        after: Sequence[Any] | None = None,
+        limit: int | None = None,
+    ) -> list[Row]:
+        # Один запрос с join вместо ленивой загрузки trade_type/trade_code на каждую строку
+        stmt = (
+            select(
+                Trade.id,
+                Trade.date_open,
+                Trade.date_close,
+                Trade.trade_open,
+                Trade.trade_close,
+                Trade.net_income,
+                Trade.count,
+                TradeType.name.label("type_name"),
+                TradeCode.exchange_id,
+            )
+            .outerjoin(TradeType, Trade.trade_type_id == TradeType.id)
+            .outerjoin(TradeCode, Trade.trade_code_id == TradeCode.id)
+            .where(*filters.criteria())
+        )
+        result = await self.session.execute(
+            self._paginate(stmt, order_by, descending, after, limit)
+        )
+        return result.all()
@@ -1,7 +1,9 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from domain.entity import TradeCode
-from infrastructure.repositories.base_repository import BaseRepository
+from infrastructure.repositories.lookup import LookupRepository
+
+class TradeCodeRepository(LookupRepository[TradeCode]):
+    name_field = "exchange_id"
 
-class TradeCodeRepository(BaseRepository[TradeCode]):
     def __init__(self, session: AsyncSession) -> None:
         super().__init__(session, TradeCode)
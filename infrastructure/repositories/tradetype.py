@@ -1,7 +1,9 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from domain.entity import TradeType
-from infrastructure.repositories.base_repository import BaseRepository
+from infrastructure.repositories.lookup import LookupRepository
+
+class TradeTypeRepository(LookupRepository[TradeType]):
+    name_field = "name"
 
-class TradeTypeRepository(BaseRepository[TradeType]):
     def __init__(self, session: AsyncSession) -> None:
         super().__init__(session, TradeType)
@@ -0,0 +1,49 @@
+from sqlalchemy.ext.asyncio import AsyncSession, AsyncSessionTransaction
+
+from infrastructure.repositories.snapshot import snapshots
+
+
+class UnitOfWork:
+    """Объединяет изменения всех репозиториев одной сессии в один коммит.
+
+    Внутри блока BaseRepository не коммитит, а только делает flush;
+    коммит (или откат при исключении) выполняется на выходе из внешнего блока.
+    Вложенный блок — точка сохранения: исключение откатывает только его изменения,
+    и если внешний блок это исключение перехватил, в коммит они не попадут.
+    """
+
+    def __init__(self, session: AsyncSession) -> None:
+        self.session = session
+        self._savepoint: AsyncSessionTransaction | None = None
+
+    @staticmethod
+    def is_active(session: AsyncSession) -> bool:
+        return session.info.get("uow_depth", 0) > 0
+
+    @staticmethod
+    def touch(session: AsyncSession, table: str) -> None:
+        session.info.setdefault("uow_tables", set()).add(table)
+
+    async def __aenter__(self) -> "UnitOfWork":
+        depth = self.session.info.get("uow_depth", 0)
+        if depth:
+            self._savepoint = await self.session.begin_nested()
+        self.session.info["uow_depth"] = depth + 1
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        self.session.info["uow_depth"] -= 1
+        if self._savepoint is not None:
+            savepoint, self._savepoint = self._savepoint, None
+            if exc_type is not None:
+                await savepoint.rollback()
+            else:
+                await savepoint.commit()
+            return
+
+        tables = self.session.info.pop("uow_tables", set())
+        if exc_type is not None:
+            await self.session.rollback()
+            return
+        await self.session.commit()
+        snapshots.invalidate(*tables)
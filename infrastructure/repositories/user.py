@@ -1,7 +1,9 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from domain.entity import User
-from infrastructure.repositories.base_repository import BaseRepository
+from infrastructure.repositories.lookup import LookupRepository
+
+class UserRepository(LookupRepository[User]):
+    name_field = "login"
 
-class UserRepository(BaseRepository[User]):
     def __init__(self, session: AsyncSession) -> None:
         super().__init__(session, User)
@@ -0,0 +1,124 @@
+import asyncio
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, TypeVar
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from infrastructure.instrumentation import metrics
+from infrastructure.repositories.unit_of_work import UnitOfWork
+
+R = TypeVar("R")
+WriteOperation = Callable[[AsyncSession], Awaitable[Any]]
+
+# Сколько ждать попутчиков для пачки после первой операции. По умолчанию не ждём:
+# пока идёт коммит, очередь копит следующую пачку сама, а одиночная запись не платит задержкой
+BATCH_WINDOW_SECONDS = 0.0
+MAX_BATCH = 256
+
+
+@dataclass
+class WriteStats:
+    operations: int = 0
+    batches: int = 0
+    failed: int = 0
+    batch_sizes: list[int] = field(default_factory=list)
+
+
+class WriteCoordinator:
+    """Единственный писатель в SQLite на процесс: операции всех сессий идут через одну очередь.
+
+    Писатель забирает всё, что накопилось в очереди (до max_batch операций), выполняет
+    их на одном соединении и коммитит пачку разом. Если операция падает, пачка откатывается
+    и повторяется с точкой сохранения на каждую операцию: остальные коммитятся, а исключение
+    получает вызвавший. Поэтому операция не должна иметь побочных эффектов вне сессии.
+    Репозитории внутри пачки не коммитят сами — пачка оборачивается в UnitOfWork,
+    и кэш выборок сбрасывается после коммита.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        window: float = BATCH_WINDOW_SECONDS,
+        max_batch: int = MAX_BATCH,
+    ) -> None:
+        self.session_factory = session_factory
+        self.window = window
+        self.max_batch = max_batch
+        self.stats = WriteStats()
+        self._queue: asyncio.Queue[tuple[WriteOperation, asyncio.Future]] | None = None
+        self._writer: asyncio.Task | None = None
+
+    async def submit(self, operation: Callable[[AsyncSession], Awaitable[R]]) -> R:
+        """Поставить операцию в очередь и дождаться коммита её пачки."""
+        if self._writer is None or self._writer.done():
+            # Очередь и писатель создаются в цикле, из которого пришла первая запись
+            self._queue = asyncio.Queue()
+            self._writer = asyncio.create_task(self._run(), name="sqlite-writer")
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((operation, future))
+        return await future
+
+    async def close(self) -> None:
+        if self._writer is not None:
+            self._writer.cancel()
+            try:
+                await self._writer
+            except asyncio.CancelledError:
+                pass
+            self._writer = None
+
+    async def _next_batch(self) -> list[tuple[WriteOperation, asyncio.Future]]:
+        batch = [await self._queue.get()]
+        if self.window > 0:
+            await asyncio.sleep(self.window)
+        while len(batch) < self.max_batch and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+        return batch
+
+    async def _run(self) -> None:
+        while True:
+            batch = await self._next_batch()
+            try:
+                await self._commit_batch(batch)
+            except Exception as exc:
+                # Не удался сам коммит: пачка целиком откатана
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(exc)
+
+    async def _commit_batch(self, batch: list[tuple[WriteOperation, asyncio.Future]]) -> None:
+        batch = [(operation, future) for operation, future in batch if not future.cancelled()]
+        try:
+            # Обычный случай: все операции проходят, точки сохранения не нужны
+            outcomes = await self._execute(batch, isolated=False)
+        except Exception:
+            # Какая-то операция упала — пачка откатана целиком; повторяем, изолируя каждую
+            outcomes = await self._execute(batch, isolated=True)
+
+        self.stats.operations += len(outcomes)
+        self.stats.batches += 1
+        self.stats.batch_sizes.append(len(outcomes))
+        metrics.observe_batch(len(outcomes))
+        for future, value, exc in outcomes:
+            if future.done():
+                continue
+            if exc is not None:
+                self.stats.failed += 1
+                future.set_exception(exc)
+            else:
+                future.set_result(value)
+
+    async def _execute(self, batch: list[tuple[WriteOperation, asyncio.Future]], isolated: bool) -> list[tuple]:
+        outcomes = []
+        async with self.session_factory() as session:
+            async with UnitOfWork(session):
+                for operation, future in batch:
+                    if not isolated:
+                        outcomes.append((future, await operation(session), None))
+                        continue
+                    try:
+                        async with session.begin_nested():
+                            outcomes.append((future, await operation(session), None))
+                    except Exception as exc:
+                        outcomes.append((future, None, exc))
+        return outcomes
@@ -1,13 +1,6 @@
-import asyncio
-from sqlalchemy import URL
-from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
-from domain.entity import User
-from infrastructure.repositories.base_repository import BaseRepository
-from infrastructure.repositories.sqlite_config import sqlite_url
-
 import streamlit as st
-from view.singal.signal_tab import show_signals_tab
-from view.trade.trade_tab import show_trade_tab
+from infrastructure.instrumentation import collect
+from view.shared.debug_panel import show_debug_panel
 
 st.set_page_config(
     page_title="ViaTrade",
@@ -24,12 +17,29 @@ st.markdown("""
     </style>
 """, unsafe_allow_html=True)
 
-st.title("VitTrade – инвестиционный анализ")
-
-tab1, tab2 = st.tabs(["Сигналы", "Анализ сделок"])
 
-with tab1:
+# Вкладки импортируются только при открытии: страница сделок не платит за pyarrow
+# и снимки сигналов, страница сигналов — за SQLAlchemy и аналитику портфеля
+def signals_page():
+    from view.singal.signal_tab import show_signals_tab
     show_signals_tab()
 
-with tab2:
+
+def trades_page():
+    from view.trade.trade_tab import show_trade_tab
     show_trade_tab()
+
+
+page = st.navigation(
+    [
+        st.Page(signals_page, title="Сигналы", icon="📊", default=True),
+        st.Page(trades_page, title="Анализ сделок", icon="📄"),
+    ],
+    position="top",
+)
+
+st.title("VitTrade – инвестиционный анализ")
+
+with collect("rerun") as run:
+    page.run()
+    show_debug_panel(run)
@@ -0,0 +1,258 @@
+import argparse
+import sys
+import time
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from market.indicators import (
+    HISTORY_COLUMNS,
+    INDICATOR_COLUMNS,
+    MAX_HOLD_DAYS,
+    RSI_OVERBOUGHT,
+    apply_signal_rule,
+    compute_indicators,
+)
+from market.universe import load_invest_ids
+
+WINDOW = 14
+SIGNAL_LABELS = np.array(["HOLD", "BUY", "SELL"], dtype=object)
+HOLD, BUY, SELL = range(3)
+
+
+@dataclass(frozen=True)
+class RuleParams:
+    """Параметры индикаторов сигнала и правила BUY/SELL; по умолчанию — как в market.indicators."""
+
+    ema_fast: int = 12
+    ema_slow: int = 26
+    macd_signal: int = 9
+    rsi_window: int = WINDOW
+    rsi_overbought: float = RSI_OVERBOUGHT
+    max_hold_days: int = MAX_HOLD_DAYS
+
+
+@dataclass
+class Universe:
+    """Цены закрытия всех тикеров на общей сетке дат: close[дата, тикер], NaN — торгов не было."""
+
+    dates: np.ndarray
+    tickers: list[str]
+    close: np.ndarray
+
+
+@dataclass
+class EngineResult:
+    indicators: dict[str, np.ndarray]
+    signals: np.ndarray
+
+
+def align(histories: dict[str, pd.DataFrame]) -> Universe:
+    tickers = [t for t, h in histories.items() if h is not None and not h.empty]
+    per_ticker = [pd.to_datetime(histories[t]["TRADEDATE"]).to_numpy(dtype="datetime64[D]") for t in tickers]
+    dates = np.unique(np.concatenate(per_ticker)) if per_ticker else np.array([], dtype="datetime64[D]")
+    close = np.full((len(dates), len(tickers)), np.nan)
+    for j, (ticker, days) in enumerate(zip(tickers, per_ticker)):
+        close[np.searchsorted(dates, days), j] = histories[ticker]["CLOSE"].to_numpy(dtype=np.float64)
+    return Universe(dates, tickers, close)
+
+
+# --- Примитивы по оси времени (axis=0), векторно по всем столбцам ---
+
+def _ewm(x: np.ndarray, alpha: np.ndarray, min_periods: np.ndarray) -> np.ndarray:
+    """pandas ewm(adjust=False): отсчёт с первого не-NaN значения столбца, NaN до min_periods наблюдений."""
+    out = np.full_like(x, np.nan)
+    y = np.full(x.shape[1], np.nan)
+    seen = np.zeros(x.shape[1], dtype=np.int64)
+    for t in range(len(x)):
+        xt = x[t]
+        valid = ~np.isnan(xt)
+        y = np.where(np.isnan(y), xt, np.where(valid, y + alpha * (xt - y), y))
+        seen += valid
+        out[t] = np.where(seen >= min_periods, y, np.nan)
+    return out
+
+
+def _smooth(x: np.ndarray, start: int, seed: np.ndarray, decay: float, gain: float) -> np.ndarray:
+    """Рекурсия Уайлдера в варианте ta: нули до start, out[start] = seed, дальше out[t] = out[t-1]·decay + x[t]·gain."""
+    out = np.zeros_like(x)
+    if len(x) <= start:
+        return out
+    out[start] = seed
+    for t in range(start + 1, len(x)):
+        out[t] = out[t - 1] * decay + x[t] * gain
+    return out
+
+
+def _rolling(x: np.ndarray, window: int, func) -> np.ndarray:
+    out = np.full_like(x, np.nan)
+    if len(x) >= window:
+        out[window - 1:] = func(sliding_window_view(x, window, axis=0), axis=-1)
+    return out
+
+
+def _ratio(num: np.ndarray, den: np.ndarray) -> np.ndarray:
+    # Как в ta: при нулевом знаменателе — 0, а не деление
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(den != 0, num / np.where(den != 0, den, 1.0), 0.0)
+
+
+def compute_compact(close: np.ndarray, params: RuleParams = RuleParams()) -> dict[str, np.ndarray]:
+    """Индикаторы по столбцам, где у каждого тикера наблюдения идут подряд с нулевой строки (хвост — NaN).
+
+    Повторяет ta с high = low = close и параметрами по умолчанию, включая его особенности
+    с нулевыми значениями в начале ATR и ADX.
+    """
+    n = close.shape[1]
+    diff = np.vstack([np.full((1, n), np.nan), np.diff(close, axis=0)])
+    move = np.nan_to_num(np.abs(diff))
+    up = np.where(diff > 0, diff, 0.0)
+    down = np.where(diff < 0, -diff, 0.0)
+    up[np.isnan(close)] = down[np.isnan(close)] = np.nan
+
+    # Быстрая и медленная EMA и сглаживание RSI — одним проходом по склеенным столбцам
+    fast, slow, rsi_window = params.ema_fast, params.ema_slow, params.rsi_window
+    stacked = _ewm(
+        np.hstack([close, close, up, down]),
+        np.repeat([2 / (fast + 1), 2 / (slow + 1), 1 / rsi_window, 1 / rsi_window], n),
+        np.repeat([fast, slow, rsi_window, rsi_window], n),
+    )
+    ema_fast, ema_slow, avg_up, avg_down = np.hsplit(stacked, 4)
+    macd = ema_fast - ema_slow
+    macd_signal = _ewm(macd, np.full(n, 2 / (params.macd_signal + 1)), np.full(n, params.macd_signal))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rsi = np.where(avg_down == 0, 100.0, 100 - 100 / (1 + avg_up / avg_down))
+
+    lowest = _rolling(close, WINDOW, np.min)
+    highest = _rolling(close, WINDOW, np.max)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        stoch_k = 100 * (close - lowest) / (highest - lowest)
+    stoch_d = _rolling(stoch_k, 3, np.mean)
+
+    # ATR: true range первой строки равен 0, затравка — среднее первых 14 значений
+    atr = _smooth(move, WINDOW - 1, move[:WINDOW].mean(axis=0), (WINDOW - 1) / WINDOW, 1 / WINDOW)
+
+    # ADX: суммы Уайлдера по движению и направленным движениям с затравкой на строке 14
+    moves = np.hstack([move, np.nan_to_num(up), np.nan_to_num(down)])
+    sums = _smooth(moves, WINDOW, moves[1:WINDOW + 1].sum(axis=0), (WINDOW - 1) / WINDOW, 1.0)
+    total, plus, minus = np.hsplit(sums, 3)
+    di_plus, di_minus = 100 * _ratio(plus, total), 100 * _ratio(minus, total)
+    dx = 100 * np.abs(_ratio(di_plus - di_minus, di_plus + di_minus))
+    seed_row = 2 * WINDOW - 1
+    adx = _smooth(dx, seed_row, dx[WINDOW:seed_row + 1].mean(axis=0), (WINDOW - 1) / WINDOW, 1 / WINDOW)
+
+    return {
+        "EMA_12": ema_fast, "EMA_26": ema_slow, "MACD": macd, "MACD_signal": macd_signal, "RSI": rsi,
+        "ADX": adx, "Stoch_K": stoch_k, "Stoch_D": stoch_d, "ATR": atr,
+    }
+
+
+def signal_codes(indicators: dict[str, np.ndarray], days: np.ndarray, params: RuleParams = RuleParams()) -> np.ndarray:
+    """Правило BUY/SELL/HOLD из market.indicators, один проход по строкам сразу для всех тикеров."""
+    trend = (indicators["MACD"] > indicators["MACD_signal"]) & (indicators["EMA_12"] > indicators["EMA_26"])
+    entry_ok = trend & (indicators["RSI"] < params.rsi_overbought)
+    hold_ok = trend & (indicators["RSI"] <= params.rsi_overbought)
+
+    codes = np.full(days.shape, HOLD, dtype=np.int8)
+    in_position = np.zeros(days.shape[1], dtype=bool)
+    entry = np.zeros(days.shape[1], dtype=np.int64)
+    for t in range(len(days)):
+        buy = ~in_position & entry_ok[t]
+        sell = in_position & (~hold_ok[t] | (days[t] - entry >= params.max_hold_days))
+        codes[t, buy], codes[t, sell] = BUY, SELL
+        entry = np.where(buy, days[t], entry)
+        in_position = (in_position | buy) & ~sell
+    return codes
+
+
+def compute(universe: Universe, params: RuleParams = RuleParams()) -> EngineResult:
+    valid = ~np.isnan(universe.close)
+    # Пропуски внутри истории тикера (нет торгов в этот день) не должны разрывать рекурсии:
+    # сдвигаем наблюдения каждого столбца вверх, считаем и раскладываем обратно по датам
+    order = np.argsort(~valid, axis=0, kind="stable")
+    compact_close = np.take_along_axis(universe.close, order, axis=0)
+    compact_days = np.take_along_axis(
+        np.broadcast_to(universe.dates.astype(np.int64)[:, None], universe.close.shape), order, axis=0
+    )
+    compact = compute_compact(compact_close, params)
+    codes = signal_codes(compact, compact_days, params)
+
+    indicators = {}
+    for name in INDICATOR_COLUMNS:
+        grid = np.empty_like(universe.close)
+        np.put_along_axis(grid, order, compact[name], axis=0)
+        grid[~valid] = np.nan
+        indicators[name] = grid
+    signals = np.empty(codes.shape, dtype=np.int8)
+    np.put_along_axis(signals, order, codes, axis=0)
+    signals[~valid] = HOLD
+    return EngineResult(indicators, signals)
+
+
+def to_frames(universe: Universe, result: EngineResult) -> dict[str, pd.DataFrame]:
+    """Результат движка -> по таблице в формате data/<TICKER>.csv на тикер."""
+    frames = {}
+    for j, ticker in enumerate(universe.tickers):
+        rows = ~np.isnan(universe.close[:, j])
+        frame = pd.DataFrame({
+            "TRADEDATE": np.datetime_as_string(universe.dates[rows], unit="D"),
+            "CLOSE": universe.close[rows, j],
+            **{name: result.indicators[name][rows, j] for name in INDICATOR_COLUMNS},
+            "Signal": SIGNAL_LABELS[result.signals[rows, j]],
+        })
+        frames[ticker] = frame[HISTORY_COLUMNS]
+    return frames
+
+
+def verify(histories: dict[str, pd.DataFrame], rtol: float = 1e-9, atol: float = 1e-9) -> pd.DataFrame:
+    """Сверка движка с ta по каждому тикеру: макс. отклонение по индикаторам и число расхождений сигнала."""
+    universe = align(histories)
+    frames = to_frames(universe, compute(universe))
+    report = []
+    for ticker, frame in frames.items():
+        expected = compute_indicators(histories[ticker]["CLOSE"])
+        signals, _ = apply_signal_rule(pd.concat([histories[ticker][["TRADEDATE"]].reset_index(drop=True), expected], axis=1))
+        row = {"Ticker": ticker, "Rows": len(frame)}
+        ok = True
+        for name in INDICATOR_COLUMNS:
+            got, want = frame[name].to_numpy(), expected[name].to_numpy(dtype=np.float64)
+            ok &= np.allclose(got, want, rtol=rtol, atol=atol, equal_nan=True)
+            row[name] = float(np.nanmax(np.abs(got - want), initial=0.0))
+        row["SignalMismatches"] = int((frame["Signal"].to_numpy() != signals.to_numpy()).sum())
+        row["OK"] = bool(ok and row["SignalMismatches"] == 0)
+        report.append(row)
+    return pd.DataFrame(report)
+
+
+def main() -> None:
+    from market.incremental import read_history
+
+    parser = argparse.ArgumentParser(description="Пакетный расчёт индикаторов по всем тикерам")
+    parser.add_argument("--verify", action="store_true", help="сверить с ta на сохранённых историях")
+    args = parser.parse_args()
+
+    histories = {ticker: read_history(ticker) for ticker in load_invest_ids()}
+    missing = [t for t, h in histories.items() if h is None]
+    if missing:
+        print("Нет истории:", ", ".join(missing))
+
+    started = time.perf_counter()
+    universe = align(histories)
+    compute(universe)
+    print(f"Движок: {len(universe.tickers)} тикеров × {len(universe.dates)} дат за {time.perf_counter() - started:.3f} с")
+
+    if args.verify:
+        started = time.perf_counter()
+        for history in histories.values():
+            if history is not None:
+                compute_indicators(history["CLOSE"])
+        print(f"ta по тикерам: {time.perf_counter() - started:.3f} с")
+        report = verify(histories)
+        print(report.to_string(index=False))
+        sys.exit(0 if report["OK"].all() else 1)
+
+
+if __name__ == "__main__":
+    main()
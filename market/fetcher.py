@@ -0,0 +1,242 @@
+import argparse
+import asyncio
+import random
+import time
+from collections.abc import AsyncIterator
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+
+import aiohttp
+import pandas as pd
+
+from market.sources import (
+    ISS_BASE_URL,
+    ISS_HISTORY_PATH,
+    closes_frame,
+    history_cursor,
+    history_params,
+    parse_history_page,
+)
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class FetchError(Exception):
+    pass
+
+
+@dataclass
+class FetchStats:
+    requests: int = 0
+    retries: int = 0
+    not_modified: int = 0
+    failures: int = 0
+    errors: dict[str, str] = field(default_factory=dict)
+
+
+class AsyncMoexIssFetcher:
+    """Асинхронная загрузка истории ISS: одна сессия с keep-alive на все тикеры.
+
+    Одновременных запросов не больше concurrency; временные ошибки (сеть, 429, 5xx)
+    повторяются с экспоненциальной задержкой и случайным разбросом. Ответы с ETag или
+    Last-Modified запоминаются по странице тикера, и повторный запрос того же окна идёт
+    условным — 304 без тела.
+    """
+
+    def __init__(
+        self,
+        board: str = "TQBR",
+        base_url: str = ISS_BASE_URL,
+        concurrency: int = 8,
+        retries: int = 4,
+        backoff: float = 0.5,
+        timeout: float = 30.0,
+        validators: dict | None = None,
+    ) -> None:
+        self.board = board
+        self.base_url = base_url
+        self.concurrency = concurrency
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        # (url, смещение) -> (параметры, ETag, Last-Modified, payload); можно разделить между экземплярами.
+        # Ответ для нового окна тикера замещает прежний, так что записей не больше, чем страниц у тикеров
+        self.validators = validators if validators is not None else {}
+        self.stats = FetchStats()
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._http: aiohttp.ClientSession | None = None
+
+    async def __aenter__(self) -> "AsyncMoexIssFetcher":
+        self._http = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=self.concurrency, keepalive_timeout=30),
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+        )
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self._http.close()
+
+    def _delay(self, attempt: int, retry_after: str | None = None) -> float:
+        if retry_after and retry_after.isdigit():
+            return float(retry_after)
+        # Полный джиттер: клиенты, упавшие одновременно, не приходят повторно одной волной
+        return random.uniform(0, self.backoff * 2 ** attempt)
+
+    async def _get_json(self, url: str, params: dict) -> dict:
+        key, window = (url, params["start"]), tuple(sorted(params.items()))
+        cached = self.validators.get(key)
+        if cached and cached[0] != window:
+            # Окно сдвинулось: валидаторы прежнего окна к этому запросу не относятся
+            cached = None
+        headers = {}
+        if cached:
+            _, etag, modified, _ = cached
+            if etag:
+                headers["If-None-Match"] = etag
+            if modified:
+                headers["If-Modified-Since"] = modified
+
+        for attempt in range(self.retries + 1):
+            retry_after = None
+            try:
+                async with self._semaphore:
+                    self.stats.requests += 1
+                    async with self._http.get(url, params=params, headers=headers) as response:
+                        if response.status == 304 and cached:
+                            self.stats.not_modified += 1
+                            return cached[3]
+                        if response.status not in RETRY_STATUSES:
+                            response.raise_for_status()
+                            payload = await response.json(content_type=None)
+                            etag, modified = response.headers.get("ETag"), response.headers.get("Last-Modified")
+                            if etag or modified:
+                                self.validators[key] = (window, etag, modified, payload)
+                            return payload
+                        retry_after = response.headers.get("Retry-After")
+                        error = f"HTTP {response.status}"
+            except aiohttp.ClientResponseError:
+                raise
+            except (aiohttp.ClientError, asyncio.TimeoutError) as exc:
+                error = f"{type(exc).__name__}: {exc}"
+            if attempt < self.retries:
+                self.stats.retries += 1
+                await asyncio.sleep(self._delay(attempt, retry_after))
+        raise FetchError(f"{url}: {error} после {self.retries + 1} попыток")
+
+    async def pages(self, ticker: str, start: date, end: date) -> AsyncIterator[list]:
+        """Страницы истории по порядку, по мере получения.
+
+        Первая страница сообщает TOTAL и PAGESIZE, остальные запрашиваются параллельно.
+        """
+        url = self.base_url + ISS_HISTORY_PATH.format(board=self.board, ticker=ticker)
+        first = await self._get_json(url, history_params(start, end))
+        page, offset = parse_history_page(first)
+        yield page
+        if offset is None:
+            return
+
+        cursor = history_cursor(first)
+        rest = [
+            asyncio.create_task(self._get_json(url, history_params(start, end, o)))
+            for o in range(offset, cursor["TOTAL"], cursor["PAGESIZE"])
+        ]
+        try:
+            for task in rest:
+                yield parse_history_page(await task)[0]
+        finally:
+            for task in rest:
+                task.cancel()
+
+    async def fetch_closes(self, ticker: str, start: date, end: date) -> pd.DataFrame:
+        rows = []
+        async for page in self.pages(ticker, start, end):
+            rows.extend(page)
+        return closes_frame(rows)
+
+    async def fetch_many(self, windows: dict[str, tuple[date, date]]) -> dict[str, pd.DataFrame]:
+        """Истории по тикерам {тикер: (start, end)}; тикер с ошибкой попадает в stats.errors, а не роняет остальные."""
+        async def one(ticker: str, start: date, end: date):
+            try:
+                return ticker, await self.fetch_closes(ticker, start, end)
+            except (FetchError, aiohttp.ClientError) as exc:
+                self.stats.failures += 1
+                self.stats.errors[ticker] = str(exc)
+                return ticker, None
+
+        results = await asyncio.gather(*(one(t, s, e) for t, (s, e) in windows.items()))
+        return {ticker: frame for ticker, frame in results if frame is not None}
+
+
+class PooledMoexIssSource:
+    """MarketDataSource поверх AsyncMoexIssFetcher для синхронного кода обновления.
+
+    prefetch() скачивает окна всех тикеров одним пулом, fetch_closes() затем отдаёт
+    уже загруженное или ошибку загрузки; окно, которого не было в prefetch, качается
+    отдельным запросом.
+    """
+
+    def __init__(self, **fetcher_options) -> None:
+        self.fetcher_options = fetcher_options
+        self.validators: dict = {}
+        self.stats = FetchStats()
+        self._prefetched: dict[tuple[str, date, date], pd.DataFrame] = {}
+        self._failed: dict[tuple[str, date, date], str] = {}
+
+    async def _fetch(self, windows: dict[str, tuple[date, date]]) -> dict[str, pd.DataFrame]:
+        async with AsyncMoexIssFetcher(validators=self.validators, **self.fetcher_options) as fetcher:
+            frames = await fetcher.fetch_many(windows)
+        self.stats = fetcher.stats
+        return frames
+
+    def prefetch(self, windows: dict[str, tuple[date, date]]) -> None:
+        frames = asyncio.run(self._fetch(windows))
+        self._prefetched = {(t, *windows[t]): frame for t, frame in frames.items()}
+        # Тикер, который пул не скачал после всех повторов, в этом цикле заново не запрашивается
+        self._failed = {(t, *windows[t]): error for t, error in self.stats.errors.items()}
+
+    def fetch_closes(self, ticker: str, start: date, end: date) -> pd.DataFrame:
+        if (ticker, start, end) in self._failed:
+            raise FetchError(self._failed.pop((ticker, start, end)))
+        frame = self._prefetched.pop((ticker, start, end), None)
+        if frame is not None:
+            return frame
+        frames = asyncio.run(self._fetch({ticker: (start, end)}))
+        if ticker not in frames:
+            raise FetchError(self.stats.errors.get(ticker, ticker))
+        return frames[ticker]
+
+
+def main() -> None:
+    from market.universe import load_invest_ids
+
+    parser = argparse.ArgumentParser(description="Замер пула загрузки истории ISS")
+    parser.add_argument("--base-url", default=ISS_BASE_URL, help="например, адрес market.stub_server")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--repeat", type=int, default=2, help="повторы — для проверки условных запросов")
+    args = parser.parse_args()
+
+    end = date.today()
+    windows = {ticker: (end - timedelta(days=args.days), end) for ticker in load_invest_ids()}
+    validators: dict = {}
+
+    async def run() -> None:
+        for attempt in range(args.repeat):
+            started = time.perf_counter()
+            async with AsyncMoexIssFetcher(
+                base_url=args.base_url, concurrency=args.concurrency, validators=validators
+            ) as fetcher:
+                frames = await fetcher.fetch_many(windows)
+            elapsed = time.perf_counter() - started
+            rows = sum(len(f) for f in frames.values())
+            print(
+                f"#{attempt + 1}: {len(frames)}/{len(windows)} тикеров, {rows} строк за {elapsed:.3f} с; "
+                f"запросов {fetcher.stats.requests}, повторов {fetcher.stats.retries}, "
+                f"304: {fetcher.stats.not_modified}, ошибок {fetcher.stats.failures}"
+            )
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
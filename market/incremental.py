@@ -0,0 +1,246 @@
+import logging
+from dataclasses import dataclass
+from datetime import date, timedelta
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+
+from market.indicators import (
+    HISTORY_COLUMNS,
+    SignalState,
+    apply_signal_rule,
+    build_history,
+    compute_indicators,
+)
+from market.signal_snapshot import SignalSnapshot, TickerEntry, fingerprint
+from market.sources import MarketDataSource
+from market.store import CandleStore, to_frame
+from market.universe import DATA_DIR
+
+logger = logging.getLogger("viatrade.incremental")
+
+# Сколько последних строк истории нужно рекурсивным индикаторам (EMA, RSI, ADX, ATR),
+# чтобы значения новых дней совпали с полным пересчётом с относительной погрешностью < 1e-6
+WARMUP_ROWS = 250
+FULL_WINDOW_DAYS = 365
+
+
+@dataclass
+class RefreshResult:
+    ticker: str
+    appended: int
+    last_date: str | None
+    error: str | None = None
+
+
+def history_path(ticker: str, data_dir: str | Path = DATA_DIR) -> Path:
+    return Path(data_dir) / f"{ticker}.csv"
+
+
+def store_for(data_dir: str | Path = DATA_DIR) -> CandleStore:
+    return CandleStore(Path(data_dir) / "store")
+
+
+def history_file(ticker: str, data_dir: str | Path = DATA_DIR) -> Path | None:
+    """Файл, из которого читается история тикера: стор, иначе CSV."""
+    store = store_for(data_dir)
+    if store.exists(ticker):
+        return store.path(ticker)
+    path = history_path(ticker, data_dir)
+    return path if path.exists() else None
+
+
+def read_history(ticker: str, data_dir: str | Path = DATA_DIR, tail: int | None = None) -> pd.DataFrame | None:
+    """История тикера из стора; если тикер ещё не перенесён — из data/<TICKER>.csv."""
+    store = store_for(data_dir)
+    if store.exists(ticker):
+        return store.tail(ticker, tail) if tail else to_frame(store.read(ticker))
+    path = history_path(ticker, data_dir)
+    if not path.exists():
+        return None
+    history = pd.read_csv(path)
+    return history.tail(tail) if tail else history
+
+
+def extend_history(history: pd.DataFrame, closes: pd.DataFrame, warmup: int = WARMUP_ROWS) -> pd.DataFrame:
+    """Строки для новых дней closes: индикаторы считаются по хвосту истории длиной warmup."""
+    tail = history[["TRADEDATE", "CLOSE"]].iloc[-warmup:]
+    window = pd.concat([tail, closes[["TRADEDATE", "CLOSE"]]], ignore_index=True)
+    window = pd.concat([window, compute_indicators(window["CLOSE"])], axis=1)
+
+    new_rows = window.iloc[len(tail):].reset_index(drop=True)
+    new_rows["Signal"], _ = apply_signal_rule(new_rows, SignalState.from_history(history))
+    return new_rows[HISTORY_COLUMNS]
+
+
+def last_trade_date(ticker: str, data_dir: str | Path = DATA_DIR, known: TickerEntry | None = None) -> str | None:
+    """Дата последней строки истории; по записи манифеста — без чтения файла, если он с тех пор не менялся."""
+    path = history_file(ticker, data_dir)
+    if path is None:
+        return None
+    if known is not None:
+        stat = path.stat()
+        if (known.size, known.mtime_ns) == (stat.st_size, stat.st_mtime_ns):
+            return known.last_date
+    history = read_history(ticker, data_dir, tail=1)
+    return None if history is None or history.empty else str(history["TRADEDATE"].iloc[-1])
+
+
+def fetch_window(last_date: str | None, end: date) -> tuple[date, date] | None:
+    """Какие дни нужно скачать: год для новой истории, дни после last_date — для существующей."""
+    if last_date is None:
+        return end - timedelta(days=FULL_WINDOW_DAYS), end
+    start = date.fromisoformat(last_date) + timedelta(days=1)
+    return (start, end) if start <= end else None
+
+
+def rebuild_ticker(
+    ticker: str,
+    source: MarketDataSource,
+    start: date,
+    end: date,
+    data_dir: str | Path = DATA_DIR,
+) -> RefreshResult:
+    """Полный пересчёт истории тикера за [start, end]: стор и CSV перезаписываются."""
+    closes = source.fetch_closes(ticker, start, end)
+    if closes.empty:
+        return RefreshResult(ticker, 0, None)
+    history = build_history(closes)
+    store_for(data_dir).write(ticker, history)
+    history.to_csv(history_path(ticker, data_dir), index=False)
+    return RefreshResult(ticker, len(closes), closes["TRADEDATE"].iloc[-1])
+
+
+def refresh_ticker(
+    ticker: str,
+    source: MarketDataSource,
+    end: date | None = None,
+    data_dir: str | Path = DATA_DIR,
+    warmup: int = WARMUP_ROWS,
+    known: TickerEntry | None = None,
+) -> RefreshResult:
+    """Дозагрузить новые дни тикера; known — запись манифеста прошлого снимка для этого тикера."""
+    end = end or date.today()
+    path = history_path(ticker, data_dir)
+    store = store_for(data_dir)
+    if not store.exists(ticker) and path.exists():
+        # Тикер ещё не в сторе — переносим его CSV один раз
+        store.write(ticker, pd.read_csv(path))
+    last_date = last_trade_date(ticker, data_dir, known)
+    window = fetch_window(last_date, end)
+
+    if last_date is None:
+        return rebuild_ticker(ticker, source, *window, data_dir)
+    if window is None:
+        return RefreshResult(ticker, 0, last_date)
+
+    closes = source.fetch_closes(ticker, *window)
+    closes = closes[closes["TRADEDATE"] > last_date]
+    if closes.empty:
+        return RefreshResult(ticker, 0, last_date)
+
+    # Хвост истории читается, только когда есть новые дни. Хвоста warmup хватает и индикаторам,
+    # и состоянию сигнала: позиция живёт не дольше MAX_HOLD_DAYS
+    history = read_history(ticker, data_dir, tail=warmup)
+    new_rows = extend_history(history, closes, warmup)
+    store.append(ticker, new_rows)
+    # CSV остаётся читаемой копией для пользователя — только дозапись
+    if path.exists():
+        new_rows.to_csv(path, mode="a", header=False, index=False)
+    return RefreshResult(ticker, len(closes), closes["TRADEDATE"].iloc[-1])
+
+
+def refresh_all(
+    invest_ids: list[str],
+    source: MarketDataSource,
+    end: date | None = None,
+    data_dir: str | Path = DATA_DIR,
+    manifest: dict[str, TickerEntry] | None = None,
+) -> list[RefreshResult]:
+    """Дообновить истории тикеров. Тикер, чей файл не менялся с манифеста прошлого снимка,
+    до появления новых дней не читается: последняя дата берётся из манифеста.
+    """
+    end = end or date.today()
+    manifest = manifest or {}
+    if hasattr(source, "prefetch"):
+        # Пуловый источник скачивает окна всех тикеров разом, до последовательного обновления
+        windows = {
+            ticker: fetch_window(last_trade_date(ticker, data_dir, manifest.get(ticker)), end)
+            for ticker in invest_ids
+        }
+        source.prefetch({ticker: window for ticker, window in windows.items() if window})
+    results = []
+    for ticker in invest_ids:
+        try:
+            results.append(refresh_ticker(ticker, source, end, data_dir, known=manifest.get(ticker)))
+        except Exception as exc:
+            # Сбой ISS или делистинг одного тикера не срывает обновление остальных
+            logger.warning("Тикер %s не обновлён: %s", ticker, exc)
+            results.append(RefreshResult(ticker, 0, None, f"{type(exc).__name__}: {exc}"))
+    return results
+
+
+def today_signals(histories: dict[str, pd.DataFrame]) -> tuple[list[str], list[str]]:
+    """Тикеры с BUY и SELL в последней строке истории."""
+    buy, sell = [], []
+    for ticker, history in histories.items():
+        if history is None or history.empty:
+            continue
+        last = history["Signal"].iloc[-1]
+        if last == "BUY":
+            buy.append(ticker)
+        elif last == "SELL":
+            sell.append(ticker)
+    return buy, sell
+
+
+def latest_signals(
+    invest_ids: list[str],
+    source: MarketDataSource,
+    days: int = 5,
+    end: date | None = None,
+    data_dir: str | Path = DATA_DIR,
+) -> tuple[list[str], list[str], dict[str, pd.DataFrame]]:
+    """Дообновить истории и вернуть BUY, SELL и последние days строк по каждому тикеру."""
+    refresh_all(invest_ids, source, end, data_dir)
+    # Из стора читаются только последние строки, файл целиком не разбирается
+    recent = {ticker: read_history(ticker, data_dir, tail=days) for ticker in invest_ids}
+    buy, sell = today_signals(recent)
+    return buy, sell, recent
+
+
+def recent_signals(
+    invest_ids: list[str],
+    days: int = 5,
+    data_dir: str | Path = DATA_DIR,
+    previous: SignalSnapshot | None = None,
+) -> tuple[list[str], list[str], dict[str, pd.DataFrame | pa.Table], dict[str, TickerEntry]]:
+    """BUY, SELL, последние days строк по тикерам и манифест для публикации снимка.
+
+    Тикер, у которого хэш файла истории совпал с манифестом прошлого снимка, не перечитывается:
+    его строки берутся из прошлого снимка как есть.
+    """
+    known = previous.manifest if previous else {}
+    recent, manifest, buy, sell = {}, {}, [], []
+    for ticker in invest_ids:
+        path = history_file(ticker, data_dir)
+        if path is None:
+            continue
+        entry = known.get(ticker)
+        digest, size, mtime_ns = fingerprint(path, entry)
+        reused = previous.recent(ticker) if entry and entry.digest == digest else None
+        if reused is not None and reused.num_rows == days:
+            rows, last_date, signal = reused, entry.last_date, previous.last(ticker)
+        else:
+            rows = read_history(ticker, data_dir, tail=days)
+            if rows is None or rows.empty:
+                continue
+            last_date, signal = str(rows["TRADEDATE"].iloc[-1]), rows["Signal"].iloc[-1]
+        recent[ticker] = rows
+        manifest[ticker] = TickerEntry(digest, size, mtime_ns, last_date)
+        if signal == "BUY":
+            buy.append(ticker)
+        elif signal == "SELL":
+            sell.append(ticker)
+    return buy, sell, recent, manifest
@@ -0,0 +1,87 @@
+from dataclasses import dataclass
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+INDICATOR_COLUMNS = [
+    "EMA_12", "EMA_26", "MACD", "MACD_signal", "RSI",
+    "ADX", "Stoch_K", "Stoch_D", "ATR",
+]
+HISTORY_COLUMNS = ["TRADEDATE", "CLOSE", *INDICATOR_COLUMNS, "Signal"]
+
+# Правило сигналов: вход, когда MACD выше сигнальной, EMA_12 выше EMA_26 и RSI < 70;
+# выход, когда условие входа нарушено или позиция держится 5 и более календарных дней
+RSI_OVERBOUGHT = 70.0
+MAX_HOLD_DAYS = 5
+
+
+@dataclass
+class SignalState:
+    in_position: bool = False
+    entry_date: date | None = None
+
+    @classmethod
+    def from_history(cls, history: pd.DataFrame) -> "SignalState":
+        trades = history.loc[history["Signal"] != "HOLD", ["TRADEDATE", "Signal"]]
+        if trades.empty or trades["Signal"].iloc[-1] != "BUY":
+            return cls()
+        return cls(True, pd.Timestamp(trades["TRADEDATE"].iloc[-1]).date())
+
+
+def compute_indicators(close: pd.Series) -> pd.DataFrame:
+    """Индикаторы по ценам закрытия (high = low = close), параметры ta по умолчанию."""
+    # ta тянет за собой заметный импорт, а модулю нужны и те, кто индикаторы не считает (стор, цены)
+    import ta
+
+    close = close.reset_index(drop=True).astype(float)
+    macd = ta.trend.MACD(close)
+    stoch = ta.momentum.StochasticOscillator(close, close, close, 14, 3)
+    return pd.DataFrame({
+        "EMA_12": ta.trend.EMAIndicator(close, 12).ema_indicator(),
+        "EMA_26": ta.trend.EMAIndicator(close, 26).ema_indicator(),
+        "MACD": macd.macd(),
+        "MACD_signal": macd.macd_signal(),
+        "RSI": ta.momentum.RSIIndicator(close, 14).rsi(),
+        "ADX": ta.trend.ADXIndicator(close, close, close, 14).adx(),
+        "Stoch_K": stoch.stoch(),
+        "Stoch_D": stoch.stoch_signal(),
+        "ATR": ta.volatility.AverageTrueRange(close, close, close, 14).average_true_range(),
+    })
+
+
+def apply_signal_rule(frame: pd.DataFrame, state: SignalState | None = None) -> tuple[pd.Series, SignalState]:
+    """BUY/SELL/HOLD по строкам frame, начиная с состояния state; возвращает сигналы и итоговое состояние."""
+    state = state or SignalState()
+    entry_ok = (
+        (frame["MACD"] > frame["MACD_signal"])
+        & (frame["EMA_12"] > frame["EMA_26"])
+        & (frame["RSI"] < RSI_OVERBOUGHT)
+    ).to_numpy()
+    hold_ok = (
+        (frame["MACD"] > frame["MACD_signal"])
+        & (frame["EMA_12"] > frame["EMA_26"])
+        & (frame["RSI"] <= RSI_OVERBOUGHT)
+    ).to_numpy()
+    days = pd.to_datetime(frame["TRADEDATE"]).dt.date.to_numpy()
+
+    # Состояние переходит от строки к строке, поэтому цикл по дням неизбежен
+    signals = np.full(len(frame), "HOLD", dtype=object)
+    in_position, entry = state.in_position, state.entry_date
+    for i in range(len(frame)):
+        if not in_position:
+            if entry_ok[i]:
+                signals[i] = "BUY"
+                in_position, entry = True, days[i]
+        elif not hold_ok[i] or (days[i] - entry).days >= MAX_HOLD_DAYS:
+            signals[i] = "SELL"
+            in_position, entry = False, None
+    return pd.Series(signals, index=frame.index, name="Signal"), SignalState(in_position, entry)
+
+
+def build_history(closes: pd.DataFrame) -> pd.DataFrame:
+    """TRADEDATE/CLOSE -> полная таблица в формате data/<TICKER>.csv."""
+    frame = closes[["TRADEDATE", "CLOSE"]].reset_index(drop=True)
+    frame = pd.concat([frame, compute_indicators(frame["CLOSE"])], axis=1)
+    frame["Signal"], _ = apply_signal_rule(frame)
+    return frame[HISTORY_COLUMNS]
@@ -0,0 +1,112 @@
+import os
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from market.store import CandleStore
+from market.universe import DATA_DIR
+
+
+@dataclass(frozen=True)
+class PriceTable:
+    """Последние цены закрытия; tickers отсортированы, чтобы сопоставлять их searchsorted."""
+
+    tickers: np.ndarray
+    dates: np.ndarray
+    closes: np.ndarray
+
+    @classmethod
+    def empty(cls) -> "PriceTable":
+        return cls(np.array([], dtype=str), np.array([], dtype="datetime64[D]"), np.array([], dtype=np.float64))
+
+    def lookup(self, codes: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Дата и цена для каждого кода разом; для неизвестных — NaT и NaN."""
+        codes = np.asarray(codes, dtype=str)
+        if not self.tickers.size:
+            return np.full(codes.shape, np.datetime64("NaT"), "datetime64[D]"), np.full(codes.shape, np.nan)
+        idx = np.minimum(np.searchsorted(self.tickers, codes), self.tickers.size - 1)
+        found = self.tickers[idx] == codes
+        return (
+            np.where(found, self.dates[idx], np.datetime64("NaT")),
+            np.where(found, self.closes[idx], np.nan),
+        )
+
+
+class PriceIndex:
+    """Процессный индекс тикер -> последняя (дата, CLOSE) из сохранённых историй.
+
+    Строится по мере запросов и обновляется инкрементально: тикер перечитывается, только
+    если сменилось время изменения его файла в сторе или CSV, и не чаще раза в ttl секунд.
+    """
+
+    def __init__(self, data_dir: str | Path = DATA_DIR, ttl: float = 30.0) -> None:
+        self.data_dir = Path(data_dir)
+        self.store = CandleStore(self.data_dir / "store")
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        # тикер -> (mtime_ns источника, дата, цена)
+        self._entries: dict[str, tuple[int, np.datetime64, float]] = {}
+        self._checked: dict[str, float] = {}
+
+    def _source(self, ticker: str) -> Path | None:
+        for path in (self.store.path(ticker), self.data_dir / f"{ticker}.csv"):
+            if path.exists():
+                return path
+        return None
+
+    def _read_last(self, path: Path) -> tuple[np.datetime64, float] | None:
+        if path.suffix == ".arrow":
+            table = self.store.read(path.stem)
+            if not table.num_rows:
+                return None
+            return np.datetime64(table.column("TRADEDATE")[-1].as_py(), "D"), float(table.column("CLOSE")[-1].as_py())
+        frame = pd.read_csv(path, usecols=["TRADEDATE", "CLOSE"])
+        if frame.empty:
+            return None
+        return np.datetime64(frame["TRADEDATE"].iloc[-1], "D"), float(frame["CLOSE"].iloc[-1])
+
+    def _refresh(self, ticker: str) -> None:
+        now = time.monotonic()
+        if now - self._checked.get(ticker, float("-inf")) < self.ttl:
+            return
+        self._checked[ticker] = now
+        path = self._source(ticker)
+        if path is None:
+            self._entries.pop(ticker, None)
+            return
+        mtime = os.stat(path).st_mtime_ns
+        entry = self._entries.get(ticker)
+        if entry is not None and entry[0] == mtime:
+            return
+        last = self._read_last(path)
+        if last is None:
+            self._entries.pop(ticker, None)
+        else:
+            self._entries[ticker] = (mtime, *last)
+
+    def table(self, tickers) -> PriceTable:
+        """Цены для набора тикеров (повторы и пустые коды допустимы)."""
+        wanted = sorted({t for t in tickers if t})
+        with self._lock:
+            for ticker in wanted:
+                self._refresh(ticker)
+            known = [t for t in wanted if t in self._entries]
+            if not known:
+                return PriceTable.empty()
+            return PriceTable(
+                tickers=np.asarray(known, dtype=str),
+                dates=np.asarray([self._entries[t][1] for t in known], dtype="datetime64[D]"),
+                closes=np.asarray([self._entries[t][2] for t in known], dtype=np.float64),
+            )
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._checked.clear()
+
+
+prices = PriceIndex()
@@ -0,0 +1,318 @@
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from pathlib import Path
+from threading import Lock
+
+import pandas as pd
+import pyarrow as pa
+
+from market.universe import DATA_DIR
+
+SNAPSHOT_DIR = DATA_DIR / "snapshots"
+LATEST_FILE = "latest.json"
+STATUS_FILE = "status.json"
+# Сколько предыдущих версий держать на диске для отката
+KEEP_VERSIONS = 5
+# Период воркера; здесь, а не в market.worker, чтобы UI не тянул aiohttp ради одной константы
+INTERVAL_SECONDS = 15 * 60
+
+
+@dataclass(frozen=True)
+class TickerEntry:
+    """Запись манифеста: по хэшу содержимого файла истории видно, менялся ли тикер с прошлого снимка."""
+
+    digest: str
+    size: int
+    mtime_ns: int
+    last_date: str | None
+
+
+@dataclass(frozen=True)
+class Transition:
+    ticker: str
+    before: str
+    after: str
+    date: str | None
+
+
+@dataclass
+class SignalSnapshot:
+    """Снимок сигналов; table отображён из файла без копирования и общий для всех сессий процесса."""
+
+    version: int
+    created_at: datetime
+    invest_ids: list[str]
+    buy: list[str]
+    sell: list[str]
+    table: pa.Table
+    # Строки тикера идут подряд: тикер -> (смещение, число строк)
+    offsets: dict[str, tuple[int, int]]
+    manifest: dict[str, TickerEntry] = field(default_factory=dict)
+    # Тикеры, чья история изменилась с прошлого снимка, и смены сигнала у них
+    changed: list[str] = field(default_factory=list)
+    transitions: list[Transition] = field(default_factory=list)
+
+    @property
+    def age(self):
+        return datetime.now() - self.created_at
+
+    def recent(self, ticker: str) -> pa.Table | None:
+        """Строки тикера — срез общего table, данные не копируются."""
+        if ticker not in self.offsets:
+            return None
+        return self.table.slice(*self.offsets[ticker])
+
+    def last(self, ticker: str, column: str = "Signal"):
+        """Значение колонки в последней строке тикера: сигнал или дата на последний день."""
+        if ticker not in self.offsets:
+            return None
+        offset, length = self.offsets[ticker]
+        return self.table.column(column)[offset + length - 1].as_py() if length else None
+
+
+@dataclass
+class WorkerStatus:
+    last_attempt: datetime | None = None
+    ok: bool = True
+    error: str | None = None
+    version: int | None = None
+    # Тикеры, которые не обновились в успешном цикле: в снимке их прежние строки
+    failed: dict[str, str] = field(default_factory=dict)
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+def _version_path(snapshot_dir: Path, version: int) -> Path:
+    return snapshot_dir / f"signals-{version:06d}.arrow"
+
+
+def _versions(snapshot_dir: Path) -> list[int]:
+    return sorted(int(p.stem.split("-")[1]) for p in snapshot_dir.glob("signals-*.arrow"))
+
+
+def fingerprint(path: Path, known: TickerEntry | None = None) -> tuple[str, int, int]:
+    """Хэш содержимого файла, его размер и mtime; файл не перечитывается, если размер и mtime те же."""
+    stat = path.stat()
+    if known and (known.size, known.mtime_ns) == (stat.st_size, stat.st_mtime_ns):
+        return known.digest, stat.st_size, stat.st_mtime_ns
+    with open(path, "rb") as f:
+        digest = hashlib.file_digest(f, "blake2b").hexdigest()
+    return digest, stat.st_size, stat.st_mtime_ns
+
+
+def _rows_table(ticker: str, rows: pd.DataFrame | pa.Table) -> pa.Table:
+    if isinstance(rows, pa.Table):
+        # Строки, перенесённые из прошлого снимка, уже в его формате
+        return rows
+    return pa.Table.from_pandas(rows.assign(Ticker=ticker), preserve_index=False)
+
+
+def _transitions(previous: SignalSnapshot | None, current: SignalSnapshot, tickers: list[str]) -> list[Transition]:
+    if previous is None:
+        return []
+    transitions = []
+    for ticker in tickers:
+        before, after = previous.last(ticker), current.last(ticker)
+        if before is not None and after is not None and before != after:
+            transitions.append(Transition(ticker, before, after, str(current.last(ticker, "TRADEDATE"))))
+    return transitions
+
+
+def publish(
+    invest_ids: list[str],
+    buy: list[str],
+    sell: list[str],
+    recent: dict[str, pd.DataFrame | pa.Table],
+    snapshot_dir: str | Path = SNAPSHOT_DIR,
+    manifest: dict[str, TickerEntry] | None = None,
+) -> int:
+    """Записать новую версию снимка и атомарно переключить на неё latest.json; вернуть номер версии.
+
+    Без манифеста изменившимися считаются все тикеры. Смены сигнала ищутся
+    относительно предыдущего снимка только у изменившихся тикеров.
+    """
+    snapshot_dir = Path(snapshot_dir)
+    snapshot_dir.mkdir(parents=True, exist_ok=True)
+    version = max(_versions(snapshot_dir), default=0) + 1
+    created_at = datetime.now()
+    previous = read_snapshot(snapshot_dir=snapshot_dir)
+    manifest = manifest or {}
+
+    tables, offsets, offset = [], {}, 0
+    for ticker, rows in recent.items():
+        if rows is None or len(rows) == 0:
+            continue
+        tables.append(_rows_table(ticker, rows))
+        offsets[ticker] = (offset, len(rows))
+        offset += len(rows)
+    if tables:
+        # permissive: float32 из стора и float64 из CSV сводятся к общему типу
+        table = pa.concat_tables(tables, promote_options="permissive")
+    else:
+        table = pa.table({"Ticker": pa.array([], pa.string())})
+
+    known = previous.manifest if previous else {}
+    changed = [
+        ticker for ticker in offsets
+        if ticker not in manifest or ticker not in known or known[ticker].digest != manifest[ticker].digest
+    ]
+    current = SignalSnapshot(version, created_at, invest_ids, buy, sell, table, offsets, manifest, changed)
+    current.transitions = _transitions(previous, current, changed)
+    meta = {
+        "version": version,
+        "created_at": created_at.isoformat(),
+        "invest_ids": invest_ids,
+        "buy": buy,
+        "sell": sell,
+        "offsets": offsets,
+        "manifest": {ticker: asdict(entry) for ticker, entry in manifest.items()},
+        "changed": changed,
+        "transitions": [asdict(t) for t in current.transitions],
+    }
+    table = table.replace_schema_metadata({b"snapshot": json.dumps(meta).encode()})
+
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    # Сначала файл версии, потом указатель: читатель никогда не увидит ссылку на недописанный файл
+    _write_atomic(_version_path(snapshot_dir, version), sink.getvalue().to_pybytes())
+    _write_atomic(snapshot_dir / LATEST_FILE, json.dumps({"version": version}).encode())
+
+    for old in _versions(snapshot_dir)[:-KEEP_VERSIONS]:
+        try:
+            _version_path(snapshot_dir, old).unlink(missing_ok=True)
+        except PermissionError:
+            # В Windows файл, отображённый в память читателем, не удалить — уберём при следующей публикации
+            pass
+    return version
+
+
+def _read_version(snapshot_dir: Path, version: int) -> SignalSnapshot:
+    # Буферы таблицы ссылаются на отображение файла и переживают закрытие source
+    with pa.memory_map(str(_version_path(snapshot_dir, version))) as source:
+        table = pa.ipc.open_file(source).read_all()
+    meta = json.loads(table.schema.metadata[b"snapshot"])
+    return SignalSnapshot(
+        version=meta["version"],
+        created_at=datetime.fromisoformat(meta["created_at"]),
+        invest_ids=meta["invest_ids"],
+        buy=meta["buy"],
+        sell=meta["sell"],
+        table=table,
+        offsets={ticker: tuple(span) for ticker, span in meta["offsets"].items()},
+        # Снимки, опубликованные до манифеста, читаются с пустыми полями
+        manifest={ticker: TickerEntry(**entry) for ticker, entry in meta.get("manifest", {}).items()},
+        changed=meta.get("changed", []),
+        transitions=[Transition(**t) for t in meta.get("transitions", [])],
+    )
+
+
+def latest_version(snapshot_dir: str | Path = SNAPSHOT_DIR) -> int | None:
+    try:
+        return json.loads((Path(snapshot_dir) / LATEST_FILE).read_text())["version"]
+    except (OSError, ValueError, KeyError):
+        versions = _versions(Path(snapshot_dir))
+        return versions[-1] if versions else None
+
+
+def read_snapshot(version: int | None = None, snapshot_dir: str | Path = SNAPSHOT_DIR) -> SignalSnapshot | None:
+    """Снимок указанной (по умолчанию последней) версии; если файл повреждён — ближайший предыдущий."""
+    snapshot_dir = Path(snapshot_dir)
+    version = version if version is not None else latest_version(snapshot_dir)
+    if version is None:
+        return None
+    for candidate in reversed([v for v in _versions(snapshot_dir) if v <= version]):
+        try:
+            return _read_version(snapshot_dir, candidate)
+        except (OSError, pa.ArrowException, ValueError, KeyError):
+            continue
+    return None
+
+
+def write_status(status: WorkerStatus, snapshot_dir: str | Path = SNAPSHOT_DIR) -> None:
+    snapshot_dir = Path(snapshot_dir)
+    snapshot_dir.mkdir(parents=True, exist_ok=True)
+    data = {
+        "last_attempt": status.last_attempt.isoformat() if status.last_attempt else None,
+        "ok": status.ok,
+        "error": status.error,
+        "version": status.version,
+        "failed": status.failed,
+    }
+    _write_atomic(snapshot_dir / STATUS_FILE, json.dumps(data, ensure_ascii=False).encode())
+
+
+def read_status(snapshot_dir: str | Path = SNAPSHOT_DIR) -> WorkerStatus:
+    try:
+        data = json.loads((Path(snapshot_dir) / STATUS_FILE).read_text())
+    except (OSError, ValueError):
+        return WorkerStatus()
+    return WorkerStatus(
+        last_attempt=datetime.fromisoformat(data["last_attempt"]) if data.get("last_attempt") else None,
+        ok=data.get("ok", True),
+        error=data.get("error"),
+        version=data.get("version"),
+        failed=data.get("failed", {}),
+    )
+
+
+class SignalCache:
+    """Процессный кэш снимков: один экземпляр таблицы на версию для всех сессий Streamlit.
+
+    Указатель latest.json перечитывается не чаще раза в ttl секунд; версии вытесняются
+    по давности использования, когда их больше maxsize. Файлы отображаются в память,
+    так что страницы снимка в page cache ОС общие и для разных процессов.
+    """
+
+    def __init__(self, snapshot_dir: str | Path = SNAPSHOT_DIR, maxsize: int = 3, ttl: float = 30.0) -> None:
+        self.snapshot_dir = Path(snapshot_dir)
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._lock = Lock()
+        self._entries: OrderedDict[int, SignalSnapshot | None] = OrderedDict()
+        self._pointer: int | None = None
+        self._checked = float("-inf")
+
+    def latest_version(self) -> int | None:
+        with self._lock:
+            if time.monotonic() - self._checked < self.ttl:
+                return self._pointer
+        pointer = latest_version(self.snapshot_dir)
+        with self._lock:
+            self._pointer, self._checked = pointer, time.monotonic()
+        return pointer
+
+    def get(self, version: int) -> SignalSnapshot | None:
+        with self._lock:
+            if version in self._entries:
+                self._entries.move_to_end(version)
+                return self._entries[version]
+
+        snapshot = read_snapshot(version, self.snapshot_dir)
+        with self._lock:
+            self._entries[version] = snapshot
+            self._entries.move_to_end(version)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return snapshot
+
+    def latest(self) -> SignalSnapshot | None:
+        version = self.latest_version()
+        return self.get(version) if version is not None else None
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._checked = float("-inf")
+
+
+signal_cache = SignalCache()
@@ -0,0 +1,80 @@
+from datetime import date
+from typing import Protocol
+
+import pandas as pd
+import requests
+
+ISS_BASE_URL = "https://iss.moex.com"
+ISS_HISTORY_PATH = "/iss/history/engines/stock/markets/shares/boards/{board}/securities/{ticker}.json"
+ISS_HISTORY_URL = ISS_BASE_URL + ISS_HISTORY_PATH
+
+
+class MarketDataSource(Protocol):
+    def fetch_closes(self, ticker: str, start: date, end: date) -> pd.DataFrame:
+        """Дневные цены закрытия за [start, end]: колонки TRADEDATE (YYYY-MM-DD) и CLOSE."""
+        ...
+
+
+class MoexIssSource:
+    """Дневная история торгов с ISS Московской биржи, постранично."""
+
+    def __init__(self, board: str = "TQBR", timeout: float = 30.0, base_url: str = ISS_BASE_URL) -> None:
+        self.board = board
+        self.timeout = timeout
+        self.base_url = base_url
+        self._http = requests.Session()
+
+    def fetch_closes(self, ticker: str, start: date, end: date) -> pd.DataFrame:
+        url = self.base_url + ISS_HISTORY_PATH.format(board=self.board, ticker=ticker)
+        rows, offset = [], 0
+        while offset is not None:
+            response = self._http.get(url, timeout=self.timeout, params=history_params(start, end, offset))
+            response.raise_for_status()
+            page, offset = parse_history_page(response.json())
+            rows.extend(page)
+        return closes_frame(rows)
+
+
+class StubMarketDataSource:
+    """Источник из памяти для локальных прогонов: {тикер: DataFrame с TRADEDATE/CLOSE}."""
+
+    def __init__(self, closes: dict[str, pd.DataFrame]) -> None:
+        self.closes = closes
+        self.calls: list[tuple[str, date, date]] = []
+
+    def fetch_closes(self, ticker: str, start: date, end: date) -> pd.DataFrame:
+        self.calls.append((ticker, start, end))
+        frame = self.closes.get(ticker)
+        if frame is None:
+            return closes_frame([])
+        days = pd.to_datetime(frame["TRADEDATE"]).dt.date
+        return closes_frame(frame.loc[(days >= start) & (days <= end), ["TRADEDATE", "CLOSE"]].values.tolist())
+
+
+def history_params(start: date, end: date, offset: int = 0) -> dict:
+    return {
+        "from": start.isoformat(),
+        "till": end.isoformat(),
+        "start": offset,
+        "iss.meta": "off",
+        "history.columns": "TRADEDATE,CLOSE",
+    }
+
+
+def history_cursor(payload: dict) -> dict:
+    return dict(zip(payload["history.cursor"]["columns"], payload["history.cursor"]["data"][0]))
+
+
+def parse_history_page(payload: dict) -> tuple[list, int | None]:
+    """Строки страницы ответа ISS и смещение следующей страницы (None — страница последняя)."""
+    page = payload["history"]["data"]
+    cursor = history_cursor(payload)
+    offset = cursor["INDEX"] + cursor["PAGESIZE"]
+    return page, (offset if page and offset < cursor["TOTAL"] else None)
+
+
+def closes_frame(rows: list) -> pd.DataFrame:
+    frame = pd.DataFrame(rows, columns=["TRADEDATE", "CLOSE"])
+    frame = frame.dropna(subset=["CLOSE"]).drop_duplicates("TRADEDATE").sort_values("TRADEDATE")
+    frame["CLOSE"] = frame["CLOSE"].astype(float)
+    return frame.reset_index(drop=True)
@@ -0,0 +1,128 @@
+import argparse
+import os
+from datetime import date
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from market.indicators import HISTORY_COLUMNS, INDICATOR_COLUMNS
+from market.universe import DATA_DIR
+
+STORE_DIR = DATA_DIR / "store"
+
+# CLOSE остаётся float64: по нему пересчитываются индикаторы, и округление до float32
+# могло бы сдвинуть сигналы у порогов. Индикаторы — только для показа, им хватает float32
+SCHEMA = pa.schema([
+    pa.field("TRADEDATE", pa.date32()),
+    pa.field("CLOSE", pa.float64()),
+    *(pa.field(name, pa.float32()) for name in INDICATOR_COLUMNS),
+    pa.field("Signal", pa.dictionary(pa.int8(), pa.string())),
+])
+
+
+def to_table(frame: pd.DataFrame) -> pa.Table:
+    return pa.Table.from_arrays(
+        [
+            pa.array(pd.to_datetime(frame["TRADEDATE"]).dt.date, type=pa.date32()),
+            pa.array(frame["CLOSE"].to_numpy(dtype=np.float64)),
+            *(pa.array(frame[name].to_numpy(dtype=np.float32)) for name in INDICATOR_COLUMNS),
+            pa.array(frame["Signal"].astype(str)).dictionary_encode().cast(SCHEMA.field("Signal").type),
+        ],
+        schema=SCHEMA,
+    )
+
+
+def to_frame(table: pa.Table) -> pd.DataFrame:
+    """Таблица стора -> DataFrame в формате data/<TICKER>.csv (TRADEDATE строкой YYYY-MM-DD)."""
+    # Приведение типов на стороне Arrow: через pandas (to_datetime + strftime) в разы дольше
+    table = table.set_column(0, "TRADEDATE", table.column("TRADEDATE").cast(pa.string()))
+    table = table.set_column(len(HISTORY_COLUMNS) - 1, "Signal", table.column("Signal").cast(pa.string()))
+    return table.to_pandas()
+
+
+class CandleStore:
+    """История свечей и индикаторов: по файлу Arrow IPC на тикер, чтение через mmap.
+
+    Файл не разбирается целиком: хвост и срез по датам — это срезы таблицы
+    поверх отображённой памяти без копирования.
+    """
+
+    def __init__(self, root: str | Path = STORE_DIR) -> None:
+        self.root = Path(root)
+
+    def path(self, ticker: str) -> Path:
+        return self.root / f"{ticker}.arrow"
+
+    def exists(self, ticker: str) -> bool:
+        return self.path(ticker).exists()
+
+    def tickers(self) -> list[str]:
+        return sorted(p.stem for p in self.root.glob("*.arrow"))
+
+    def read(self, ticker: str) -> pa.Table:
+        with pa.memory_map(str(self.path(ticker))) as source:
+            return pa.ipc.open_file(source).read_all()
+
+    def write(self, ticker: str, frame: pd.DataFrame | pa.Table) -> None:
+        table = frame if isinstance(frame, pa.Table) else to_table(frame)
+        self.root.mkdir(parents=True, exist_ok=True)
+        # Пишем во временный файл и атомарно подменяем: читатели видят либо старую, либо новую версию
+        tmp = self.path(ticker).with_suffix(".arrow.tmp")
+        with pa.OSFile(str(tmp), "wb") as sink, pa.ipc.new_file(sink, SCHEMA) as writer:
+            writer.write_table(table.combine_chunks())
+        os.replace(tmp, self.path(ticker))
+
+    def append(self, ticker: str, frame: pd.DataFrame) -> None:
+        if not self.exists(ticker):
+            self.write(ticker, frame)
+            return
+        self.write(ticker, pa.concat_tables([self.read(ticker), to_table(frame)]))
+
+    def tail(self, ticker: str, n: int) -> pd.DataFrame:
+        table = self.read(ticker)
+        return to_frame(table.slice(max(table.num_rows - n, 0)))
+
+    def last_date(self, ticker: str) -> str | None:
+        table = self.read(ticker)
+        if not table.num_rows:
+            return None
+        return table.column("TRADEDATE")[-1].as_py().isoformat()
+
+    def between(self, ticker: str, start: date | None = None, end: date | None = None) -> pd.DataFrame:
+        table = self.read(ticker)
+        # Даты отсортированы — границы среза ищем бинарным поиском
+        days = table.column("TRADEDATE").to_numpy()
+        lo = np.searchsorted(days, np.datetime64(start, "D"), "left") if start else 0
+        hi = np.searchsorted(days, np.datetime64(end, "D"), "right") if end else len(days)
+        return to_frame(table.slice(lo, hi - lo))
+
+
+def convert_csv_dir(data_dir: str | Path = DATA_DIR, store: CandleStore | None = None) -> list[str]:
+    """Однократный перенос data/<TICKER>.csv в стор; возвращает список перенесённых тикеров."""
+    store = store or CandleStore(Path(data_dir) / "store")
+    converted = []
+    for path in sorted(Path(data_dir).glob("*.csv")):
+        frame = pd.read_csv(path)
+        if list(frame.columns) != HISTORY_COLUMNS:
+            continue
+        store.write(path.stem, frame)
+        converted.append(path.stem)
+    return converted
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Колоночный стор истории свечей")
+    sub = parser.add_subparsers(dest="command", required=True)
+    convert = sub.add_parser("convert", help="перенести data/<TICKER>.csv в стор")
+    convert.add_argument("--data-dir", default=str(DATA_DIR))
+    args = parser.parse_args()
+
+    if args.command == "convert":
+        converted = convert_csv_dir(args.data_dir)
+        print(f"Перенесено тикеров: {len(converted)}", ", ".join(converted))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from pathlib import Path
+
+from aiohttp import web
+
+from market.sources import ISS_HISTORY_PATH, MoexIssSource
+from market.universe import DATA_DIR, load_invest_ids
+
+RECORDINGS_DIR = DATA_DIR / "recordings"
+PAGE_SIZE = 100
+
+
+@dataclass
+class StubOptions:
+    page_size: int = PAGE_SIZE
+    latency: float = 0.0
+    fail_rate: float = 0.0
+    seed: int | None = None
+    served: dict[int, int] = field(default_factory=dict)
+
+
+def record(tickers: list[str], out_dir: str | Path = RECORDINGS_DIR, days: int = 365) -> None:
+    """Записать ответы ISS по тикерам: <TICKER>.json со строками TRADEDATE/CLOSE."""
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    source = MoexIssSource()
+    end = date.today()
+    for ticker in tickers:
+        frame = source.fetch_closes(ticker, end - timedelta(days=days), end)
+        _save(out_dir, ticker, frame.values.tolist())
+
+
+def record_from_history(tickers: list[str], out_dir: str | Path = RECORDINGS_DIR) -> None:
+    """Записи из уже сохранённых историй — чтобы гонять замеры без выхода в сеть."""
+    from market.incremental import read_history
+
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    for ticker in tickers:
+        history = read_history(ticker)
+        if history is not None:
+            _save(out_dir, ticker, history[["TRADEDATE", "CLOSE"]].values.tolist())
+
+
+def _save(out_dir: Path, ticker: str, rows: list) -> None:
+    (out_dir / f"{ticker}.json").write_text(json.dumps({"columns": ["TRADEDATE", "CLOSE"], "data": rows}))
+
+
+def create_app(recordings_dir: str | Path = RECORDINGS_DIR, options: StubOptions | None = None) -> web.Application:
+    """Подставной ISS: отдаёт записанные ответы в формате history + history.cursor."""
+    options = options or StubOptions()
+    rng = random.Random(options.seed)
+    recordings = {
+        path.stem: json.loads(path.read_text())["data"] for path in Path(recordings_dir).glob("*.json")
+    }
+
+    async def history(request: web.Request) -> web.StreamResponse:
+        if options.latency:
+            await asyncio.sleep(options.latency)
+        if rng.random() < options.fail_rate:
+            return _reply(options, web.Response(status=503, text="stub failure"))
+
+        query = request.query
+        rows = [
+            row for row in recordings.get(request.match_info["ticker"], [])
+            if query.get("from", "") <= row[0] <= query.get("till", "9999-12-31")
+        ]
+        offset = int(query.get("start", 0))
+        body = json.dumps({
+            "history": {"columns": ["TRADEDATE", "CLOSE"], "data": rows[offset:offset + options.page_size]},
+            "history.cursor": {
+                "columns": ["INDEX", "TOTAL", "PAGESIZE"],
+                "data": [[offset, len(rows), options.page_size]],
+            },
+        })
+        etag = '"%s"' % hashlib.sha1(body.encode()).hexdigest()
+        if request.headers.get("If-None-Match") == etag:
+            return _reply(options, web.Response(status=304, headers={"ETag": etag}))
+        return _reply(options, web.Response(text=body, content_type="application/json", headers={"ETag": etag}))
+
+    app = web.Application()
+    app.router.add_get(ISS_HISTORY_PATH, history)
+    return app
+
+
+def _reply(options: StubOptions, response: web.Response) -> web.Response:
+    options.served[response.status] = options.served.get(response.status, 0) + 1
+    return response
+
+
+@asynccontextmanager
+async def running_stub_server(
+    recordings_dir: str | Path = RECORDINGS_DIR,
+    options: StubOptions | None = None,
+    host: str = "127.0.0.1",
+    port: int = 0,
+):
+    """Запустить сервер в текущем цикле событий; отдаёт базовый URL для base_url источников."""
+    runner = web.AppRunner(create_app(recordings_dir, options))
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    try:
+        bound_port = runner.addresses[0][1]
+        yield f"http://{host}:{bound_port}"
+    finally:
+        await runner.cleanup()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Подставной сервер ISS с записанными ответами")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    rec = sub.add_parser("record", help="записать ответы ISS по тикерам из config/invest_id_list.txt")
+    rec.add_argument("--out", default=str(RECORDINGS_DIR))
+    rec.add_argument("--from-history", action="store_true", help="взять строки из сохранённых историй, без сети")
+
+    serve = sub.add_parser("serve", help="раздавать записи по HTTP")
+    serve.add_argument("--recordings", default=str(RECORDINGS_DIR))
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8765)
+    serve.add_argument("--page-size", type=int, default=PAGE_SIZE)
+    serve.add_argument("--latency", type=float, default=0.0, help="задержка ответа, с")
+    serve.add_argument("--fail-rate", type=float, default=0.0, help="доля ответов 503")
+    args = parser.parse_args()
+
+    if args.command == "record":
+        (record_from_history if args.from_history else record)(load_invest_ids(), args.out)
+    else:
+        options = StubOptions(args.page_size, args.latency, args.fail_rate)
+        web.run_app(create_app(args.recordings, options), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,9 @@
+from pathlib import Path
+
+INVEST_ID_LIST = Path("config/invest_id_list.txt")
+DATA_DIR = Path("data")
+
+
+def load_invest_ids(path: str | Path = INVEST_ID_LIST) -> list[str]:
+    with open(path, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip()]
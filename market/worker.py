@@ -0,0 +1,94 @@
+import argparse
+import logging
+import time
+import traceback
+from datetime import datetime
+from pathlib import Path
+
+from infrastructure.instrumentation import collect
+from market.fetcher import FetchError, PooledMoexIssSource
+from market.incremental import recent_signals, refresh_all
+from market.signal_snapshot import (
+    INTERVAL_SECONDS,
+    SNAPSHOT_DIR,
+    WorkerStatus,
+    latest_version,
+    publish,
+    read_snapshot,
+    write_status,
+)
+from market.universe import DATA_DIR, load_invest_ids
+
+logger = logging.getLogger("viatrade.worker")
+
+RECENT_DAYS = 5
+
+
+def run_once(data_dir: str | Path = DATA_DIR, snapshot_dir: str | Path = SNAPSHOT_DIR, source=None) -> WorkerStatus:
+    """Один цикл: дообновить истории, посчитать сигналы, опубликовать снимок.
+
+    source живёт дольше цикла, чтобы ETag/Last-Modified прошлых ответов давали 304;
+    без него создаётся новый источник без валидаторов (разовый запуск).
+
+    Тикеры, чьи истории не изменились с прошлого снимка, не перечитываются: последняя дата
+    для окна загрузки берётся из манифеста (см. refresh_all), строки снимка — из него же (recent_signals).
+    При ошибке снимок не публикуется — читатели остаются на предыдущей версии,
+    а причина записывается в status.json.
+    """
+    status = WorkerStatus(last_attempt=datetime.now())
+    try:
+        with collect("signal-worker"):
+            invest_ids = load_invest_ids()
+            previous = read_snapshot(snapshot_dir=snapshot_dir)
+            known = previous.manifest if previous else None
+            results = refresh_all(invest_ids, source or PooledMoexIssSource(), data_dir=data_dir, manifest=known)
+            status.failed = {r.ticker: r.error for r in results if r.error}
+            if results and len(status.failed) == len(results):
+                # Не обновилось ничего (нет сети, ISS недоступен) — снимок с прежними данными не публикуем
+                raise FetchError(f"ни один тикер не обновлён: {next(iter(status.failed.values()))}")
+            buy, sell, recent, manifest = recent_signals(invest_ids, RECENT_DAYS, data_dir, previous)
+            status.version = publish(invest_ids, buy, sell, recent, snapshot_dir, manifest)
+        logger.info("Опубликован снимок сигналов #%s", status.version)
+        if status.failed:
+            logger.warning("Не обновлены тикеры: %s", ", ".join(status.failed))
+    except Exception as exc:
+        status.ok = False
+        status.error = f"{type(exc).__name__}: {exc}"
+        status.version = latest_version(snapshot_dir)
+        logger.error("Обновление сигналов не удалось\n%s", traceback.format_exc())
+    write_status(status, snapshot_dir)
+    return status
+
+
+def run_forever(
+    interval: float = INTERVAL_SECONDS,
+    data_dir: str | Path = DATA_DIR,
+    snapshot_dir: str | Path = SNAPSHOT_DIR,
+) -> None:
+    # Один источник на всё время работы: его валидаторы переходят из цикла в цикл
+    source = PooledMoexIssSource()
+    while True:
+        started = time.monotonic()
+        run_once(data_dir, snapshot_dir, source)
+        time.sleep(max(interval - (time.monotonic() - started), 0))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Фоновый пересчёт сигналов с публикацией снимков")
+    parser.add_argument("--interval", type=float, default=INTERVAL_SECONDS, help="период обновления, с")
+    parser.add_argument("--once", action="store_true", help="один цикл и выход (для cron/планировщика)")
+    parser.add_argument("--data-dir", default=str(DATA_DIR))
+    parser.add_argument("--snapshot-dir", default=str(SNAPSHOT_DIR))
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s")
+    if args.once:
+        raise SystemExit(0 if run_once(args.data_dir, args.snapshot_dir).ok else 1)
+    try:
+        run_forever(args.interval, args.data_dir, args.snapshot_dir)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
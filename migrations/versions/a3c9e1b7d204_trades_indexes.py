@@ -0,0 +1,40 @@
+"""trades indexes
+
+Revision ID: a3c9e1b7d204
+Revises: 5e42d3f1f912
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3c9e1b7d204'
+down_revision: Union[str, Sequence[str], None] = '5e42d3f1f912'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_trades_user_id_date_open', 'trades', ['user_id', 'date_open'], unique=False)
+    op.create_index('ix_trades_trade_code_id', 'trades', ['trade_code_id'], unique=False)
+    op.create_index('ix_trades_date_open', 'trades', ['date_open', 'id'], unique=False)
+    op.create_index(
+        'ix_trades_open_id',
+        'trades',
+        ['id'],
+        unique=False,
+        sqlite_where=sa.text('date_close IS NULL'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_trades_open_id', table_name='trades')
+    op.drop_index('ix_trades_date_open', table_name='trades')
+    op.drop_index('ix_trades_trade_code_id', table_name='trades')
+    op.drop_index('ix_trades_user_id_date_open', table_name='trades')
@@ -1,6 +1,15 @@
 import subprocess
 import sys
 
-subprocess.Popen([
+# Воркер пересчитывает сигналы по расписанию и публикует снимки, UI их только читает
+worker = subprocess.Popen([
+    sys.executable, "-m", "market.worker"
+])
+ui = subprocess.Popen([
     sys.executable, "-m", "streamlit", "run", "main.py"
 ])
+
+try:
+    ui.wait()
+finally:
+    worker.terminate()
@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from market.engine import SIGNAL_LABELS, align, compute, verify
+from market.indicators import INDICATOR_COLUMNS, apply_signal_rule, compute_indicators
+
+
+def _history(start: str, rows: int, seed: int, drop_every: int = 0, flat: slice | None = None) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, rows)))
+    if flat:
+        close[flat] = close[flat.start]
+    dates = pd.bdate_range(start, periods=rows)
+    frame = pd.DataFrame({"TRADEDATE": dates.strftime("%Y-%m-%d"), "CLOSE": close.round(2)})
+    if drop_every:
+        frame = frame[np.arange(rows) % drop_every != 0]
+    return frame.reset_index(drop=True)
+
+
+@pytest.fixture(scope="module")
+def histories() -> dict[str, pd.DataFrame]:
+    return {
+        "LONG": _history("2023-01-02", 300, seed=1),
+        # Начинается позже остальных: в общей сетке дат его столбец начинается с NaN
+        "LATE": _history("2023-06-01", 150, seed=2),
+        # Пропуски торговых дней внутри истории не должны разрывать рекурсии EMA/ADX
+        "GAPS": _history("2023-01-02", 300, seed=3, drop_every=7),
+        # Цена без изменений: нулевые знаменатели RSI, стохастика и ADX
+        "FLAT": _history("2023-03-01", 80, seed=4, flat=slice(20, 50)),
+        # Чуть длиннее затравки ADX (2·14 строк); историю короче ta сам не считает
+        "SHORT": _history("2023-09-01", 30, seed=5),
+    }
+
+
+def test_compute_matches_ta(histories):
+    universe = align(histories)
+    result = compute(universe)
+    for j, ticker in enumerate(universe.tickers):
+        rows = ~np.isnan(universe.close[:, j])
+        expected = compute_indicators(histories[ticker]["CLOSE"])
+        for name in INDICATOR_COLUMNS:
+            np.testing.assert_allclose(
+                result.indicators[name][rows, j], expected[name].to_numpy(dtype=np.float64),
+                rtol=1e-9, atol=1e-9, equal_nan=True, err_msg=f"{ticker} {name}",
+            )
+        signals, _ = apply_signal_rule(pd.concat([histories[ticker][["TRADEDATE"]], expected], axis=1))
+        assert (SIGNAL_LABELS[result.signals[rows, j]] == signals.to_numpy()).all(), ticker
+
+
+def test_verify_reports_match(histories):
+    report = verify(histories)
+    assert set(report["Ticker"]) == set(histories)
+    assert report["OK"].all(), report.to_string(index=False)
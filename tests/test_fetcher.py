@@ -0,0 +1,130 @@
+import asyncio
+import json
+from datetime import date
+
+import pandas as pd
+import pytest
+
+from market.fetcher import AsyncMoexIssFetcher, FetchError, PooledMoexIssSource
+from market.stub_server import StubOptions, running_stub_server
+
+START, END = date(2024, 1, 1), date(2024, 12, 31)
+PAGE_SIZE = 40
+TICKERS = ("SBER", "GAZP", "NONE")
+
+
+@pytest.fixture
+def recordings(tmp_path) -> dict[str, list]:
+    days = pd.bdate_range(START, END).strftime("%Y-%m-%d")
+    data = {
+        "SBER": [[d, 250 + i / 10] for i, d in enumerate(days)],
+        # Ровно одна страница: курсор не должен запрашивать следующую
+        "GAZP": [[d, 160 + i / 10] for i, d in enumerate(days[:PAGE_SIZE])],
+    }
+    for ticker, rows in data.items():
+        (tmp_path / f"{ticker}.json").write_text(json.dumps({"columns": ["TRADEDATE", "CLOSE"], "data": rows}))
+    return data
+
+
+async def _fetch(base_url: str, validators: dict | None = None, **options):
+    async with AsyncMoexIssFetcher(base_url=base_url, backoff=0, validators=validators, **options) as fetcher:
+        pages = [page async for page in fetcher.pages("SBER", START, END)]
+        frames = await fetcher.fetch_many({ticker: (START, END) for ticker in TICKERS})
+        return pages, frames, fetcher.stats
+
+
+def test_retries_and_page_assembly(tmp_path, recordings):
+    options = StubOptions(page_size=PAGE_SIZE, fail_rate=0.3, seed=7)
+
+    async def run():
+        async with running_stub_server(tmp_path, options) as base_url:
+            return await _fetch(base_url, retries=20)
+
+    pages, frames, stats = asyncio.run(run())
+
+    # Страницы приходят по порядку смещений, хотя хвост запрашивается параллельно
+    assert [len(p) for p in pages[:-1]] == [PAGE_SIZE] * (len(pages) - 1)
+    assert [row for page in pages for row in page] == recordings["SBER"]
+    for ticker, rows in recordings.items():
+        assert frames[ticker].values.tolist() == rows
+    # Неизвестный тикер — пустая история, а не ошибка
+    assert frames["NONE"].empty
+
+    assert options.served[503] > 0
+    assert stats.retries == options.served[503]
+    assert stats.requests == sum(options.served.values())
+    assert stats.failures == 0 and not stats.errors
+
+
+def test_conditional_requests_get_304(tmp_path, recordings):
+    options = StubOptions(page_size=PAGE_SIZE)
+    validators = {}
+
+    async def run():
+        async with running_stub_server(tmp_path, options) as base_url:
+            first = await _fetch(base_url, validators)
+            served = dict(options.served)
+            # Следующий цикл воркера: новый клиент, но валидаторы прошлого
+            second = await _fetch(base_url, validators)
+            return first, served, second
+
+    (pages, first, stats), served, (_, second, again) = asyncio.run(run())
+    # SBER запрашивается дважды: повторные запросы его страниц уже условные
+    assert stats.not_modified == served[304] == len(pages)
+
+    # Все ответы повторного прогона — 304 без тела, данные берутся из валидаторов
+    assert again.not_modified == again.requests == options.served[304] - served[304]
+    assert options.served[200] == served[200]
+    for ticker in TICKERS:
+        pd.testing.assert_frame_equal(second[ticker], first[ticker])
+
+
+def test_moved_window_replaces_validators(tmp_path, recordings):
+    options = StubOptions(page_size=PAGE_SIZE)
+    validators = {}
+
+    async def run():
+        async with running_stub_server(tmp_path, options) as base_url:
+            await _fetch(base_url, validators)
+            stored = len(validators)
+            # Следующий день воркера: окно сдвинулось, число страниц то же
+            async with AsyncMoexIssFetcher(base_url=base_url, backoff=0, validators=validators) as fetcher:
+                await fetcher.fetch_many({ticker: (date(2024, 1, 2), END) for ticker in TICKERS})
+            return stored, fetcher.stats
+
+    stored, stats = asyncio.run(run())
+    # Записи прежнего окна замещены, а не накоплены; условных запросов к новому окну нет
+    assert len(validators) == stored
+    assert stats.not_modified == 0
+    assert all(dict(window)["from"] == "2024-01-02" for window, *_ in validators.values())
+
+
+def test_exhausted_retries_fail_only_that_ticker(tmp_path, recordings):
+    async def run():
+        async with running_stub_server(tmp_path, StubOptions(fail_rate=1.0)) as base_url:
+            async with AsyncMoexIssFetcher(base_url=base_url, backoff=0, retries=2) as fetcher:
+                return await fetcher.fetch_many({"SBER": (START, END), "GAZP": (START, END)}), fetcher.stats
+
+    frames, stats = asyncio.run(run())
+    assert frames == {}
+    assert stats.failures == 2 and set(stats.errors) == {"SBER", "GAZP"}
+    assert all("после 3 попыток" in error for error in stats.errors.values())
+    assert stats.requests == 2 * 3 and stats.retries == 2 * 2
+
+
+def test_prefetch_failure_is_raised_without_refetch(tmp_path, recordings):
+    options = StubOptions(fail_rate=1.0)
+
+    async def run():
+        async with running_stub_server(tmp_path, options) as base_url:
+            source = PooledMoexIssSource(base_url=base_url, backoff=0, retries=1)
+            # Источник синхронный и сам запускает цикл событий — из отдельного потока
+            await asyncio.to_thread(source.prefetch, {"SBER": (START, END)})
+            served = sum(options.served.values())
+            with pytest.raises(FetchError, match="после 2 попыток"):
+                await asyncio.to_thread(source.fetch_closes, "SBER", START, END)
+            return served
+
+    served = asyncio.run(run())
+    assert served == 2
+    assert sum(options.served.values()) == served
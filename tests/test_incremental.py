@@ -0,0 +1,79 @@
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from market import incremental
+from market.incremental import read_history, recent_signals, refresh_all
+from market.indicators import INDICATOR_COLUMNS, build_history
+from market.sources import StubMarketDataSource
+
+TICKERS = ["SBER", "GAZP"]
+FIRST_END = date(2024, 6, 28)
+
+
+def _closes(seed: int, end: date) -> pd.DataFrame:
+    days = pd.bdate_range("2023-07-03", end)
+    close = 100 * np.exp(np.cumsum(np.random.default_rng(seed).normal(0, 0.02, len(days))))
+    return pd.DataFrame({"TRADEDATE": days.strftime("%Y-%m-%d"), "CLOSE": close.round(2)})
+
+
+@pytest.fixture
+def reads(monkeypatch) -> list[tuple[str, int | None]]:
+    calls = []
+    read_history = incremental.read_history
+
+    def counted(ticker, data_dir=incremental.DATA_DIR, tail=None):
+        calls.append((ticker, tail))
+        return read_history(ticker, data_dir, tail)
+
+    monkeypatch.setattr(incremental, "read_history", counted)
+    return calls
+
+
+def test_unchanged_histories_are_not_read(tmp_path, reads):
+    source = StubMarketDataSource({t: _closes(seed, FIRST_END) for seed, t in enumerate(TICKERS)})
+    refresh_all(TICKERS, source, FIRST_END, tmp_path)
+    _, _, _, manifest = recent_signals(TICKERS, 5, tmp_path)
+
+    # Новых дней нет: с манифестом истории не читаются вовсе, без него — хвост каждого тикера
+    reads.clear()
+    results = refresh_all(TICKERS, source, date(2024, 7, 1), tmp_path, manifest)
+    assert reads == []
+    assert [r.last_date for r in results] == ["2024-06-28"] * 2
+    refresh_all(TICKERS, source, date(2024, 7, 1), tmp_path)
+    assert sorted(reads) == sorted((t, 1) for t in TICKERS)
+
+    # Новые дни только у SBER: читается хвост для прогрева индикаторов только его истории
+    reads.clear()
+    source.closes["SBER"] = _closes(0, date(2024, 7, 3))
+    results = refresh_all(TICKERS, source, date(2024, 7, 3), tmp_path, manifest)
+    assert reads == [("SBER", incremental.WARMUP_ROWS)]
+    assert [(r.ticker, r.appended, r.last_date) for r in results] == [
+        ("SBER", 3, "2024-07-03"), ("GAZP", 0, "2024-06-28"),
+    ]
+
+    # Файл SBER изменился: его запись манифеста больше не годится, последняя дата читается из файла
+    reads.clear()
+    refresh_all(TICKERS, source, date(2024, 7, 3), tmp_path, manifest)
+    assert reads == [("SBER", 1)]
+
+
+def test_incremental_refresh_matches_full_rebuild(tmp_path):
+    closes = _closes(0, date(2024, 9, 30))
+    source = StubMarketDataSource({"SBER": closes})
+    # Первый прогон строит историю за год, дальше — дозагрузка по дню и пачками в несколько недель
+    for end in (FIRST_END, date(2024, 7, 1), date(2024, 7, 2), date(2024, 7, 12), date(2024, 8, 16), date(2024, 9, 30)):
+        refresh_all(["SBER"], source, end, tmp_path)
+
+    history = read_history("SBER", tmp_path)
+    start = history["TRADEDATE"].iloc[0]
+    full = build_history(closes[closes["TRADEDATE"] >= start])
+    assert history["TRADEDATE"].tolist() == full["TRADEDATE"].tolist()
+    for name in INDICATOR_COLUMNS:
+        np.testing.assert_allclose(
+            history[name].to_numpy(dtype=np.float64), full[name].to_numpy(dtype=np.float64),
+            rtol=1e-6, equal_nan=True, err_msg=name,
+        )
+    assert history["Signal"].tolist() == full["Signal"].tolist()
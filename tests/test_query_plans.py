@@ -0,0 +1,33 @@
+import asyncio
+
+import pytest
+from alembic import command
+from alembic.config import Config
+
+from benchmarks.plans import PLAN_CHECKS, explain, uses_index
+from benchmarks.synthetic import sqlite_file_url
+from infrastructure.repositories.sqlite_config import create_engine
+
+
+@pytest.fixture(scope="module")
+def migrated_db(tmp_path_factory):
+    # Схема из миграций, а не из metadata.create_all: проверяются индексы, которые реально получит БД
+    path = tmp_path_factory.mktemp("plans") / "trades.sqlite3"
+    config = Config("alembic.ini")
+    config.set_main_option("sqlalchemy.url", str(sqlite_file_url(path)))
+    command.upgrade(config, "head")
+    return path
+
+
+@pytest.mark.parametrize("check", PLAN_CHECKS, ids=lambda check: check.name)
+def test_tab_query_uses_index(migrated_db, check):
+    async def run():
+        engine = create_engine(sqlite_file_url(migrated_db))
+        try:
+            return await explain(engine, check)
+        finally:
+            await engine.dispose()
+
+    plan = asyncio.run(run())
+    assert plan, "репозиторий не выполнил ни одного SELECT"
+    assert uses_index(plan, check.index), plan
@@ -0,0 +1,49 @@
+import asyncio
+import sqlite3
+import subprocess
+import sys
+
+from infrastructure.repositories.snapshot import SnapshotCache
+from infrastructure.repositories.sqlite_config import DataVersionProbe
+
+
+def _db(tmp_path):
+    path = tmp_path / "cache.sqlite3"
+    with sqlite3.connect(path) as conn:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("CREATE TABLE trades (id INTEGER PRIMARY KEY)")
+    return path
+
+
+def _cached_count(cache: SnapshotCache, path) -> int:
+    async def load():
+        with sqlite3.connect(path) as conn:
+            return conn.execute("SELECT count(*) FROM trades").fetchone()[0]
+
+    return asyncio.run(cache.get_or_load("trades:count", ("trades",), load))
+
+
+def test_cached_until_local_invalidate(tmp_path):
+    path = _db(tmp_path)
+    cache = SnapshotCache()
+    assert _cached_count(cache, path) == 0
+    with sqlite3.connect(path) as conn:
+        conn.execute("INSERT INTO trades DEFAULT VALUES")
+    # Без watch чужая запись не видна, пока этот процесс сам не сбросит таблицу
+    assert _cached_count(cache, path) == 0
+    cache.invalidate("trades")
+    assert _cached_count(cache, path) == 1
+
+
+def test_commit_from_other_process_invalidates(tmp_path):
+    path = _db(tmp_path)
+    cache = SnapshotCache()
+    cache.watch(DataVersionProbe(str(path)))
+    assert _cached_count(cache, path) == 0
+    assert _cached_count(cache, path) == 0
+
+    subprocess.run(
+        [sys.executable, "-c", f"import sqlite3\nwith sqlite3.connect({str(path)!r}) as c: c.execute('INSERT INTO trades DEFAULT VALUES')"],
+        check=True,
+    )
+    assert _cached_count(cache, path) == 1
@@ -0,0 +1,67 @@
+import asyncio
+
+import pytest
+from sqlalchemy import select
+
+from domain.base import BaseModel
+from domain.entity import TradeCode
+from infrastructure.repositories.sqlite_config import create_engine, create_session_factory
+from infrastructure.repositories.tradecode import TradeCodeRepository
+from infrastructure.repositories.unit_of_work import UnitOfWork
+
+
+class Boom(Exception):
+    pass
+
+
+def _run(tmp_path, scenario) -> list[str]:
+    """Выполнить scenario(repository) в отдельной сессии и вернуть тикеры, попавшие в БД."""
+    async def run():
+        engine = create_engine(f"sqlite+aiosqlite:///{tmp_path / 'uow.sqlite3'}")
+        async with engine.begin() as conn:
+            await conn.run_sync(BaseModel.metadata.create_all)
+        factory = create_session_factory(engine)
+        async with factory() as session:
+            try:
+                await scenario(TradeCodeRepository(session))
+            except Boom:
+                pass
+        async with factory() as session:
+            stored = (await session.scalars(select(TradeCode.exchange_id).order_by(TradeCode.exchange_id))).all()
+        await engine.dispose()
+        return list(stored)
+
+    return asyncio.run(run())
+
+
+async def _add(repository: TradeCodeRepository, exchange_id: str) -> None:
+    await repository.add(TradeCode(exchange_id=exchange_id))
+
+
+def test_failed_nested_scope_is_rolled_back_alone(tmp_path):
+    async def scenario(repository):
+        async with repository.unit_of_work():
+            await _add(repository, "OUTER")
+            try:
+                async with repository.unit_of_work():
+                    await _add(repository, "INNER")
+                    raise Boom
+            except Boom:
+                pass
+            await _add(repository, "AFTER")
+
+    assert _run(tmp_path, scenario) == ["AFTER", "OUTER"]
+
+
+@pytest.mark.parametrize("outer_fails", [False, True])
+def test_nested_scope_commits_with_outer(tmp_path, outer_fails):
+    async def scenario(repository):
+        async with UnitOfWork(repository.session):
+            # Вложенный блок до первой записи внешнего: его точка сохранения не должна стать транзакцией
+            async with UnitOfWork(repository.session):
+                await _add(repository, "INNER")
+            await _add(repository, "OUTER")
+            if outer_fails:
+                raise Boom
+
+    assert _run(tmp_path, scenario) == ([] if outer_fails else ["INNER", "OUTER"])
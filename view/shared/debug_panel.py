@@ -0,0 +1,46 @@
+import os
+
+import streamlit as st
+
+from infrastructure.instrumentation import (
+    REPEATED_QUERY_THRESHOLD,
+    SLOW_SPAN_SECONDS,
+    RunStats,
+    metrics,
+)
+
+DEBUG_ENV = "VIATRADE_DEBUG"
+
+
+def debug_enabled() -> bool:
+    # Панель включается переменной окружения или параметром ?debug=1 в адресе
+    return os.environ.get(DEBUG_ENV) == "1" or st.query_params.get("debug") == "1"
+
+
+def show_debug_panel(run: RunStats) -> None:
+    if not debug_enabled():
+        return
+    import pandas as pd
+
+    with st.sidebar.expander("⏱ Производительность", expanded=True):
+        c1, c2, c3 = st.columns(3)
+        c1.metric("Прогон, мс", f"{run.elapsed * 1000:.0f}")
+        c2.metric("Запросов", len(run.queries))
+        c3.metric("SQL, мс", f"{run.sql_seconds * 1000:.0f}")
+
+        for sql, count in run.repeated_queries():
+            st.warning(f"Запрос выполнен {count} раз за прогон (≥ {REPEATED_QUERY_THRESHOLD}) — похоже на N+1:\n\n`{sql}`")
+        for span in run.slow_spans():
+            st.warning(f"{span.name} занял {span.seconds * 1000:.0f} мс (порог {SLOW_SPAN_SECONDS * 1000:.0f} мс)")
+
+        if run.spans:
+            st.markdown("**Замеры**")
+            spans = pd.DataFrame(
+                [{"name": s.name, **s.labels, "ms": s.seconds * 1000} for s in run.spans]
+            )
+            st.dataframe(spans, hide_index=True)
+        if run.queries:
+            st.markdown("**Запросы**")
+            st.dataframe(pd.DataFrame(run.query_summary()), hide_index=True)
+
+        st.download_button("Метрики (OpenMetrics)", metrics.openmetrics(), "metrics.txt", "text/plain")
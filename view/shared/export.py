@@ -0,0 +1,61 @@
+import tempfile
+from collections.abc import Callable, Iterator
+from typing import BinaryIO
+
+import streamlit as st
+
+from infrastructure.exporters.chunked import FORMATS, default_name
+
+
+def export_panel(kind: str, count: Callable[[], int], steps: Callable[[BinaryIO, str], Iterator[int]]) -> None:
+    """Выгрузка пачками с прогрессом, затем кнопка скачивания.
+
+    count() считает строки выгрузки и вызывается только по кнопке, а не при каждом перезапуске скрипта.
+    steps(sink, fmt) пишет в sink и после каждой пачки отдаёт число записанных строк.
+    Выгрузка пишется во временный файл, в session_state лежит только он: в памяти остаётся
+    одна копия — та, что download_button передаёт браузеру. После скачивания файл удаляется.
+    """
+    state_key = f"{kind}_export"
+    fmt_col, run_col = st.columns([2, 1])
+    fmt = fmt_col.radio("Формат", list(FORMATS), horizontal=True, key=f"{kind}_export_format")
+
+    if run_col.button("Подготовить выгрузку", key=f"{kind}_export_run"):
+        # Прежняя выгрузка освобождается до того, как начнётся новая
+        _release(state_key)
+        total = count()
+        if total == 0:
+            st.info("Выгружать нечего.")
+        else:
+            # Файл удаляется при закрытии: в _release или сборщиком мусора вместе с сессией
+            file = tempfile.NamedTemporaryFile(prefix=f"{kind}-", suffix=f".{fmt}")
+            bar = st.progress(0.0, text=f"0 из {total} строк")
+            rows = 0
+            try:
+                for rows in steps(file, fmt):
+                    bar.progress(min(rows / total, 1.0), text=f"{rows} из {total} строк")
+                file.flush()
+            except BaseException:
+                file.close()
+                raise
+            bar.empty()
+            st.session_state[state_key] = (file, fmt, rows)
+
+    if exported := st.session_state.get(state_key):
+        file, fmt, rows = exported
+        # download_button принимает открытый на чтение файл и сам читает его целиком
+        with open(file.name, "rb") as data:
+            st.download_button(
+                f"⬇️ Скачать {fmt.upper()} ({rows} строк)",
+                data,
+                file_name=default_name(kind, fmt),
+                mime=FORMATS[fmt],
+                key=f"{kind}_export_download",
+                # Скачанная выгрузка больше не нужна; браузер успевает её забрать и после перезапуска
+                on_click=_release,
+                args=(state_key,),
+            )
+
+
+def _release(state_key: str) -> None:
+    if exported := st.session_state.pop(state_key, None):
+        exported[0].close()
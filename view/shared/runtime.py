@@ -0,0 +1,72 @@
+import atexit
+from collections.abc import AsyncIterator, Iterator
+from typing import Any, Awaitable, Callable, Coroutine, TypeVar
+
+import streamlit as st
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from infrastructure.async_runtime import AsyncRuntime
+from infrastructure.repositories.sqlite_config import (
+    create_session_factory,
+    create_writer_engine,
+    default_session_factory,
+    session_scope,
+    watch_external_writes,
+)
+from infrastructure.repositories.write_queue import WriteCoordinator
+
+R = TypeVar("R")
+_DONE = object()
+
+
+@st.cache_resource
+def get_runtime() -> AsyncRuntime:
+    runtime = AsyncRuntime()
+    # При выходе из процесса цикл останавливается и закрывается, а не обрывается вместе с daemon-потоком
+    atexit.register(runtime.stop)
+    return runtime
+
+
+@st.cache_resource
+def get_session_factory() -> async_sessionmaker[AsyncSession]:
+    # Тот же движок и пул, что у session_scope() по умолчанию: один на процесс для всех вкладок браузера
+    watch_external_writes()
+    return default_session_factory()
+
+
+@st.cache_resource
+def get_write_coordinator() -> WriteCoordinator:
+    # Записи всех сессий браузера идут через одного писателя с групповым коммитом
+    return WriteCoordinator(create_session_factory(create_writer_engine()))
+
+
+def run_async(coro: Coroutine[Any, Any, R]) -> R:
+    # Вызовы st.* делаются только в потоке скрипта, в цикл уходят лишь обращения к БД
+    return get_runtime().run(coro)
+
+
+def run_in_session(operation: Callable[[AsyncSession], Awaitable[R]]) -> R:
+    async def _run() -> R:
+        async with session_scope(get_session_factory()) as session:
+            return await operation(session)
+
+    return run_async(_run())
+
+
+def run_write(operation: Callable[[AsyncSession], Awaitable[R]]) -> R:
+    """Изменение через очередь записи; возвращает результат после коммита пачки."""
+    return run_async(get_write_coordinator().submit(operation))
+
+
+def iter_async(steps: AsyncIterator[R]) -> Iterator[R]:
+    """Асинхронный генератор по шагам из потока скрипта: между шагами можно вызывать st.*."""
+
+    async def _step():
+        return await anext(steps, _DONE)
+
+    try:
+        while (item := run_async(_step())) is not _DONE:
+            yield item
+    finally:
+        # Скрипт прерван (перезапуск, уход со страницы) — закрываем сессию и файл в цикле
+        run_async(steps.aclose())
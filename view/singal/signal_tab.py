@@ -1,49 +1,99 @@
-import os
 import streamlit as st
-from datetime import datetime, timedelta
-from vittrade import InvestmentService
+from datetime import timedelta
 
+from infrastructure.exporters.histories import history_export_steps, history_rows
+from infrastructure.instrumentation import timed
+from market.signal_snapshot import INTERVAL_SECONDS, read_status, signal_cache
+from view.shared.export import export_panel
 
-@st.cache_data(show_spinner="Загрузка данных с биржи...")
-def load_signals():
-    service = InvestmentService()
-    invest_ids = service.load_invest_ids()
+# Снимок старше двух периодов воркера считаем устаревшим
+STALE_AFTER = timedelta(seconds=2 * INTERVAL_SECONDS)
 
-    end_date = datetime.today()
-    start_date = end_date - timedelta(days=365)
-    start_str, end_str = start_date.strftime("%Y-%m-%d"), end_date.strftime("%Y-%m-%d")
+DISPLAY_COLUMNS = [
+    "TRADEDATE", "CLOSE", "RSI", "MACD", "EMA_12", "EMA_26",
+    "ADX", "Stoch_K", "Stoch_D", "ATR", "Signal"
+]
+SIGNAL_COLORS = {"BUY": "green", "SELL": "red"}
 
-    results = service.run_parallel_processing(invest_ids, start_str, end_str)
-    return service, invest_ids, results
 
+def _signal_label(signal: str | None) -> str:
+    color = SIGNAL_COLORS.get(signal)
+    return f":{color}[{signal}]" if color else str(signal)
 
+
+@timed()
+def load_snapshot(version: int):
+    # Не st.cache_data: тот отдаёт каждой сессии свою распакованную копию,
+    # а signal_cache — одну отображённую в память таблицу на процесс
+    return signal_cache.get(version)
+
+
+def _format_age(age: timedelta) -> str:
+    minutes = int(age.total_seconds() // 60)
+    if minutes < 60:
+        return f"{minutes} мин"
+    return f"{minutes // 60} ч {minutes % 60} мин"
+
+
+@timed()
 def show_signals_tab():
     st.header("📊 Инвестиционные сигналы")
 
-    service, invest_ids, results = load_signals()
+    version = signal_cache.latest_version()
+    snapshot = load_snapshot(version) if version is not None else None
+    status = read_status()
 
-    # --- агрегированные сигналы ---
-    buy, sell = service.get_today_signals(results)
+    if snapshot is None:
+        st.info("Сигналы ещё не рассчитаны. Запустите воркер: `python -m market.worker --once`")
+        return
+
+    st.caption(f"Снимок #{snapshot.version} от {snapshot.created_at:%d.%m.%Y %H:%M}, {_format_age(snapshot.age)} назад")
+    if not status.ok:
+        st.warning(f"Последнее обновление ({status.last_attempt:%d.%m.%Y %H:%M}) не удалось: {status.error}. "
+                   "Показан предыдущий снимок.")
+    elif snapshot.version != version:
+        st.warning(f"Снимок #{version} повреждён, показан #{snapshot.version}.")
+    elif snapshot.age > STALE_AFTER:
+        st.warning("Снимок устарел — проверьте, что воркер сигналов запущен.")
+    if status.ok and status.failed:
+        st.warning("Не обновились: " + ", ".join(f"{t} ({error})" for t, error in status.failed.items())
+                   + ". По ним показаны прежние данные.")
 
+    # --- агрегированные сигналы ---
     st.subheader("Сводка сигналов на последнюю дату")
-    st.write("🟢 Buy:", ", ".join(buy) if buy else "нет")
-    st.write("🔴 Sell:", ", ".join(sell) if sell else "нет")
+    st.write("🟢 Buy:", ", ".join(snapshot.buy) if snapshot.buy else "нет")
+    st.write("🔴 Sell:", ", ".join(snapshot.sell) if snapshot.sell else "нет")
+
+    # --- смены сигналов относительно прошлого снимка ---
+    transitions = {t.ticker: t for t in snapshot.transitions}
+    st.subheader("Изменения с прошлого снимка")
+    st.caption(f"Обновились истории {len(snapshot.changed)} из {len(snapshot.offsets)} инструментов")
+    for t in snapshot.transitions:
+        st.markdown(f"**{t.ticker}**: {_signal_label(t.before)} → {_signal_label(t.after)} ({t.date})")
+    if not snapshot.transitions:
+        st.write("Сигналы не сменились.")
 
     # --- последние 5 строк по каждому тикеру ---
     st.subheader("Последние 5 дней по каждому инструменту")
-    recent = service.get_recent_data(invest_ids, days=5)
-    for invest_id in invest_ids:
-        df = recent.get(invest_id)
-        if df is None or df.empty:
+    for invest_id in snapshot.invest_ids:
+        if invest_id not in snapshot.offsets:
             st.warning(f"{invest_id}: нет данных")
             continue
-        st.markdown(f"**{invest_id}**")
-        st.dataframe(df[[
-            "TRADEDATE", "CLOSE", "RSI", "MACD", "EMA_12", "EMA_26",
-            "ADX", "Stoch_K", "Stoch_D", "ATR", "Signal"
-        ]])
-
-    # --- Кнопка для открытия директории ---
-    if st.button("📂 Открыть папку с CSV"):
-        folder_path = os.path.abspath("data")
-        os.startfile(folder_path)  # работает в Windows
+        label = (f"**{invest_id}** · {_signal_label(snapshot.last(invest_id))} · "
+                 f"{snapshot.last(invest_id, 'TRADEDATE')}")
+        if invest_id in transitions:
+            label += f" · было {transitions[invest_id].before}"
+        # Таблица строится и уходит в браузер, только если тикер раскрыт; по умолчанию раскрыты
+        # тикеры со сменой сигнала. Версия в ключе — у нового снимка свой набор раскрытых
+        if st.toggle(label, value=invest_id in transitions, key=f"signal_rows_{snapshot.version}_{invest_id}"):
+            # Arrow-срез уходит в st.dataframe как есть, без промежуточного DataFrame
+            st.dataframe(snapshot.recent(invest_id).select(DISPLAY_COLUMNS))
+
+    # --- выгрузка полных историй ---
+    with st.expander("📥 Выгрузка историй инструментов"):
+        tickers = list(snapshot.invest_ids)
+        export_panel(
+            "histories",
+            lambda: history_rows(tickers),
+            lambda sink, fmt: history_export_steps(sink, fmt, tickers),
+        )
@@ -1,75 +1,168 @@
 import streamlit as st
-import asyncio
-from datetime import datetime
+from datetime import datetime, time
+from math import ceil
+import numpy as np
 import pandas as pd
 
+from analytics.portfolio import build_report
 from domain.entity import Trade
-from infrastructure.repositories.sqlite_config import SessionLocal
-from infrastructure.repositories.trade import TradeRepository
+from infrastructure.exporters.trades import trade_export_steps
+from infrastructure.instrumentation import timed
+from infrastructure.repositories.lookup import Lookup
+from infrastructure.repositories.trade import TradeFilter, TradeRepository
 from infrastructure.repositories.tradecode import TradeCodeRepository
 from infrastructure.repositories.tradetype import TradeTypeRepository
+from market.prices import prices
+from view.shared.export import export_panel
+from view.shared.runtime import get_session_factory, iter_async, run_in_session, run_write
 
+LISTING_COLUMNS = [
+    "ID", "DateOpen", "DateClose", "TradeOpen", "TradeClose",
+    "NetIncome", "Count", "Type", "Code",
+]
+PAGE_SIZE = 50
 
+
+@timed()
 def show_trade_tab():
     st.header("📄 Анализ сделок (локальная БД)")
-    if "init_done" not in st.session_state:
-        asyncio.run(_init_db_session())
-
-    asyncio.run(_show_current_trades())
-    asyncio.run(_start_investment_form())
-    asyncio.run(_end_investment_form())
-    asyncio.run(_add_trade_form())
-    asyncio.run(_edit_trade_form())
-    asyncio.run(_delete_trade_form())
+    types, codes = run_in_session(_load_lookups)
+    filters = _trade_filters(types, codes)
+    page = _show_current_trades(filters)
+    _export_trades(filters)
+    _portfolio_analytics(filters)
+    _start_investment_form(types, codes)
+    _end_investment_form()
+    _add_trade_form(types, codes)
+    _edit_trade_form(page, types, codes)
+    _delete_trade_form(page)
 
 
-# ---------- Инициализация ----------
-async def _init_db_session():
-    st.session_state.session = SessionLocal()
-    st.session_state.trade_repo = TradeRepository(st.session_state.session)
-    st.session_state.tradecode_repo = TradeCodeRepository(st.session_state.session)
-    st.session_state.tradetype_repo = TradeTypeRepository(st.session_state.session)
-    st.session_state.init_done = True
+async def _load_lookups(session) -> tuple[Lookup, Lookup]:
+    # Справочники берутся из процессного кэша: SQL только после записи в tradetypes/tradecodes
+    return await TradeTypeRepository(session).get_lookup(), await TradeCodeRepository(session).get_lookup()
 
 
 # ---------- Просмотр ----------
-async def _show_current_trades():
-    trades = await st.session_state.trade_repo.get_all()
-    if not trades:
+def _trade_filters(types: Lookup, codes: Lookup) -> TradeFilter:
+    type_options, code_options = types.by_name, codes.by_name
+
+    with st.expander("🔎 Фильтры"):
+        code = st.selectbox("Код", ["Все", *code_options], key="filter_code")
+        trade_type = st.selectbox("Тип", ["Все", *type_options], key="filter_type")
+        status = st.radio("Статус", ["Все", "Открытые", "Закрытые"], horizontal=True, key="filter_status")
+        period = st.date_input("Период открытия", value=(), key="filter_period")
+
+    return TradeFilter(
+        trade_code_id=code_options.get(code),
+        trade_type_id=type_options.get(trade_type),
+        date_from=datetime.combine(period[0], time.min) if len(period) == 2 else None,
+        date_to=datetime.combine(period[1], time.max) if len(period) == 2 else None,
+        is_open={"Открытые": True, "Закрытые": False}.get(status),
+    )
+
+
+def listing_frame(rows) -> pd.DataFrame:
+    df = pd.DataFrame.from_records(rows, columns=LISTING_COLUMNS)
+    df["DateOpen"] = pd.to_datetime(df["DateOpen"]).dt.strftime("%d.%m.%Y")
+    df["DateClose"] = pd.to_datetime(df["DateClose"]).dt.strftime("%d.%m.%Y").fillna("")
+    df["Type"] = df["Type"].fillna("")
+    df["Code"] = df["Code"].fillna("")
+    return df
+
+
+def _show_current_trades(filters: TradeFilter):
+    # Стек курсоров keyset-пагинации; при смене фильтров начинаем с первой страницы
+    if st.session_state.get("trade_filters") != filters:
+        st.session_state.trade_filters = filters
+        st.session_state.trade_cursors = []
+    cursors = st.session_state.trade_cursors
+    after = cursors[-1] if cursors else None
+
+    rows = run_in_session(
+        lambda s: TradeRepository(s).get_listing_snapshot(filters, after=after, limit=PAGE_SIZE)
+    )
+    if not rows:
+        if cursors:
+            cursors.clear()
+            st.rerun()
         st.info("Нет сделок в базе данных.")
-        return
-
-    df = pd.DataFrame([
-        {
-            "ID": t.id,
-            "DateOpen": t.date_open.strftime("%d.%m.%Y"),
-            "DateClose": t.date_close.strftime("%d.%m.%Y") if t.date_close else "",
-            "TradeOpen": t.trade_open,
-            "TradeClose": t.trade_close,
-            "NetIncome": t.net_income,
-            "Count": t.count,
-            "Type": t.trade_type.name if t.trade_type else "",
-            "Code": t.trade_code.exchange_id if t.trade_code else "",
-        }
-        for t in trades
-    ])
-    st.dataframe(df)
+        return rows
+
+    total = run_in_session(lambda s: TradeRepository(s).count_snapshot(filters))
+
+    st.dataframe(listing_frame(rows))
+
+    page_no = len(cursors) + 1
+    prev_col, info_col, next_col = st.columns([1, 3, 1])
+    if prev_col.button("← Назад", disabled=not cursors):
+        cursors.pop()
+        st.rerun()
+    info_col.caption(f"Страница {page_no} из {max(1, ceil(total / PAGE_SIZE))} · всего сделок: {total}")
+    if next_col.button("Вперёд →", disabled=page_no * PAGE_SIZE >= total):
+        cursors.append(TradeRepository.cursor(rows[-1]))
+        st.rerun()
+    return rows
+
+
+def _export_trades(filters: TradeFilter):
+    with st.expander("📥 Выгрузка сделок (текущие фильтры)"):
+        export_panel(
+            "trades",
+            lambda: run_in_session(lambda s: TradeRepository(s).count_snapshot(filters)),
+            lambda sink, fmt: iter_async(trade_export_steps(sink, fmt, filters, session_factory=get_session_factory())),
+        )
+
+
+# ---------- Аналитика ----------
+def _portfolio_analytics(filters: TradeFilter):
+    with st.expander("📈 Аналитика портфеля"):
+        ledger = run_in_session(lambda s: TradeRepository(s).get_ledger_snapshot(filters))
+        # Последние цены открытых тикеров из процессного индекса — файлы перечитываются только при изменении
+        price_table = prices.table(ledger["exchange_id"][np.isnat(ledger["date_close"])])
+        report = build_report(ledger, price_table)
+        if not report.closed_trades and not report.open_trades:
+            st.info("Нет сделок для анализа.")
+            return
+
+        c1, c2, c3 = st.columns(3)
+        c1.metric("Реализованный PnL", f"{report.realized_pnl:,.2f}")
+        c2.metric("Win rate", f"{report.win_rate:.1f}%")
+        c3.metric("Средний срок, дней", f"{report.avg_holding_days:.1f}")
+        c1.metric("Закрытых сделок", report.closed_trades)
+        c2.metric("Открытых сделок", report.open_trades)
+        c3.metric("Макс. просадка", f"{report.max_drawdown:,.2f}")
+        if report.open_trades:
+            c1.metric("Нереализованный PnL", f"{report.unrealized_pnl:,.2f}")
+
+        if not report.equity.empty:
+            st.markdown("**Кривая капитала**")
+            st.line_chart(report.equity, x="Date", y=["Equity", "Drawdown"])
+        if not report.by_ticker.empty:
+            st.markdown("**Результат по тикерам и типам**")
+            st.dataframe(report.by_ticker, hide_index=True)
+        if not report.exposure.empty:
+            st.markdown("**Экспозиция открытых позиций** (Gross/Net — по цене входа, Market — по последнему CLOSE)")
+            st.dataframe(report.exposure, hide_index=True)
+            st.markdown("**Открытые позиции по последней цене**")
+            st.dataframe(report.open_positions, hide_index=True)
+            unpriced = report.exposure.loc[report.exposure["LastClose"].isna(), "Code"].tolist()
+            if unpriced:
+                st.caption(f"Нет сохранённой истории цен: {', '.join(unpriced)}")
 
 
 # ---------- Начало инвестиции ----------
-async def _start_investment_form():
+def _start_investment_form(types: Lookup, codes: Lookup):
     with st.expander("🚀 Начать инвестицию"):
         with st.form("start_investment"):
             date_open = st.date_input("Дата открытия", datetime.now()).strftime("%Y-%m-%d")
             trade_open = st.number_input("TradeOpen", min_value=0.0, step=0.01)
             count = st.number_input("Count", min_value=1, step=1)
 
-            types = await st.session_state.tradetype_repo.get_all()
-            type_options = {t.name: t.id for t in types}
+            type_options = types.by_name
             trade_type = st.selectbox("Тип", list(type_options.keys()))
 
-            codes = await st.session_state.tradecode_repo.get_all()
-            code_options = {c.exchange_id: c.id for c in codes}
+            code_options = codes.by_name
             trade_code = st.selectbox("Код", list(code_options.keys()))
 
             user_id = 1
@@ -87,51 +180,50 @@ async def _start_investment_form():
                     trade_code_id=code_options[trade_code],
                     user_id=user_id,
                 )
-                await st.session_state.trade_repo.add(trade)
+                run_write(lambda s: TradeRepository(s).add(trade))
                 st.success("Инвестиция начата!")
                 st.rerun()
 
 
 # ---------- Закрытие сделки ----------
-async def _end_investment_form():
+def _end_investment_form():
     with st.expander("✅ Закончить инвестицию"):
-        trades = await st.session_state.trade_repo.get_all()
-        open_trades = [t for t in trades if t.date_close is None]
+        open_trades = run_in_session(
+            lambda s: TradeRepository(s).get_listing_snapshot(TradeFilter(is_open=True))
+        )
 
         if not open_trades:
             st.info("Нет открытых сделок для завершения.")
             return
 
-        trade_dict = {f"{t.id} | {t.trade_code.exchange_id}": t.id for t in open_trades}
-        selected_key = st.selectbox("Выберите сделку", list(trade_dict.keys()))
-        selected_id = trade_dict[selected_key]
+        trade_dict = {f"{r.id} | {r.exchange_id}": r for r in open_trades}
+        selected_key = st.selectbox("Выберите сделку", list(trade_dict.keys()), key="end_trade")
+        selected = trade_dict[selected_key]
 
         trade_close = st.number_input("TradeClose", min_value=0.0, step=0.01)
         date_close = datetime.now()
         submit = st.button("Закрыть")
 
         if submit:
-            trade = await st.session_state.trade_repo.get_by_id(selected_id)
-            trade.trade_close = trade_close
-            trade.date_close = date_close
-            if trade.trade_open:
-                if trade.trade_type.name.lower() == "buy":
-                    trade.net_income = round(((trade_close - trade.trade_open) / trade.trade_open) * 100, 2)
+            net_income = None
+            if selected.trade_open:
+                if (selected.type_name or "").lower() == "buy":
+                    net_income = round(((trade_close - selected.trade_open) / selected.trade_open) * 100, 2)
                 else:
-                    trade.net_income = round(((trade.trade_open - trade_close) / trade.trade_open) * 100, 2)
-
-            await st.session_state.trade_repo.update(
-                trade.id,
-                trade_close=trade.trade_close,
-                date_close=trade.date_close,
-                net_income=trade.net_income,
-            )
+                    net_income = round(((selected.trade_open - trade_close) / selected.trade_open) * 100, 2)
+
+            run_write(lambda s: TradeRepository(s).update(
+                selected.id,
+                trade_close=trade_close,
+                date_close=date_close,
+                net_income=net_income,
+            ))
             st.success("Сделка завершена!")
             st.rerun()
 
 
 # ---------- Добавление вручную ----------
-async def _add_trade_form():
+def _add_trade_form(types: Lookup, codes: Lookup):
     with st.expander("➕ Добавить сделку (ручное CRUD)"):
         with st.form("add_trade"):
             date_open = st.date_input("Дата открытия", datetime.now()).strftime("%Y-%m-%d")
@@ -141,12 +233,10 @@ async def _add_trade_form():
             net_income = st.text_input("NetIncome")
             count = st.number_input("Count", min_value=1, step=1)
 
-            types = await st.session_state.tradetype_repo.get_all()
-            type_options = {t.name: t.id for t in types}
+            type_options = types.by_name
             trade_type = st.selectbox("Тип", list(type_options.keys()))
 
-            codes = await st.session_state.tradecode_repo.get_all()
-            code_options = {c.exchange_id: c.id for c in codes}
+            code_options = codes.by_name
             trade_code = st.selectbox("Код", list(code_options.keys()))
 
             submit = st.form_submit_button("Добавить")
@@ -163,23 +253,22 @@ async def _add_trade_form():
                     trade_code_id=code_options[trade_code],
                     user_id=1,
                 )
-                await st.session_state.trade_repo.add(trade)
+                run_write(lambda s: TradeRepository(s).add(trade))
                 st.success("Сделка добавлена!")
                 st.rerun()
 
 
 # ---------- Редактирование ----------
-async def _edit_trade_form():
-    with st.expander("✏️ Редактировать сделку"):
-        trades = await st.session_state.trade_repo.get_all()
-        if not trades:
+def _edit_trade_form(rows, types: Lookup, codes: Lookup):
+    with st.expander("✏️ Редактировать сделку (текущая страница)"):
+        if not rows:
             st.info("Нет сделок для редактирования.")
             return
 
-        trade_dict = {f"{t.id} | {t.trade_code.exchange_id}": t.id for t in trades}
-        selected_key = st.selectbox("Выберите сделку", list(trade_dict.keys()))
+        trade_dict = {f"{r.id} | {r.exchange_id}": r.id for r in rows}
+        selected_key = st.selectbox("Выберите сделку", list(trade_dict.keys()), key="edit_trade")
         selected_id = trade_dict[selected_key]
-        trade = await st.session_state.trade_repo.get_by_id(selected_id)
+        trade = run_in_session(lambda s: TradeRepository(s).get_by_id(selected_id))
 
         with st.form("edit_trade"):
             date_open = st.text_input("DateOpen", trade.date_open.strftime("%Y-%m-%d"))
@@ -188,12 +277,13 @@ async def _edit_trade_form():
             trade_close = st.text_input("TradeClose", str(trade.trade_close or ""))
             net_income = st.text_input("NetIncome", str(trade.net_income or ""))
             count = st.number_input("Count", min_value=1, value=trade.count, step=1)
-            trade_type_id = st.number_input("TradeType ID", min_value=1, value=trade.trade_type_id, step=1)
-            trade_code_id = st.number_input("TradeCode ID", min_value=1, value=trade.trade_code_id, step=1)
+            type_names, code_names = list(types.by_name), list(codes.by_name)
+            trade_type = st.selectbox("Тип", type_names, index=type_names.index(types.by_id[trade.trade_type_id]))
+            trade_code = st.selectbox("Код", code_names, index=code_names.index(codes.by_id[trade.trade_code_id]))
             save_btn = st.form_submit_button("Сохранить изменения")
 
             if save_btn:
-                await st.session_state.trade_repo.update(
+                run_write(lambda s: TradeRepository(s).update(
                     trade.id,
                     date_open=datetime.strptime(date_open, "%Y-%m-%d"),
                     date_close=datetime.strptime(date_close, "%Y-%m-%d") if date_close else None,
@@ -201,23 +291,22 @@ async def _edit_trade_form():
                     trade_close=float(trade_close) if trade_close else None,
                     net_income=float(net_income) if net_income else None,
                     count=count,
-                    trade_type_id=trade_type_id,
-                    trade_code_id=trade_code_id,
-                )
+                    trade_type_id=types.by_name[trade_type],
+                    trade_code_id=codes.by_name[trade_code],
+                ))
                 st.success("Изменения сохранены!")
                 st.rerun()
 
 
 # ---------- Удаление ----------
-async def _delete_trade_form():
-    with st.expander("🗑 Удалить сделку"):
-        trades = await st.session_state.trade_repo.get_all()
-        if not trades:
+def _delete_trade_form(rows):
+    with st.expander("🗑 Удалить сделку (текущая страница)"):
+        if not rows:
             st.info("Нет сделок для удаления.")
             return
-        ids = [t.id for t in trades]
+        ids = [r.id for r in rows]
         selected_id = st.selectbox("Выбери ID", ids)
         if st.button("Удалить"):
-            await st.session_state.trade_repo.delete(selected_id)
+            run_write(lambda s: TradeRepository(s).delete(selected_id))
             st.success("Удалено!")
             st.rerun()